@@ -1,7 +1,7 @@
 from pathlib import Path
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.project.crud import get_project
 from app.project.db import AsyncSessionLocal
-from app.project.crud import get_project     # <- уже есть
 import json
 
 PROJECTS_FILE = Path("config") / "projects.json"
@@ -10,6 +10,18 @@ class ProjectNotFound(Exception):
     """Проект не найден в projects.json."""
 
 
+async def get_project_record(project_id: str):
+    """
+    Проект (ключ + настройки отправки) из БД или ProjectNotFound.
+    Кэш авторизации ключа не хранит, поэтому здесь всегда select.
+    """
+    async with AsyncSessionLocal() as db:
+        proj = await get_project(db, project_id)
+    if not proj:
+        raise ProjectNotFound(f"project {project_id} not found")
+    return proj
+
+
 async def get_project_api_key(project_id: str) -> str:
     """
     Вернёт API-ключ проекта или бросит ProjectNotFound.
@@ -19,8 +31,4 @@ async def get_project_api_key(project_id: str) -> str:
       {"id": "proj2", "api_key": "abcd1234"}
     ]
     """
-    async with AsyncSessionLocal() as db:
-        proj = await get_project(db, project_id)
-    if not proj:
-        raise ProjectNotFound(f"project {project_id} not found")
-    return proj.api_key
+    return (await get_project_record(project_id)).api_key
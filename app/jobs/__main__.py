@@ -0,0 +1,39 @@
+"""
+Воркеры очереди отдельным процессом:
+
+    JOBS_IN_PROCESS=false uvicorn app.main:app      # веб только ставит задания
+    python -m app.jobs [workers]                     # исполняет их (на том же узле)
+
+Метрики процесса воркеров — на METRICS_WORKER_PORT (0 — не отдавать).
+
+Очередь — `jobs.db` рядом с DB_PATH, поэтому воркеры должны видеть тот же
+диск, что и веб-сервер (туда же сохраняются загрузки).
+"""
+import asyncio, sys
+from contextlib import suppress
+
+from app.metrics.router import serve
+from app.parser.executor import shutdown_executor
+from app.project.db import init_models
+from app.sender.client import open_client, close_clients
+from app.sender.constants import DEFAULT_ENDPOINT
+from core.settings import settings
+from .worker import run_workers
+
+
+async def main(workers: int | None = None) -> None:
+    await init_models()
+    open_client(DEFAULT_ENDPOINT)
+    server = await serve(settings.METRICS_WORKER_PORT) if settings.METRICS_WORKER_PORT else None
+    try:
+        await run_workers(workers)
+    finally:
+        if server is not None:
+            server.close()
+        await close_clients()
+        shutdown_executor()
+
+
+if __name__ == "__main__":
+    with suppress(KeyboardInterrupt):
+        asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else None))
@@ -0,0 +1,78 @@
+"""
+Прогресс выполнения задания.
+
+Пайплайн отмечает этапы (`stage`) и обработанные куски (`chunk_done`),
+а `Progress` копит время по этапам в памяти и пишет снимок в jobs.db не
+чаще раза в JOBS_PROGRESS_INTERVAL секунд — запись статуса не тормозит
+пайплайн даже на мелких кусках. Первый и последний снимок пишутся всегда.
+
+Без `job_id` (прямой вызов `run_full_pipeline`) прогресс никуда не пишется.
+Время этапов при этом всегда уходит в метрику `pipeline_stage_seconds`, а на
+границе каждого этапа снимается RSS процесса, а RSS процесса пула, где шли
+map и QC, пайплайн передаёт через `note_rss` (`peak_rss` — максимум за файл
+по обоим).
+"""
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterator
+
+from core.settings import settings
+from app.metrics.instruments import STAGE_SECONDS
+from app.metrics.registry import rss_bytes
+from . import queue
+
+MAX_ERRORS = 20             # сколько ошибок кусков хранить в статусе
+
+
+class Progress:
+    def __init__(self, job_id: str | None = None, worker: str | None = None):
+        self.job_id = job_id
+        self.worker = worker                # кто держит задание: чужой прогон не затираем
+        self.current = "started"
+        self.rows = 0
+        self.chunks = 0
+        self.timings: dict[str, float] = defaultdict(float)
+        self.errors: list[str] = []
+        self.peak_rss = 0
+        self._flushed = float("-inf")
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Этап `name`: время блока прибавляется к timings[name]."""
+        self.current = name
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Время этапа, измеренное в другом месте (например, в пуле процессов)."""
+        self.timings[name] += seconds
+        STAGE_SECONDS.observe(seconds, stage=name)
+        self.peak_rss = max(self.peak_rss, rss_bytes())
+
+    def note_rss(self, rss: int) -> None:
+        """RSS, снятый в другом процессе (пул map/QC)."""
+        self.peak_rss = max(self.peak_rss, rss)
+
+    def chunk_done(self, rows: int) -> None:
+        self.rows += rows
+        self.chunks += 1
+
+    def error(self, message: str) -> None:
+        """Ошибка, не прервавшая пайплайн (например, неотправленный кусок)."""
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(message)
+
+    async def flush(self, force: bool = False) -> None:
+        """Записать снимок, если прошло JOBS_PROGRESS_INTERVAL (или force)."""
+        if self.job_id is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._flushed < settings.JOBS_PROGRESS_INTERVAL:
+            return
+        self._flushed = now
+        await queue.progress(self.job_id, self.worker, self.current, self.rows, self.chunks,
+                             {k: round(v, 4) for k, v in self.timings.items()}, self.errors)
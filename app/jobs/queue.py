@@ -0,0 +1,328 @@
+"""
+Надёжная очередь заданий пайплайна.
+
+Раньше загрузка запускала `launch_pipeline` через BackgroundTasks прямо
+в процессе веб-сервера: без лимита одновременных пайплайнов, без
+сохранения (перезапуск терял всё, что не успело отработать) и без
+видимости. Теперь загрузка только ставит задание в очередь, а исполняют
+его воркеры (`worker.py`) — в том же процессе или отдельным
+`python -m app.jobs`.
+
+Как устроено:
+
+    • индекс — SQLite-файл `jobs.db` рядом с БД проектов (как outbox):
+      загруженные файлы лежат на диске узла, очередь живёт там же;
+    • `enqueue` отказывает (QueueFull → 429), если ждущих заданий уже
+      JOBS_MAX_PENDING — загрузки не копятся без предела;
+    • `claim` в одной транзакции BEGIN IMMEDIATE выбирает самое старое
+      задание проекта, у которого запущено меньше JOBS_PER_PROJECT, —
+      лимит общий для всех процессов-воркеров;
+    • взятое задание держит аренду (`lease_until`), воркер продлевает её,
+      пока пайплайн идёт; `recover` возвращает в очередь задания с
+      истёкшей арендой (процесс упал), а после JOBS_MAX_ATTEMPTS падений
+      подряд задание считается ядовитым и помечается failed;
+    • прогресс, итог и продление аренды пишет только воркер, который
+      держит задание (`status = 'running' AND worker = ?`): воркер с
+      истёкшей арендой не затрёт прогон, взятый заново другим;
+    • завершённые задания (done / failed) хранятся JOBS_RETENTION сек.,
+      потом `prune` их удаляет — таблица не растёт без предела.
+
+Статусы: pending → running → done / failed. Пока задание идёт, пайплайн
+пишет в ту же строку этап, число строк и время по этапам (`progress`).
+"""
+import asyncio, sqlite3, time, uuid, weakref
+import orjson
+from contextlib import closing
+from pathlib import Path
+
+from core.settings import settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT    PRIMARY KEY,
+    project_id  TEXT    NOT NULL,
+    path        TEXT    NOT NULL,
+    status      TEXT    NOT NULL DEFAULT 'pending',   -- pending / running / done / failed
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    created_at  REAL    NOT NULL,
+    started_at  REAL,
+    finished_at REAL,
+    lease_until REAL,
+    worker      TEXT,
+    error       TEXT,
+    stage       TEXT    NOT NULL DEFAULT 'queued',
+    rows        INTEGER NOT NULL DEFAULT 0,
+    chunks      INTEGER NOT NULL DEFAULT 0,
+    timings     TEXT    NOT NULL DEFAULT '{}',        -- {этап: секунды}
+    errors      TEXT    NOT NULL DEFAULT '[]',        -- ошибки кусков, не прервавшие пайплайн
+    updated_at  REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_project ON jobs (project_id, status);
+CREATE INDEX IF NOT EXISTS jobs_recent ON jobs (project_id, created_at);
+"""
+
+# колонки, добавленные после первой версии схемы (для существующих jobs.db)
+_LATER_COLUMNS = {
+    "stage":      "TEXT NOT NULL DEFAULT 'queued'",
+    "rows":       "INTEGER NOT NULL DEFAULT 0",
+    "chunks":     "INTEGER NOT NULL DEFAULT 0",
+    "timings":    "TEXT NOT NULL DEFAULT '{}'",
+    "errors":     "TEXT NOT NULL DEFAULT '[]'",
+    "updated_at": "REAL",
+}
+_ready: set[Path] = set()          # файлы, где схема уже проверена этим процессом
+PRUNE_INTERVAL = 3600.0            # сек. между чистками завершённых заданий (на процесс)
+_pruned_at = float("-inf")
+
+
+class QueueFull(Exception):
+    """Ждущих заданий уже JOBS_MAX_PENDING — новое не принимаем."""
+
+
+def _db_path() -> Path:
+    return Path(settings.DB_PATH).resolve().parent / "jobs.db"
+
+
+def _connect() -> closing[sqlite3.Connection]:
+    """Соединение в режиме autocommit; закрывается на выходе из `with`."""
+    path = _db_path()
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if path not in _ready:                   # WAL и схема — свойства файла, хватит раза
+        conn.execute("PRAGMA journal_mode=WAL")
+        have = {r["name"] for r in conn.execute("PRAGMA table_info(jobs)")}
+        for name, ddl in _LATER_COLUMNS.items():
+            if have and name not in have:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {ddl}")
+        conn.executescript(_SCHEMA)
+        _ready.add(path)
+    return closing(conn)
+
+
+# ---------- синхронные операции (зовём через to_thread) ----------
+def _enqueue(project_id: str, path: str) -> str:
+    job_id = uuid.uuid4().hex
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        pending = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'pending'").fetchone()[0]
+        if pending >= settings.JOBS_MAX_PENDING:
+            conn.execute("ROLLBACK")
+            raise QueueFull(f"{pending} jobs pending")
+        conn.execute("INSERT INTO jobs (id, project_id, path, created_at) VALUES (?, ?, ?, ?)",
+                     (job_id, project_id, path, time.time()))
+        conn.execute("COMMIT")
+    return job_id
+
+
+def _claim(worker: str) -> sqlite3.Row | None:
+    now = time.time()
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT * FROM jobs AS j WHERE status = 'pending' AND"
+            " (SELECT COUNT(*) FROM jobs AS r"
+            "   WHERE r.project_id = j.project_id AND r.status = 'running') < ?"
+            " ORDER BY created_at LIMIT 1", (settings.JOBS_PER_PROJECT,),
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?,"
+                " lease_until = ?, worker = ?, stage = 'started', rows = 0, chunks = 0,"
+                " timings = '{}', errors = '[]', updated_at = ? WHERE id = ?",
+                (now, now + settings.JOBS_LEASE, worker, now, row["id"]),
+            )
+        conn.execute("COMMIT")
+    return row
+
+
+# запись от имени воркера — только пока задание за ним (иначе rowcount = 0)
+_OWNED = " WHERE id = ? AND status = 'running' AND worker = ?"
+
+
+def _extend(job_id: str, worker: str) -> bool:
+    with _connect() as conn:
+        return conn.execute("UPDATE jobs SET lease_until = ?" + _OWNED,
+                            (time.time() + settings.JOBS_LEASE, job_id, worker)).rowcount > 0
+
+
+def _progress(job_id: str, worker: str, stage: str, rows: int, chunks: int,
+              timings: dict[str, float], errors: list[str]) -> bool:
+    with _connect() as conn:
+        return conn.execute(
+            "UPDATE jobs SET stage = ?, rows = ?, chunks = ?, timings = ?, errors = ?, updated_at = ?" + _OWNED,
+            (stage, rows, chunks, orjson.dumps(timings), orjson.dumps(errors), time.time(), job_id, worker),
+        ).rowcount > 0
+
+
+def _finish(job_id: str, worker: str, error: str | None) -> bool:
+    """Итог задания; этап `done` только при успехе — у упавшего остаётся этап падения."""
+    now = time.time()
+    with _connect() as conn:
+        return conn.execute(
+            "UPDATE jobs SET status = ?, stage = CASE WHEN ? IS NULL THEN 'done' ELSE stage END,"
+            " finished_at = ?, updated_at = ?, lease_until = NULL, error = ?" + _OWNED,
+            ("failed" if error is not None else "done", error, now, now, error, job_id, worker),
+        ).rowcount > 0
+
+
+def _release(job_id: str, worker: str) -> None:
+    """Воркер останавливается посреди задания — вернуть его в очередь без штрафа."""
+    with _connect() as conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'pending', attempts = attempts - 1, lease_until = NULL,"
+            " worker = NULL, stage = 'queued'" + _OWNED, (job_id, worker),
+        )
+
+
+def _recover() -> int:
+    """Задания с истёкшей арендой → pending (или failed после JOBS_MAX_ATTEMPTS)."""
+    now = time.time()
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', finished_at = ?, lease_until = NULL,"
+            " error = 'worker died ' || attempts || ' times'"
+            " WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+            (now, now, settings.JOBS_MAX_ATTEMPTS),
+        )
+        n = conn.execute(
+            "UPDATE jobs SET status = 'pending', lease_until = NULL, worker = NULL, stage = 'queued'"
+            " WHERE status = 'running' AND lease_until < ?", (now,),
+        ).rowcount
+        conn.execute("COMMIT")
+    return n
+
+
+def _prune() -> int:
+    """Удалить задания, завершённые раньше JOBS_RETENTION сек. назад."""
+    cutoff = time.time() - settings.JOBS_RETENTION
+    with _connect() as conn:
+        # created_at < cutoff — по индексу jobs_status; finished_at — для долгих заданий
+        return conn.execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND created_at < ? AND finished_at < ?",
+            (cutoff, cutoff),
+        ).rowcount
+
+
+def _decode(row: sqlite3.Row) -> dict:
+    job = dict(row)
+    job["timings"] = orjson.loads(job["timings"])
+    job["errors"] = orjson.loads(job["errors"])
+    return job
+
+
+def _get(job_id: str) -> dict | None:
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _decode(row) if row is not None else None
+
+
+def _list(project_id: str, status: str | None, limit: int) -> list[dict]:
+    sql = "SELECT * FROM jobs WHERE project_id = ?"
+    args: list = [project_id]
+    if status is not None:
+        sql += " AND status = ?"
+        args.append(status)
+    with _connect() as conn:
+        rows = conn.execute(sql + " ORDER BY created_at DESC LIMIT ?", (*args, limit)).fetchall()
+    return [_decode(r) for r in rows]
+
+
+ACTIVE = ("pending", "running")
+
+
+def _depth() -> dict[str, int]:
+    """Ждущие и идущие задания — по индексу jobs_status, без обхода завершённых."""
+    with _connect() as conn:
+        rows = conn.execute("SELECT status, COUNT(*) FROM jobs WHERE status IN (?, ?)"
+                            " GROUP BY status", ACTIVE).fetchall()
+    return {status: n for status, n in rows}
+
+
+# ---------- async API ----------
+async def enqueue(project_id: str, path: str) -> str:
+    """Поставить файл в очередь; вернуть id задания или бросить QueueFull."""
+    job_id = await asyncio.to_thread(_enqueue, project_id, path)
+    _wakeup().set()
+    return job_id
+
+
+async def claim(worker: str) -> sqlite3.Row | None:
+    """Взять следующее задание с учётом лимита на проект (или None)."""
+    _wakeup().clear()          # всё, что поставят после, разбудит следующий wait
+    return await asyncio.to_thread(_claim, worker)
+
+
+async def extend(job_id: str, worker: str) -> bool:
+    """Продлить аренду; False — задание уже не за этим воркером."""
+    return await asyncio.to_thread(_extend, job_id, worker)
+
+
+async def progress(job_id: str, worker: str, stage: str, rows: int, chunks: int,
+                   timings: dict[str, float], errors: list[str]) -> bool:
+    """Снимок прогресса (этап, строки, время по этапам) — см. progress.Progress."""
+    return await asyncio.to_thread(_progress, job_id, worker, stage, rows, chunks, timings, errors)
+
+
+async def get(job_id: str) -> dict | None:
+    """Задание целиком (timings/errors — уже разобранные) или None."""
+    return await asyncio.to_thread(_get, job_id)
+
+
+async def list_jobs(project_id: str, status: str | None = None, limit: int = 50) -> list[dict]:
+    """Последние задания проекта, новые первыми."""
+    return await asyncio.to_thread(_list, project_id, status, limit)
+
+
+async def finish(job_id: str, worker: str, error: str | None = None) -> bool:
+    """
+    Задание завершено: done или failed с текстом ошибки. False — аренда
+    истекла и задание взято заново: итог этого прогона не записан.
+    """
+    written = await asyncio.to_thread(_finish, job_id, worker, error)
+    _wakeup().set()            # освободился слот проекта
+    return written
+
+
+async def release(job_id: str, worker: str) -> None:
+    await asyncio.to_thread(_release, job_id, worker)
+
+
+async def recover() -> int:
+    return await asyncio.to_thread(_recover)
+
+
+async def prune() -> int:
+    """Чистка завершённых заданий — не чаще раза в PRUNE_INTERVAL сек. на процесс."""
+    global _pruned_at
+    if settings.JOBS_RETENTION <= 0 or time.monotonic() - _pruned_at < PRUNE_INTERVAL:
+        return 0
+    _pruned_at = time.monotonic()
+    return await asyncio.to_thread(_prune)
+
+
+async def depth() -> dict[str, int]:
+    """Глубина очереди: число заданий pending / running (завершённые — в jobs_finished_total)."""
+    return await asyncio.to_thread(_depth)
+
+
+# будят воркеры этого процесса сразу после enqueue/finish (по событию на
+# event loop); другие процессы узнают о новых заданиях опросом
+_events: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Event]" = weakref.WeakKeyDictionary()
+
+
+def _wakeup() -> asyncio.Event:
+    loop = asyncio.get_running_loop()
+    if (ev := _events.get(loop)) is None:
+        ev = _events[loop] = asyncio.Event()
+    return ev
+
+
+async def wait(timeout: float) -> None:
+    """Ждать нового задания в этом процессе или истечения `timeout`."""
+    try:
+        await asyncio.wait_for(_wakeup().wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
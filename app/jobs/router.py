@@ -0,0 +1,26 @@
+"""
+Статус заданий пайплайна.
+
+* `GET /jobs/{job_id}` — одно задание (404, если чужое или нет)
+* `GET /jobs/`         — последние задания проекта, фильтр `status`
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.project.auth import get_current_project
+from . import queue
+from .schemas import JobState, JobStatus
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.get("/", response_model=list[JobStatus])
+async def list_(status: JobState | None = None,
+                limit: int = Query(50, ge=1, le=500),
+                project = Depends(get_current_project)):
+    """Задания проекта, новые первыми."""
+    return [JobStatus.from_row(j) for j in await queue.list_jobs(project.id, status, limit)]
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_(job_id: str, project = Depends(get_current_project)):
+    job = await queue.get(job_id)
+    if job is None or job["project_id"] != project.id:
+        raise HTTPException(404, "job_not_found")
+    return JobStatus.from_row(job)
@@ -0,0 +1,41 @@
+"""
+Pydantic-схемы статуса заданий (GET /jobs/...).
+"""
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+JobState = Literal["pending", "running", "done", "failed"]
+
+class JobStatus(BaseModel):
+    """
+    Состояние задания пайплайна.
+
+    * `stage`   – текущий этап: queued / started / parse / map/qc / send /
+                  report / done (у упавшего — этап, на котором упал);
+                  маппинг и QC идут одним вызовом пула — один этап
+    * `rows`, `chunks` – сколько строк и кусков уже прошло весь пайплайн
+    * `timings` – секунды по этапам (сумма по кускам); map и qc — отдельно
+    * `errors`  – ошибки кусков, не прервавшие пайплайн (неотправленные куски)
+    * `error`   – причина падения задания
+    """
+    id: str
+    project_id: str
+    file: str
+    status: JobState
+    stage: str
+    rows: int
+    chunks: int
+    attempts: int
+    timings: dict[str, float]
+    errors: list[str]
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    updated_at: datetime | None = None
+
+    @classmethod
+    def from_row(cls, job: dict) -> "JobStatus":
+        return cls(file=job["path"], **{k: v for k, v in job.items() if k in cls.model_fields})
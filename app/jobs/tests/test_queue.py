@@ -0,0 +1,198 @@
+"""
+Очередь заданий: лимит на проект, backpressure, возврат заданий
+упавших воркеров, исполнение пулом и статус заданий.
+"""
+import asyncio, uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from core.settings import settings
+from app.project.db import init_models
+from app.jobs import queue, worker
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tables():
+    asyncio.run(init_models())                  # новые колонки projects (тесты без lifespan)
+
+
+@pytest.fixture(autouse=True)
+def jobs_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_PATH", str(tmp_path / "mapping.db"))
+    monkeypatch.setattr(settings, "JOBS_PER_PROJECT", 1)
+
+
+@pytest.mark.asyncio
+async def test_caps_and_backpressure(monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_MAX_PENDING", 3)
+    a1 = await queue.enqueue("a", "a1.csv")
+    await queue.enqueue("a", "a2.csv")
+    b1 = await queue.enqueue("b", "b1.csv")
+    with pytest.raises(queue.QueueFull):
+        await queue.enqueue("c", "c1.csv")
+
+    assert (await queue.claim("w"))["id"] == a1
+    assert (await queue.claim("w"))["id"] == b1          # второе задание "a" ждёт слота
+    assert await queue.claim("w") is None
+    await queue.finish(a1, "w")
+    assert (await queue.claim("w"))["path"] == "a2.csv"
+    assert await queue.depth() == {"running": 2}          # завершённые в глубину не входят
+
+
+@pytest.mark.asyncio
+async def test_recover_expired_lease(monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_LEASE", -1)      # аренда истекает сразу — «воркер умер»
+    monkeypatch.setattr(settings, "JOBS_MAX_ATTEMPTS", 2)
+    job = await queue.enqueue("a", "a.csv")
+
+    await queue.claim("w")
+    assert await queue.recover() == 1
+    assert await queue.depth() == {"pending": 1}
+    await queue.claim("w")
+    assert await queue.recover() == 0                    # вторая смерть — задание ядовитое
+    assert await queue.depth() == {}
+    assert (await queue.get(job))["status"] == "failed"
+
+
+@pytest.mark.asyncio
+async def test_stale_worker_cannot_overwrite(monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_LEASE", -1)
+    job = await queue.enqueue("a", "a.csv")
+    await queue.claim("old")
+    assert await queue.recover() == 1                    # аренда «old» истекла
+    monkeypatch.setattr(settings, "JOBS_LEASE", 60)
+    await queue.claim("new")
+
+    assert not await queue.progress(job, "old", "send", 99, 9, {}, [])
+    assert not await queue.finish(job, "old", error="late")
+    assert not await queue.extend(job, "old")
+    assert await queue.progress(job, "new", "parse", 1, 1, {}, [])
+    got = await queue.get(job)
+    assert (got["status"], got["stage"], got["rows"], got["worker"]) == ("running", "parse", 1, "new")
+
+
+@pytest.mark.asyncio
+async def test_prune_finished(monkeypatch):
+    done = await queue.enqueue("a", "a.csv")
+    await queue.claim("w")
+    await queue.finish(done, "w")
+    waiting = await queue.enqueue("a", "b.csv")
+
+    monkeypatch.setattr(queue, "_pruned_at", float("-inf"))
+    assert await queue.prune() == 0                      # ещё свежее
+    monkeypatch.setattr(settings, "JOBS_RETENTION", 1e-6)
+    monkeypatch.setattr(queue, "_pruned_at", float("-inf"))
+    await asyncio.sleep(0.01)
+    assert await queue.prune() == 1
+    assert await queue.get(done) is None and await queue.get(waiting) is not None
+    assert await queue.prune() == 0                      # троттлинг: раз в PRUNE_INTERVAL
+
+
+@pytest.mark.asyncio
+async def test_worker_pool(monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_POLL_INTERVAL", 0.05)
+    running, peak, seen = set(), [0], []
+
+    async def fake_pipeline(project_id, path, progress=None):
+        assert project_id not in running                 # не больше одного на проект
+        running.add(project_id)
+        peak[0] = max(peak[0], len(running))
+        await asyncio.sleep(0.02)
+        running.discard(project_id)
+        seen.append(path)
+        if path == "bad.csv":
+            raise ValueError("boom")
+
+    monkeypatch.setattr(worker, "launch_pipeline", fake_pipeline)
+    for i in range(3):
+        await queue.enqueue("a", f"a{i}.csv")
+        await queue.enqueue("b", f"b{i}.csv")
+    await queue.enqueue("c", "bad.csv")
+
+    pool = asyncio.create_task(worker.run_workers(3))
+    while (await queue.depth()).get("pending") or (await queue.depth()).get("running"):
+        await asyncio.sleep(0.02)
+    pool.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await pool
+
+    assert sorted(seen) == sorted([f"a{i}.csv" for i in range(3)] + [f"b{i}.csv" for i in range(3)] + ["bad.csv"])
+    assert peak[0] >= 2
+    statuses = [j["status"] for p in "abc" for j in await queue.list_jobs(p)]
+    assert sorted(statuses) == ["done"] * 6 + ["failed"]
+
+
+@pytest.mark.asyncio
+async def test_cancel_releases_job(monkeypatch):
+    started = asyncio.Event()
+
+    async def slow_pipeline(project_id, path, progress=None):
+        started.set()
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(worker, "launch_pipeline", slow_pipeline)
+    await queue.enqueue("a", "a.csv")
+    pool = asyncio.create_task(worker.run_workers(1))
+    await started.wait()
+    pool.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await pool
+    job = await queue.claim("w")                          # остановка вернула задание в очередь
+    assert job["path"] == "a.csv" and job["attempts"] == 0
+
+
+@pytest.mark.asyncio
+async def test_progress(monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_POLL_INTERVAL", 0.05)
+
+    async def chunked_pipeline(project_id, path, progress=None):
+        for _ in range(3):
+            with progress.stage("parse"):
+                await asyncio.sleep(0.01)
+            progress.chunk_done(10)
+            await progress.flush()                        # троттлинг: пишется только первый
+        progress.error("chunk 2: send failed (status 503), outbox id 7")
+        if path == "bad.csv":
+            with progress.stage("send"):
+                raise RuntimeError("boom")
+
+    monkeypatch.setattr(worker, "launch_pipeline", chunked_pipeline)
+    ok = await queue.enqueue("a", "ok.csv")
+    bad = await queue.enqueue("b", "bad.csv")
+    pool = asyncio.create_task(worker.run_workers(2))
+    while {j["status"] for j in await queue.list_jobs("a") + await queue.list_jobs("b")} & {"pending", "running"}:
+        await asyncio.sleep(0.02)
+    pool.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await pool
+
+    job = await queue.get(ok)
+    assert (job["status"], job["stage"], job["rows"], job["chunks"]) == ("done", "done", 30, 3)
+    assert job["timings"]["parse"] >= 0.03 and job["errors"][0].startswith("chunk 2")
+    job = await queue.get(bad)
+    assert (job["status"], job["stage"], job["error"]) == ("failed", "send", "RuntimeError: boom")
+
+
+def test_jobs_api(tmp_path, monkeypatch):
+    from app.main import create_app
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    client = TestClient(create_app())
+    owner, other = (client.post("/projects/", json={"name": f"Jobs-{uuid.uuid4().hex[:6]}"}).json()
+                    for _ in range(2))
+    auth = lambda p: {"X-PROJECT-ID": p["id"], "X-API-KEY": p["api_key"]}
+
+    r = client.post("/upload/local", headers=auth(owner), files={"file": ("a.csv", b"x\n1\n")})
+    assert r.status_code == 201
+    job_id = r.json()["job_id"]
+
+    r = client.get(f"/jobs/{job_id}", headers=auth(owner))
+    assert r.status_code == 200
+    assert (r.json()["status"], r.json()["stage"], r.json()["rows"]) == ("pending", "queued", 0)
+    assert [j["id"] for j in client.get("/jobs/", headers=auth(owner)).json()] == [job_id]
+    assert client.get(f"/jobs/{job_id}", headers=auth(other)).status_code == 404
+
+    monkeypatch.setattr(settings, "JOBS_MAX_PENDING", 1)
+    r = client.post("/upload/local", headers=auth(owner), files={"file": ("b.csv", b"x\n1\n")})
+    assert r.status_code == 429 and r.headers["Retry-After"]
+    assert len(list((tmp_path / "uploads" / owner["id"]).iterdir())) == 1   # отклонённый файл удалён
@@ -0,0 +1,99 @@
+"""
+Пул воркеров очереди заданий.
+
+`run_workers` поднимает JOBS_WORKERS корутин; каждая берёт задание из
+`queue.claim`, гоняет `launch_pipeline` и отмечает результат. Пока
+пайплайн идёт, аренда задания продлевается раз в JOBS_LEASE / 3 сек.
+
+Один проход `recover` на каждом опросе возвращает в очередь задания
+воркеров, которые умерли, не отпустив аренду, — в том числе воркеров
+других процессов; там же (не чаще раза в час) `prune` удаляет старые
+завершённые задания. Остановка (cancel) отдаёт незаконченные задания обратно
+в очередь, не засчитывая попытку.
+
+Воркеры работают внутри веб-сервера (JOBS_IN_PROCESS=true, по умолчанию)
+или отдельным процессом: `python -m app.jobs`.
+"""
+import asyncio, os, socket
+from contextlib import suppress
+
+import structlog
+
+from core.settings import settings
+from app.metrics.instruments import JOBS_FINISHED
+from app.upload.tasks import launch_pipeline
+from . import queue
+from .progress import Progress
+
+log = structlog.get_logger()
+
+
+async def _heartbeat(job_id: str, worker: str) -> None:
+    while True:
+        await asyncio.sleep(settings.JOBS_LEASE / 3)
+        if not await queue.extend(job_id, worker):
+            log.warning("job.lease_lost", job_id=job_id, worker=worker)
+
+
+async def run_job(job, worker: str) -> None:
+    """Выполнить одно взятое воркером `worker` задание и записать итог."""
+    log.info("job.start", job_id=job["id"], project_id=job["project_id"],
+             file=job["path"], attempt=job["attempts"] + 1)
+    beat = asyncio.create_task(_heartbeat(job["id"], worker))
+    progress = Progress(job["id"], worker)
+    try:
+        await launch_pipeline(job["project_id"], job["path"], progress)
+    except asyncio.CancelledError:
+        await asyncio.shield(queue.release(job["id"], worker))
+        log.warning("job.released", job_id=job["id"])
+        raise
+    except Exception as exc:
+        await progress.flush(force=True)          # этап, на котором упали
+        if await queue.finish(job["id"], worker, error=f"{type(exc).__name__}: {exc}"):
+            JOBS_FINISHED.inc(status="failed")
+        log.error("job.failed", job_id=job["id"], stage=progress.current, error=str(exc))
+    else:
+        await progress.flush(force=True)
+        if await queue.finish(job["id"], worker):
+            JOBS_FINISHED.inc(status="done")
+            log.info("job.done", job_id=job["id"], rows=progress.rows,
+                     timings={k: round(v, 3) for k, v in progress.timings.items()})
+        else:                                     # аренда истекла, задание взял другой воркер
+            log.warning("job.finish_dropped", job_id=job["id"], worker=worker)
+    finally:
+        beat.cancel()
+        with suppress(asyncio.CancelledError):
+            await beat
+
+
+async def _worker(name: str) -> None:
+    while True:
+        try:
+            recovered = await queue.recover()
+            if recovered:
+                log.warning("job.recovered", count=recovered)
+            pruned = await queue.prune()
+            if pruned:
+                log.info("job.pruned", count=pruned)
+            job = await queue.claim(name)
+        except Exception as exc:          # не роняем воркер из-за сбоя индекса
+            log.error("job.claim_failed", error=str(exc))
+            job = None
+        if job is None:
+            await queue.wait(settings.JOBS_POLL_INTERVAL)
+            continue
+        await run_job(job, name)
+
+
+async def run_workers(count: int | None = None) -> None:
+    """Крутить пул воркеров до отмены."""
+    count = count or settings.JOBS_WORKERS
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    log.info("jobs.workers_started", count=count, worker=prefix)
+    tasks = [asyncio.create_task(_worker(f"{prefix}/{i}")) for i in range(count)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,11 +1,18 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 
-from fastapi import FastAPI, Request, Depends, HTTPException, Query
+from fastapi import FastAPI, Request, Depends, Query
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 
-from app.project.db import AsyncSessionLocal, init_models
-from app.project.crud import get_project
+from app.project.db import init_models
+from app.parser.executor import shutdown_executor
+from app.sender.client   import open_client, close_clients
+from app.sender.constants import DEFAULT_ENDPOINT
+from app.sender.outbox    import drain_forever
+from app.jobs.worker      import run_workers
+from core.settings import settings
 
 # ─── REST-роутеры ────────────────────────────────────────────────────────────────
 from app.upload.router   import router as upload_router
@@ -13,17 +20,44 @@ from app.mapping.router  import router as mapping_router
 from app.quality.router  import router as quality_router
 from app.sender.router   import router as sender_router
 from app.project.router  import router as project_router
+from app.jobs.router     import router as jobs_router
+from app.metrics.router  import router as metrics_router
 
 # ─── Авторизация и preview-helper ────────────────────────────────────────────────
-from app.project.auth   import get_current_project
+from app.project.auth   import authenticate, get_current_project
 from app.parser.preview import get_sample_columns
+from app.parser.exceptions import ParseError, UnsupportedFormat
 
 BASE_DIR = Path(__file__).resolve().parent
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Старт: создание таблиц, общий HTTP-клиент sender'а, доставщик outbox,
+    воркеры очереди заданий (если не вынесены в `python -m app.jobs`).
+    Остановка: гасим фоновые задачи (задания возвращаются в очередь),
+    закрываем клиентов и пул пайплайна.
+    """
+    await init_models()
+    open_client(DEFAULT_ENDPOINT)
+    background = []
+    if settings.OUTBOX_ENABLED:
+        background.append(asyncio.create_task(drain_forever()))
+    if settings.JOBS_IN_PROCESS:
+        background.append(asyncio.create_task(run_workers()))
+    yield
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await close_clients()
+    shutdown_executor()
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="Mapping Service")
+    app = FastAPI(title="Mapping Service", lifespan=lifespan)
 
     # 1. Подключаем все REST-роутеры
     app.include_router(upload_router)
@@ -31,13 +65,10 @@ def create_app() -> FastAPI:
     app.include_router(quality_router)
     app.include_router(sender_router)
     app.include_router(project_router)
+    app.include_router(jobs_router)
+    app.include_router(metrics_router)
 
-    # 2. Создание таблиц при старте
-    @app.on_event("startup")
-    async def _startup() -> None:
-        await init_models()
-
-    # 3. UI-страницы
+    # 2. UI-страницы (старт/остановка — см. lifespan)
 
     @app.get("/upload", response_class=HTMLResponse, tags=["ui"])
     async def upload_page(
@@ -51,10 +82,7 @@ def create_app() -> FastAPI:
           GET /upload?project_id=<id>&api_key=<key>
         """
         # ── Простая валидация: если отсутствует проект или ключ не совпадает, 403 ──
-        async with AsyncSessionLocal() as db:
-            proj = await get_project(db, project_id)
-        if proj is None or proj.api_key != api_key:
-            raise HTTPException(403, "invalid credentials")
+        await authenticate(project_id, api_key)
 
         return templates.TemplateResponse(
             "upload.html",
@@ -72,13 +100,14 @@ def create_app() -> FastAPI:
         api_key: str   = Query(..., description="API-ключ проекта"),
     ):
         # 1) валидация credentials вручную, как в upload_page
-        async with AsyncSessionLocal() as db:
-            proj = await get_project(db, project_id)
-        if proj is None or proj.api_key != api_key:
-            raise HTTPException(403, "invalid credentials")
+        await authenticate(project_id, api_key)
 
         # 2) получаем колонки для первоначального рендера
-        cols = get_sample_columns(project_id)
+        #    (начало файла не разобралось — страница с пустым списком колонок)
+        try:
+            cols = await asyncio.to_thread(get_sample_columns, project_id)
+        except (ParseError, UnsupportedFormat):
+            cols = []
 
         return templates.TemplateResponse(
             "mapping.html",
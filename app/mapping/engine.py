@@ -6,41 +6,94 @@ apply_mapping() — преобразует DataFrame согласно JSON-ко
     • приведение типов (int / float / date)
     • slugify целевых имён (кириллица → latin, пробелы → _)
 
-Если колонка отсутствует — оставляем NaN, но не падаем.
+Конфиг один раз компилируется в план (`compile_plan`, кэш по содержимому
+правил): целевые имена уже прогнаны через slugify, трансформации —
+векторные `.str`-методы. Выход собирается одним конструктором DataFrame,
+а не вставкой колонок по одной.
+
+Если колонки нет в исходном DataFrame — KeyError (как и раньше).
 """
+from dataclasses import dataclass
+from functools import lru_cache
+
 import pandas as pd
 from .schemas import MappingConfig
-from .transforms import TRANSFORMS, datefmt
+from .transforms import TRANSFORMS, datefmt, transform_series
 from slugify import slugify
 
 
-def apply_mapping(df: pd.DataFrame, cfg: MappingConfig) -> pd.DataFrame:
+def source_columns(cfg: MappingConfig) -> list[str]:
     """
-    Применяет все правила из `cfg` и возвращает новый DataFrame.
-
-    • Не модифицирует исходный `df` (создаёт `out`).
-    • Отсутствующие колонки → NaN (в тестах это допустимо).
+    Колонки исходного файла, которые нужны маппингу (порядок правил,
+    без повторов) — проекция для ридеров: остальные можно не читать.
     """
-    out = pd.DataFrame()
+    return list(dict.fromkeys(rule.source for rule in cfg.rules))
+
+
+@dataclass(frozen=True)
+class Step:
+    """Одно правило, готовое к применению."""
+    source: str
+    target: str
+    type: str
+    date_format: str
+    transform: str | None
+
+
+@dataclass(frozen=True)
+class MappingPlan:
+    steps: tuple[Step, ...]
+    columns: tuple[str, ...]     # итоговые (slugify) имена в порядке выхода
+
+
+def _rules_key(cfg: MappingConfig) -> tuple:
+    return tuple((r.source, r.target, r.type, r.transform, r.date_format) for r in cfg.rules)
 
-    for rule in cfg.rules:
-        col = df[rule.source]
 
-        # преобразование типа
-        if rule.type == "int":
-            col = pd.to_numeric(col, errors="coerce").astype("Int64")
-        elif rule.type == "float":
-            col = pd.to_numeric(col, errors="coerce")
-        elif rule.type == "date":
-            fmt = rule.date_format or "%Y-%m-%d"
-            col = datefmt(col, fmt)
+@lru_cache(maxsize=256)
+def _compile(rules: tuple) -> MappingPlan:
+    steps = tuple(
+        Step(source, target, type_, date_format or "%Y-%m-%d",
+             transform if transform in TRANSFORMS else None)
+        for source, target, type_, transform, date_format in rules
+    )
+    # повторный target перезаписывает колонку, но остаётся на первом месте —
+    # как `out[target] = col` в прежней реализации
+    targets = dict.fromkeys(step.target for step in steps)
+    return MappingPlan(steps, tuple(slugify(t, separator="_") for t in targets))
 
-        # строковые трансформации
-        if rule.transform in TRANSFORMS:
-            col = col.map(TRANSFORMS[rule.transform])
 
-        out[rule.target] = col
+def compile_plan(cfg: MappingConfig) -> MappingPlan:
+    """План для `cfg`; одинаковые наборы правил компилируются один раз."""
+    return _compile(_rules_key(cfg))
 
-    # опционально: нормализуем имена
-    out.columns = [slugify(c, separator="_") for c in out.columns]
+
+def _apply_step(df: pd.DataFrame, step: Step, project_id: str) -> pd.Series:
+    col = df[step.source]
+
+    # преобразование типа
+    if step.type == "int":
+        col = pd.to_numeric(col, errors="coerce").astype("Int64")
+    elif step.type == "float":
+        col = pd.to_numeric(col, errors="coerce")
+    elif step.type == "date":
+        col = datefmt(col, step.date_format, key=(project_id, step.source))
+
+    # строковые трансформации
+    if step.transform:
+        col = transform_series(col, step.transform)
+    return col
+
+
+def apply_mapping(df: pd.DataFrame, cfg: MappingConfig) -> pd.DataFrame:
+    """
+    Применяет все правила из `cfg` и возвращает новый DataFrame.
+
+    • Не модифицирует исходный `df`.
+    • Имена колонок — slugify от `target`.
+    """
+    plan = compile_plan(cfg)
+    data = {step.target: _apply_step(df, step, cfg.project_id) for step in plan.steps}
+    out = pd.DataFrame(data)
+    out.columns = list(plan.columns)
     return out
@@ -10,7 +10,7 @@ PUT  /mapping/  — сохранить конфиг из UI-формы (плос
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from app.project.auth import get_current_project
 from .schemas import MappingConfig
-from .storage import save_config, load_config, cfg_path
+from .storage import save_config, load_config
 import re
 
 router = APIRouter(prefix="/mapping", tags=["mapping"])
@@ -24,9 +24,10 @@ async def get_cfg(project = Depends(get_current_project)):
     Возвращает JSON-конфиг маппинга для проекта.
     Если конфиг не найден, возвращает 404 mapping_not_found.
     """
-    if not cfg_path(project.id).exists():
+    try:
+        return load_config(project.id)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="mapping_not_found")
-    return load_config(project.id)
 
 @router.put(
     "/", response_model=MappingConfig,
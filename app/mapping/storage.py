@@ -2,23 +2,82 @@
 Сохранение / загрузка JSON-конфига маппинга.
 
 Файлы лежат в директории `config/<project_id>.json`.
+
+Конфиг читают пайплайн, превью и GET /mapping/, поэтому загруженные модели
+держим в памяти процесса: LRU на MAPPING_CACHE_SIZE файлов, ключ — путь,
+запись валидна, пока у файла те же mtime и размер (правку руками заметим
+по stat). `save_config` пишет в кэш сразу (write-through). Счётчики
+попаданий — `cache_info()`.
+
+Закэшированный MappingConfig общий для всех вызывающих — не мутируйте его.
 """
+from collections import OrderedDict
 from pathlib import Path
-import json, orjson
+from threading import Lock
+from typing import NamedTuple
+import os, orjson
 from core.settings import settings
 from .schemas import MappingConfig
 
 CFG_DIR = Path("config")
 
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+_cache: OrderedDict[str, tuple[tuple[int, int], MappingConfig]] = OrderedDict()
+_lock = Lock()
+_hits = _misses = 0
+
+
 def cfg_path(project_id: str) -> Path:
     return CFG_DIR / f"{project_id}.json"
 
+def _stamp(st: os.stat_result) -> tuple[int, int]:
+    return st.st_mtime_ns, st.st_size
+
+def _remember(key: str, stamp: tuple[int, int], cfg: MappingConfig) -> None:
+    with _lock:
+        _cache[key] = (stamp, cfg)
+        _cache.move_to_end(key)
+        while len(_cache) > settings.MAPPING_CACHE_SIZE:
+            _cache.popitem(last=False)
+
 def save_config(cfg: MappingConfig) -> None:
     """Сериализация схемы в JSON (pretty-print для удобства git-diff)."""
     CFG_DIR.mkdir(exist_ok=True)
-    cfg_path(cfg.project_id).write_bytes(orjson.dumps(cfg.model_dump(), option=orjson.OPT_INDENT_2))
+    path = cfg_path(cfg.project_id)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(orjson.dumps(cfg.model_dump(), option=orjson.OPT_INDENT_2))
+    tmp.replace(path)            # читатели не увидят полузаписанный файл
+    _remember(str(path), _stamp(path.stat()), cfg)
 
 def load_config(project_id: str) -> MappingConfig:
     """Загрузка схемы; FileNotFoundError, если ещё не создали."""
-    raw = json.loads(cfg_path(project_id).read_text())
-    return MappingConfig(**raw)
\ No newline at end of file
+    global _hits, _misses
+    path = cfg_path(project_id)
+    key, stamp = str(path), _stamp(path.stat())
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == stamp:
+            _cache.move_to_end(key)
+            _hits += 1
+            return entry[1]
+        _misses += 1
+    cfg = MappingConfig.model_validate(orjson.loads(path.read_bytes()))
+    _remember(key, stamp, cfg)
+    return cfg
+
+def cache_info() -> CacheInfo:
+    with _lock:
+        return CacheInfo(_hits, _misses, settings.MAPPING_CACHE_SIZE, len(_cache))
+
+def cache_clear() -> None:
+    global _hits, _misses
+    with _lock:
+        _cache.clear()
+        _hits = _misses = 0
@@ -2,7 +2,7 @@
 Тестируем apply_mapping поверх `MappingConfig`.
 """
 import pandas as pd
-from app.mapping.engine import apply_mapping
+from app.mapping.engine import apply_mapping, compile_plan
 from app.mapping.schemas import MappingConfig, MappingRule
 
 def test_apply_mapping():
@@ -15,3 +15,48 @@ def test_apply_mapping():
     )
     out = apply_mapping(src, cfg)
     assert out.iloc[0]["name"] == "ivan ivanov"
+
+
+def test_plan_matches_rules():
+    src = pd.DataFrame({
+        "name":  [" ivan ivanov ", None, "ANNA"],
+        "mixed": pd.Series([" x ", 3, None], dtype=object),
+        "count": ["1", "x", "3"],
+    })
+    cfg = MappingConfig(project_id="demo", rules=[
+        MappingRule(source="name",  target="Имя клиента", transform="title"),
+        MappingRule(source="mixed", target="mixed",       transform="trim"),
+        MappingRule(source="count", target="count",       type="int"),
+        MappingRule(source="name",  target="mixed",       transform="upper"),  # перезапись
+    ])
+    out = apply_mapping(src, cfg)
+
+    assert out.columns.tolist() == ["imia_klienta", "mixed", "count"]
+    assert out["imia_klienta"].tolist()[::2] == [" Ivan Ivanov ", "Anna"]
+    assert out["mixed"].tolist()[::2] == [" IVAN IVANOV ", "ANNA"]
+    assert out["count"].tolist()[::2] == [1, 3] and out["count"].dtype == "Int64"
+    assert compile_plan(cfg) is compile_plan(cfg.model_copy(deep=True))
+
+
+def test_datefmt_format_cache():
+    from app.mapping import transforms
+    src = pd.Series(["13/02/2020", "01/03/2020", None, "13/02/2020", "oops"], name="d")
+    out = transforms.datefmt(src, "%Y-%m-%d", key=("demo", "d"))
+
+    expected = pd.to_datetime(src, errors="coerce").dt.strftime("%Y-%m-%d")
+    pd.testing.assert_series_equal(out, expected)
+    assert transforms._FORMATS[("demo", "d")] == "%d/%m/%Y"
+
+    # следующий кусок начинается с неоднозначной даты — берём формат колонки
+    nxt = transforms.datefmt(pd.Series(["01/03/2020"]), "%Y-%m-%d", key=("demo", "d"))
+    assert nxt.tolist() == ["2020-03-01"]
+
+
+def test_source_format_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    from app.mapping import transforms
+    keys = [("demo", f"c{i % 50}") for i in range(2000)]
+    with ThreadPoolExecutor(8) as pool:
+        found = list(pool.map(lambda k: transforms.source_format("31/12/2020", k), keys))
+    assert set(found) == {"%d/%m/%Y"}
+    assert transforms._FORMATS[("demo", "c0")] == "%d/%m/%Y"
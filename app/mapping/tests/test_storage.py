@@ -0,0 +1,50 @@
+"""
+Кэш конфигов: попадания, инвалидация по mtime/размеру, write-through, LRU.
+"""
+import json
+import pytest
+
+from core.settings import settings
+from app.mapping import storage
+from app.mapping.schemas import MappingConfig, MappingRule
+
+
+@pytest.fixture(autouse=True)
+def cfg_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "CFG_DIR", tmp_path)
+    storage.cache_clear()
+    yield tmp_path
+    storage.cache_clear()
+
+
+def _cfg(project_id: str, target: str = "name") -> MappingConfig:
+    return MappingConfig(project_id=project_id,
+                         rules=[MappingRule(source="customer_name", target=target)])
+
+
+def test_write_through_and_hits():
+    storage.save_config(_cfg("demo"))
+    first = storage.load_config("demo")
+    assert storage.load_config("demo") is first
+    assert storage.cache_info()[:2] == (2, 0)          # save_config уже положил в кэш
+
+
+def test_external_edit_invalidates(cfg_dir):
+    storage.save_config(_cfg("demo"))
+    raw = _cfg("demo", target="renamed_field").model_dump()
+    (cfg_dir / "demo.json").write_text(json.dumps(raw))
+
+    assert storage.load_config("demo").rules[0].target == "renamed_field"
+    assert storage.cache_info().misses == 1
+
+
+def test_missing_and_lru(monkeypatch):
+    with pytest.raises(FileNotFoundError):
+        storage.load_config("nope")
+
+    monkeypatch.setattr(settings, "MAPPING_CACHE_SIZE", 2)
+    for pid in ("a", "b", "c"):
+        storage.save_config(_cfg(pid))
+    assert storage.cache_info().currsize == 2
+    storage.load_config("a")                            # вытеснен — читаем с диска
+    assert storage.cache_info().misses == 1
@@ -4,8 +4,29 @@
 
 Ключи словаря ➜ название трансформации в JSON-конфиге.
 Значение ➜ функция `str -> str`.
+
+`transform_series` применяет трансформацию к колонке целиком: строковые
+колонки идут через векторные `.str`-методы, остальное — как раньше через
+`map`, чтобы результат (значения и dtype) не поменялся.
+
+`datefmt` разбирает даты с явным форматом: формат угадывается по первому
+значению (как это делает сам pandas) и кэшируется на (проект, колонка);
+кэш — в памяти процесса: при PIPELINE_POOL=process у каждого процесса
+пула свой, формат угадывается раз на процесс, а при PIPELINE_POOL=thread
+кэш общий для потоков пула и защищён блокировкой. Каждое уникальное
+значение разбирается и форматируется один раз, простые форматы вывода
+собираются Arrow-ядром.
 """
+import re
+from collections import OrderedDict
+from collections.abc import Hashable
+from threading import Lock
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas.tseries.api import guess_datetime_format
 from slugify import slugify
 
 def trim(x):   return x.strip() if isinstance(x, str) else x
@@ -13,7 +34,90 @@ def title(x):  return x.title() if isinstance(x, str) else x
 def lower(x):  return x.lower() if isinstance(x, str) else x
 def upper(x):  return x.upper() if isinstance(x, str) else x
 
-def datefmt(series: pd.Series, fmt: str):
-    return pd.to_datetime(series, errors="coerce").dt.strftime(fmt)
-
 TRANSFORMS = {"trim": trim, "title": title, "lower": lower, "upper": upper}
+
+# те же операции методами `Series.str` (str.strip() без аргументов ≡ .str.strip())
+STR_METHODS = {"trim": "strip", "title": "title", "lower": "lower", "upper": "upper"}
+
+def _is_text(dtype) -> bool:
+    if isinstance(dtype, pd.StringDtype):
+        return True
+    return isinstance(dtype, pd.ArrowDtype) and pa.types.is_string(dtype.pyarrow_dtype)
+
+def transform_series(col: pd.Series, name: str) -> pd.Series:
+    """Трансформация `name` над колонкой; результат совпадает с `col.map(TRANSFORMS[name])`."""
+    if _is_text(col.dtype) and col.count():     # у map на одних NaN свой dtype — туда не лезем
+        out = getattr(col.str, STR_METHODS[name])()
+        return out if out.dtype == "str" else out.astype("str")   # map отдаёт str с NaN
+    if isinstance(col.dtype, np.dtype) and col.dtype.kind in "biufmM":
+        return col                  # не строки — функции возвращают значение как есть
+    return col.map(TRANSFORMS[name])    # object (смешанные значения), Int64, category…
+
+
+# ---------- даты ----------
+_FORMATS: OrderedDict[Hashable, str] = OrderedDict()   # (project_id, column) → формат источника
+_FORMATS_MAX = 1024
+_formats_lock = Lock()                                  # потоки пула (PIPELINE_POOL=thread)
+
+def _fits(value: str, fmt: str) -> bool:
+    try:
+        pd.to_datetime(value, format=fmt)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+def source_format(sample: str, key: Hashable | None = None) -> str | None:
+    """
+    Формат строк колонки. Сохранённый для `key` берём, пока он разбирает
+    `sample`; иначе угадываем заново тем же guess_datetime_format, что и
+    `pd.to_datetime` без формата. None — формат не угадывается.
+    """
+    with _formats_lock:
+        cached = _FORMATS.get(key) if key is not None else None
+    if cached is not None and _fits(sample, cached):
+        with _formats_lock:
+            if key in _FORMATS:
+                _FORMATS.move_to_end(key)
+        return cached
+    fmt = guess_datetime_format(sample)
+    if fmt is not None and key is not None:
+        with _formats_lock:
+            _FORMATS[key] = fmt
+            _FORMATS.move_to_end(key)
+            if len(_FORMATS) > _FORMATS_MAX:
+                _FORMATS.popitem(last=False)
+    return fmt
+
+def datefmt(series: pd.Series, fmt: str, key: Hashable | None = None) -> pd.Series:
+    """
+    Строки/даты → строки в формате `fmt` (неразборчивое → NaN).
+
+    `key` — ключ кэша формата источника, обычно (project_id, колонка).
+    """
+    if not (_is_text(series.dtype) or series.dtype == object):
+        return pd.to_datetime(series, errors="coerce").dt.strftime(fmt)
+    codes, uniques = pd.factorize(series)
+    if not len(uniques) or (series.dtype == object and not all(isinstance(v, str) for v in uniques)):
+        return pd.to_datetime(series, errors="coerce").dt.strftime(fmt)
+
+    src = source_format(uniques[0], key)
+    parsed = pd.to_datetime(uniques, format=src, errors="coerce")
+    # каждое уникальное значение отформатировано один раз; код -1 (пропуск) → null → NaN
+    text = pc.take(strftime(parsed, fmt), pa.array(codes, mask=codes < 0))
+    return pd.Series(text, index=series.index, name=series.name, dtype="str")
+
+_PANDAS_FAST = {"%Y-%m-%d", "%Y-%m-%d %H:%M:%S"}   # у pandas на них свой быстрый путь
+_ARROW_UNSAFE = re.compile(r"%[^YmdHMS%]")          # остальные директивы — как в strftime C
+
+def strftime(values: pd.DatetimeIndex, fmt: str) -> pa.Array:
+    """
+    DatetimeIndex → Arrow-строки (NaT → null).
+
+    Для простых форматов (%Y %m %d %H %M %S) строки собирает Arrow-ядро
+    `pc.strftime`, а не Python-цикл по элементам внутри pandas.
+    """
+    years = values.year[~values.isna()]
+    if (fmt in _PANDAS_FAST or _ARROW_UNSAFE.search(fmt) or values.tz is not None
+            or not len(years) or years.min() < 1000 or years.max() > 9999):
+        return pa.array(values.strftime(fmt), type=pa.string(), from_pandas=True)
+    return pc.strftime(pa.array(values.as_unit("s")), format=fmt)
@@ -0,0 +1,40 @@
+"""
+Метрики сервиса. Наблюдения — в местах, где уже есть нужные числа:
+
+    pipeline_stage_seconds      Progress.stage / Progress.add (на каждый кусок)
+    pipeline_*  по файлу        run_full_pipeline в конце
+    sender_*                    send_dataframe
+    jobs_*                      воркер очереди; глубина — при каждом scrape
+    uploads_total               приём файла (app/upload/router.py)
+"""
+from .registry import Counter, Gauge, Histogram
+
+_MiB = 1 << 20
+
+STAGE_SECONDS = Histogram(
+    "pipeline_stage_seconds", "Время этапа пайплайна на один кусок",
+    ("stage",), buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+ROWS = Counter("pipeline_rows_total", "Строк прошло пайплайн")
+BYTES_IN = Counter("pipeline_bytes_in_total", "Байт входных файлов, обработанных пайплайном")
+ROWS_PER_SEC = Histogram(
+    "pipeline_rows_per_second", "Пропускная способность пайплайна по файлу",
+    buckets=(100, 1_000, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000),
+)
+JOB_PEAK_RSS = Histogram(
+    "pipeline_job_peak_rss_bytes", "Пиковый RSS за время файла (родитель на границах этапов и процесс пула после map/QC)",
+    buckets=tuple(_MiB << i for i in range(6, 14)),            # 64 MiB … 8 GiB
+)
+
+SENDER_BATCHES = Counter("sender_batches_total", "Отправленные батчи", ("outcome",))
+SENDER_RETRIES = Counter("sender_retries_total", "Повторные попытки POST сверх первой")
+SENDER_BYTES_RAW = Counter("sender_bytes_raw_total", "Байт JSON до сжатия")
+SENDER_BYTES_SENT = Counter("sender_bytes_sent_total", "Байт тел запросов (после сжатия)")
+
+JOBS_FINISHED = Counter("jobs_finished_total", "Завершённые задания очереди", ("status",))
+JOBS_DEPTH = Gauge("jobs_queue_depth", "Задания в очереди: pending / running", ("status",))
+
+UPLOADS = Counter("uploads_total", "Принятые загрузки по исходу дедупликации", ("dedup",))
+
+PROCESS_RSS = Gauge("process_resident_memory_bytes", "Текущий RSS процесса")
+PROCESS_PEAK_RSS = Gauge("process_peak_resident_memory_bytes", "Пиковый RSS процесса с запуска")
@@ -0,0 +1,152 @@
+"""
+Минимальный реестр метрик в формате Prometheus (text exposition 0.0.4).
+
+Своя реализация вместо prometheus_client: нужны только counter, gauge и
+histogram с метками, а наблюдение должно стоить пару операций над dict
+под GIL — инструментирование включено всегда, на каждом куске пайплайна.
+Значения живут в памяти процесса; в отдельном процессе воркеров
+(`python -m app.jobs`) — свой реестр и свой порт (см. router.serve).
+"""
+import math, resource
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from threading import Lock
+
+_registry: list["_Metric"] = []
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._lock = Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(l, "")) for l in self.labels)
+
+    def _fmt(self, key: tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{l}="{_escape(v)}"' for l, v in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @abstractmethod
+    def samples(self) -> list[str]:
+        """Строки значений метрики для `render()`."""
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{self._fmt(k)} {_num(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60)):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple, list] = {}      # key → [счётчики по корзинам..., +Inf, sum]
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[i] += 1
+            row[-1] += value
+
+    def count(self, **labels: str) -> int:
+        row = self._values.get(self._key(labels))
+        return sum(row[:-1]) if row else 0
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        out = []
+        for key, row in items:
+            acc = 0
+            for le, n in zip((*self.buckets, math.inf), row):
+                acc += n
+                bound = 'le="%s"' % _num(le)
+                out.append(f"{self.name}_bucket{self._fmt(key, bound)} {acc}")
+            out.append(f"{self.name}_sum{self._fmt(key)} {_num(row[-1])}")
+            out.append(f"{self.name}_count{self._fmt(key)} {acc}")
+        return out
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _num(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+def render() -> str:
+    """Все метрики процесса в текстовом формате Prometheus."""
+    lines = []
+    for m in _registry:
+        lines.append(f"# HELP {m.name} {m.help}")
+        lines.append(f"# TYPE {m.name} {m.kind}")
+        lines.extend(m.samples())
+    return "\n".join(lines) + "\n"
+
+
+_PAGE = resource.getpagesize()
+
+
+def rss_bytes() -> int:
+    """Текущий RSS процесса (одно чтение /proc/self/statm — дёшево звать на каждом куске)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE
+    except OSError:
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    """Пиковый RSS процесса: VmHWM на Linux, иначе ru_maxrss."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) << 10
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss << 10
@@ -0,0 +1,55 @@
+"""
+`GET /metrics` — метрики процесса в текстовом формате Prometheus.
+
+Процесс воркеров (`python -m app.jobs`) отдаёт свои метрики сам: `serve`
+поднимает минимальный HTTP-сервер на METRICS_WORKER_PORT.
+"""
+import asyncio
+
+import structlog
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.jobs import queue
+from .instruments import JOBS_DEPTH, PROCESS_PEAK_RSS, PROCESS_RSS
+from .registry import peak_rss_bytes, render, rss_bytes
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+log = structlog.get_logger()
+router = APIRouter(tags=["metrics"])
+
+
+async def collect() -> str:
+    """Обновить снимочные метрики (глубина очереди, память) и отрендерить всё."""
+    depth = await queue.depth()
+    for status in queue.ACTIVE:                 # итоги за всё время — jobs_finished_total
+        JOBS_DEPTH.set(depth.get(status, 0), status=status)
+    PROCESS_RSS.set(rss_bytes())
+    PROCESS_PEAK_RSS.set(peak_rss_bytes())
+    return render()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(await collect(), media_type=CONTENT_TYPE)
+
+
+async def serve(port: int, host: str = "0.0.0.0") -> asyncio.AbstractServer:
+    """HTTP-сервер на один ответ — /metrics для процесса без FastAPI."""
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            body = (await collect()).encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: " + CONTENT_TYPE.encode() +
+                         b"\r\nContent-Length: " + str(len(body)).encode() +
+                         b"\r\nConnection: close\r\n\r\n" + body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    log.info("metrics.serving", port=port)
+    return server
@@ -0,0 +1,71 @@
+"""
+Реестр метрик: формат Prometheus, /metrics приложения и сервер
+метрик процесса воркеров.
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from core.settings import settings
+from app.jobs.progress import Progress
+from app.metrics import instruments
+from app.metrics.registry import Counter, Histogram, render
+from app.metrics.router import serve
+
+
+def test_exposition_format():
+    h = Histogram("test_latency_seconds", "Тест", ("stage",), buckets=(0.1, 1))
+    for v in (0.05, 0.1, 0.5, 3):
+        h.observe(v, stage='pa"rse')
+    Counter("test_events_total", "Тест").inc(2)
+
+    text = render()
+    assert "# TYPE test_latency_seconds histogram" in text
+    assert 'test_latency_seconds_bucket{stage="pa\\"rse",le="0.1"} 2' in text   # le включительно
+    assert 'test_latency_seconds_bucket{stage="pa\\"rse",le="1"} 3' in text
+    assert 'test_latency_seconds_bucket{stage="pa\\"rse",le="+Inf"} 4' in text
+    assert 'test_latency_seconds_sum{stage="pa\\"rse"} 3.65' in text
+    assert "test_events_total 2" in text
+
+
+def test_pool_rss_and_abstract_metric():
+    from app.metrics.registry import _Metric
+    from app.parser.pipeline import process_chunk
+    import pandas as pd
+    with pytest.raises(TypeError):
+        _Metric("test_abstract", "Тест")           # samples не реализован
+
+    *_, rss = process_chunk(pd.DataFrame({"x": [1]}), None)
+    p = Progress()
+    p.note_rss(rss)
+    p.note_rss(1)
+    assert p.peak_rss == rss > 0
+
+
+def test_metrics_endpoint(tmp_path, monkeypatch):
+    from app.main import create_app
+    monkeypatch.setattr(settings, "DB_PATH", str(tmp_path / "mapping.db"))
+    before = instruments.STAGE_SECONDS.count(stage="parse")
+    with Progress().stage("parse"):
+        pass
+    assert instruments.STAGE_SECONDS.count(stage="parse") == before + 1
+
+    r = TestClient(create_app()).get("/metrics")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'jobs_queue_depth{status="pending"} 0' in r.text
+    assert "pipeline_stage_seconds_count{stage=\"parse\"}" in r.text
+    assert "process_peak_resident_memory_bytes " in r.text
+
+
+@pytest.mark.asyncio
+async def test_worker_metrics_server(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_PATH", str(tmp_path / "mapping.db"))
+    server = await serve(0, "127.0.0.1")
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /metrics HTTP/1.1\r\nHost: x\r\n\r\n")
+    response = await reader.read()
+    writer.close()
+    server.close()
+    assert response.startswith(b"HTTP/1.1 200 OK") and b"# TYPE jobs_queue_depth gauge" in response
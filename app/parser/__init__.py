@@ -4,6 +4,7 @@
 Содержит:
     • readers.py    – функции чтения CSV / XLSX / JSON
     • preview.py    – выборка первых N столбцов для UI
+    • sniff.py      – колонки, типы и примеры по первым КБ файла
     • exceptions.py – пользовательские ошибки парсинга
     • pipeline.py   – сквозной ETL-пайплайн:
 
@@ -0,0 +1,54 @@
+"""
+Пул исполнителей для CPU-bound шагов пайплайна.
+
+Маппинг и контроль качества — чистый pandas, и если звать их прямо из
+корутины, один большой файл замораживает весь event loop uvicorn-воркера
+(включая авторизацию и UI). Поэтому пайплайн отдаёт их сюда:
+
+    • PIPELINE_POOL="process" — ProcessPoolExecutor (по умолчанию);
+      кусок DataFrame пересекает границу процесса один раз туда и один
+      раз обратно (pickle protocol 5 копирует numpy-буферы целиком,
+      без поэлементной сериализации).
+    • PIPELINE_POOL="thread"  — ThreadPoolExecutor; дешевле на старте,
+      годится, когда основная нагрузка — ридеры, отпускающие GIL.
+
+Размер пула — PIPELINE_WORKERS (0 — по числу ядер).
+Пул создаётся лениво и закрывается в shutdown приложения.
+"""
+import asyncio, multiprocessing, os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+from core.settings import settings
+
+_executor: Executor | None = None
+
+
+def get_executor() -> Executor:
+    """Общий пул процесса (создаётся при первом обращении)."""
+    global _executor
+    if _executor is None:
+        workers = settings.PIPELINE_WORKERS or os.cpu_count() or 1
+        if settings.PIPELINE_POOL == "thread":
+            _executor = ThreadPoolExecutor(workers, thread_name_prefix="pipeline")
+        else:
+            # spawn, а не fork: в родителе уже живут потоки (aiosqlite, anyio)
+            _executor = ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context("spawn")
+            )
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Гасим пул (вызывается на shutdown приложения)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+async def run_cpu(fn: Callable[..., Any], *args: Any) -> Any:
+    """Выполнить `fn(*args)` в пуле, не блокируя event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(fn, *args))
@@ -0,0 +1,238 @@
+"""
+Кэш разобранных (и смапленных) DataFrame на диске.
+
+`POST /send/manual` и превью каждый раз заново читали и маппили
+последний файл проекта, хотя пайплайн уже разобрал ровно его. Теперь
+результат ложится в FRAME_CACHE_DIR файлом Arrow IPC, а ключ — по
+содержимому:
+
+    sha256(файла) + версия конфига маппинга (хэш правил; "raw" — без
+    маппинга) + настройки ридера, от которых зависят типы колонок
+
+Одинаковый файл с тем же конфигом — одна запись, как бы он ни назывался
+и сколько бы раз ни загружался; правка маппинга даёт новый ключ.
+
+Чтение — через memory map (IPC без сжатия: страницы файла отдаёт ОС,
+копии в буфере Python нет). Пайплайн читает запись кусками
+(`open_chunks`): в pandas переводится только текущий кусок, так что
+граница памяти PIPELINE_CHUNK_ROWS держится и на попадании; целиком
+(`load`) запись читает только превью. Запись атомарная (tmp + rename). Размер
+каталога ограничен FRAME_CACHE_MAX_BYTES: при превышении удаляются записи,
+к которым дольше всего не обращались (mtime обновляется на попадании).
+
+Если DataFrame не переводится в Arrow (смешанные типы в object-колонке)
+или у кусков пайплайна разные схемы, запись просто не создаётся.
+"""
+import hashlib, os, threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator
+
+import orjson
+import pandas as pd
+import pyarrow as pa
+import structlog
+
+from core.settings import settings
+from app.mapping.schemas import MappingConfig
+
+log = structlog.get_logger()
+
+_FORMAT = 1                      # версия формата записей; смена инвалидирует кэш
+_SUFFIX = ".arrow"
+_ARROW_ERRORS = (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError)
+
+_hashes: "OrderedDict[tuple, str]" = OrderedDict()     # (путь, mtime_ns, размер) → sha256
+_lock = threading.Lock()
+
+
+# ---------- ключи ----------
+def file_hash(path: Path) -> str:
+    """sha256 содержимого; повторный вызов для неизменного файла — один stat()."""
+    st = path.stat()
+    stamp = (str(path.resolve()), st.st_mtime_ns, st.st_size)
+    with _lock:
+        if stamp in _hashes:
+            _hashes.move_to_end(stamp)
+            return _hashes[stamp]
+    with open(path, "rb") as f:
+        digest = hashlib.file_digest(f, "sha256").hexdigest()
+    with _lock:
+        _hashes[stamp] = digest
+        while len(_hashes) > 1024:
+            _hashes.popitem(last=False)
+    return digest
+
+
+def config_version(cfg: MappingConfig | None) -> str:
+    """Хэш правил маппинга ("raw" — без маппинга)."""
+    if cfg is None:
+        return "raw"
+    rules = orjson.dumps([r.model_dump(mode="json") for r in cfg.rules])
+    return hashlib.sha256(rules).hexdigest()[:16]
+
+
+def frame_key(path: Path, cfg: MappingConfig | None, digest: str | None = None) -> str:
+    """Ключ записи: содержимое файла + версия конфига + настройки ридера."""
+    reader = f"{_FORMAT}:{settings.READER_ENGINE}:{settings.READER_XLSX_SHEET}:{path.suffix.lower()}"
+    raw = f"{digest or file_hash(path)}:{config_version(cfg)}:{reader}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# ---------- хранилище ----------
+def _root() -> Path:
+    return Path(settings.FRAME_CACHE_DIR)
+
+
+def _path(key: str) -> Path:
+    return _root() / f"{key}{_SUFFIX}"
+
+
+def _table(df: pd.DataFrame) -> pa.Table:
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _open(key: str) -> tuple[pa.MemoryMappedFile, pa.ipc.RecordBatchFileReader] | None:
+    """Открыть запись через memory map (и отметить обращение) или None."""
+    if not settings.FRAME_CACHE_ENABLED:
+        return None
+    path = _path(key)
+    source = None
+    try:
+        source = pa.memory_map(str(path))
+        reader = pa.ipc.open_file(source)
+        os.utime(path)                                  # отметка для LRU-вытеснения
+    except FileNotFoundError:
+        return None
+    except (OSError, *_ARROW_ERRORS) as exc:            # битая запись — удаляем, читаем заново
+        log.warning("frame_cache.corrupt", key=key, error=str(exc))
+        if source is not None:
+            source.close()
+        path.unlink(missing_ok=True)
+        return None
+    return source, reader
+
+
+def load(key: str) -> pd.DataFrame | None:
+    """DataFrame из кэша целиком (индекс с нуля) или None. Для превью."""
+    opened = _open(key)
+    if opened is None:
+        return None
+    source, reader = opened
+    with source:
+        return reader.read_all().to_pandas()
+
+
+def open_chunks(key: str, chunksize: int) -> tuple[int, Iterator[pd.DataFrame]] | None:
+    """
+    Запись кусками по `chunksize` строк (0 — одним куском) с глобальным
+    индексом, как у iter_file: (число строк, итератор) или None.
+    """
+    opened = _open(key)
+    if opened is None:
+        return None
+    source, reader = opened
+    rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    return rows, _iter_batches(source, reader, chunksize)
+
+
+def _indexed(table: pa.Table, offset: int) -> pd.DataFrame:
+    df = table.to_pandas()
+    df.index = pd.RangeIndex(offset, offset + len(df))
+    return df
+
+
+def _iter_batches(source: pa.MemoryMappedFile, reader: pa.ipc.RecordBatchFileReader,
+                  chunksize: int) -> Iterator[pd.DataFrame]:
+    """Батчи файла перекраиваются в куски ровно по `chunksize` строк."""
+    try:
+        buf, buffered, offset = [], 0, 0
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            buf.append(batch)
+            buffered += batch.num_rows
+            while chunksize and buffered >= chunksize:
+                table = pa.Table.from_batches(buf, schema=reader.schema)
+                yield _indexed(table.slice(0, chunksize), offset)
+                offset += chunksize
+                buf, buffered = table.slice(chunksize).to_batches(), buffered - chunksize
+        if buffered or not offset:
+            yield _indexed(pa.Table.from_batches(buf, schema=reader.schema), offset)
+    finally:
+        source.close()
+
+
+def store(key: str, df: pd.DataFrame) -> bool:
+    """Положить DataFrame целиком; False — не переводится в Arrow или кэш выключен."""
+    writer = Writer(key)
+    writer.append(df)
+    return writer.commit()
+
+
+class Writer:
+    """
+    Запись по кускам (пайплайн кладёт смапленные куски по мере обработки).
+
+    Первый кусок задаёт схему; кусок с другой схемой отменяет запись.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._tmp = _path(key).with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        self._writer: pa.ipc.RecordBatchFileWriter | None = None
+        self._schema: pa.Schema | None = None
+        self.active = settings.FRAME_CACHE_ENABLED
+
+    def append(self, df: pd.DataFrame) -> None:
+        if not self.active:
+            return
+        try:
+            table = _table(df)
+            if self._writer is None:
+                self._tmp.parent.mkdir(parents=True, exist_ok=True)
+                self._schema = table.schema
+                self._writer = pa.ipc.new_file(str(self._tmp), table.schema)
+            elif not table.schema.equals(self._schema, check_metadata=False):
+                raise pa.ArrowInvalid("chunk schema differs from the first chunk")
+            self._writer.write_table(table.replace_schema_metadata(self._schema.metadata))
+        except (OSError, *_ARROW_ERRORS) as exc:
+            log.info("frame_cache.skip", key=self.key, reason=str(exc))
+            self.abort()
+
+    def commit(self) -> bool:
+        if not self.active or self._writer is None:
+            return False
+        self._writer.close()
+        self._tmp.replace(_path(self.key))
+        self.active = False
+        evict()
+        return True
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._tmp.unlink(missing_ok=True)
+        self._writer, self.active = None, False
+
+
+def evict(max_bytes: int | None = None) -> int:
+    """Удалить давно не читанные записи, пока каталог больше лимита; вернуть число удалённых."""
+    limit = settings.FRAME_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    for p in _root().glob(f"*{_SUFFIX}"):
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, p))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, p in sorted(entries):
+        if total <= limit:
+            break
+        p.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    if removed:
+        log.info("frame_cache.evicted", count=removed, bytes_left=total)
+    return removed
@@ -0,0 +1,223 @@
+"""
+Потоковое чтение JSON кусками.
+
+Раньше `read_json` читал файл целиком в bytes, разбирал `orjson.loads`
+и строил `pd.DataFrame(data)` — на пике в памяти были сырые байты,
+полное дерево Python-объектов и сам DataFrame. Теперь записи читаются
+по одной и копятся в поколоночных буферах не больше `chunksize` строк.
+
+Форма файла определяется по первому значащему символу:
+
+    [ ...         → массив записей; целые записи блока разбираются
+                    одним вызовом orjson, остальное — по одному элементу
+                    (`JSONDecoder.raw_decode` на скользящем буфере)
+    {...}\\n{...}  → NDJSON: одна запись на строку (одна строка — только
+                    если в объекте одни скаляры)
+    { ... }       → один объект (например, словарь колонок, в том числе
+                    в одну строку) — разбирается целиком, как раньше
+
+Ошибки разбора — ValueError/OSError; в ParseError их заворачивает readers.
+"""
+import json, re
+from itertools import repeat
+from pathlib import Path
+from typing import Iterable, Iterator, Literal, TextIO
+
+import orjson
+import pandas as pd
+
+Kind = Literal["array", "ndjson", "document"]
+
+_WS = re.compile(r"[ \t\r\n]*")
+_NAN = float("nan")
+_BLOCK = 1 << 20                 # символов/байт на одно чтение
+_CUT_TRIES = 4                   # сколько `}` с конца блока пробовать как границу записи
+
+
+def _next_line(f) -> bytes:
+    """Следующая непустая строка ('' — конец файла)."""
+    line = f.readline()
+    while line and not line.strip():
+        line = f.readline()
+    return line
+
+
+def _parses(line: bytes) -> bool:
+    try:
+        orjson.loads(line)
+        return True
+    except orjson.JSONDecodeError:
+        return False
+
+
+def detect_kind(path: Path) -> Kind:
+    """
+    Массив, NDJSON или один объект.
+
+    Целый объект в первой строке — это NDJSON, только если за ним идёт
+    ещё одна запись или в нём одни скаляры: однострочный «словарь
+    колонок» (`to_json(orient="columns")`) — документ, а не одна запись.
+    """
+    with open(path, "rb") as f:
+        first = _next_line(f).removeprefix(b"\xef\xbb\xbf").strip()
+        if first.startswith(b"["):
+            return "array"
+        if not first.startswith(b"{"):
+            raise ValueError("expected a JSON array, an object or NDJSON")
+        try:
+            obj = orjson.loads(first)
+        except orjson.JSONDecodeError:
+            return "document"
+        if _parses(_next_line(f)):
+            return "ndjson"
+    if isinstance(obj, dict) and not any(isinstance(v, (dict, list)) for v in obj.values()):
+        return "ndjson"
+    return "document"
+
+
+def _iter_ndjson(path: Path) -> Iterator[object]:
+    """Записи NDJSON; строки разбираются пачками по ~_BLOCK байт одним вызовом orjson."""
+    lineno = 0
+    with open(path, "rb") as f:
+        while lines := f.readlines(_BLOCK):
+            lines = [l for l in lines if not l.isspace()]
+            try:
+                yield from orjson.loads(b"[" + b",".join(lines) + b"]")
+            except orjson.JSONDecodeError:
+                for n, line in enumerate(lines, lineno + 1):   # ищем битую строку
+                    try:
+                        orjson.loads(line)
+                    except orjson.JSONDecodeError as exc:
+                        raise ValueError(f"record {n}: {exc}") from exc
+                raise ValueError(f"record {lineno + 1}..{lineno + len(lines)}: not one JSON value per line")
+            lineno += len(lines)
+
+
+def _complete_prefix(buf: str, pos: int) -> tuple[list, int] | None:
+    """
+    Разобрать orjson'ом все целые элементы от `pos` до последней `}` блока.
+
+    Префикс валидного массива, закрытый на `}`, сам разбирается как массив,
+    только если `}` — конец элемента верхнего уровня (внутри строки или
+    вложенного объекта скобки не сойдутся), так что неудачный разрез просто
+    пробуем на предыдущей `}`.
+    """
+    cut = buf.rfind("}", pos)
+    for _ in range(_CUT_TRIES):
+        if cut < pos:
+            return None
+        try:
+            return orjson.loads("[" + buf[pos:cut + 1] + "]"), cut + 1
+        except orjson.JSONDecodeError:
+            cut = buf.rfind("}", pos, cut)
+    return None
+
+
+def _iter_array(f: TextIO) -> Iterator[object]:
+    """Элементы JSON-массива по одному; в памяти — только текущий блок."""
+    decode = json.JSONDecoder().raw_decode
+    buf, pos, eof = "", 0, False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        chunk = f.read(_BLOCK)
+        eof = not chunk
+        buf, pos = buf[pos:] + chunk, 0
+        return not eof
+
+    def peek() -> str:
+        """Следующий значащий символ ('' — конец файла)."""
+        nonlocal pos
+        while True:
+            pos = _WS.match(buf, pos).end()
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                return ""
+
+    if peek() != "[":
+        raise ValueError("expected a JSON array")
+    pos += 1
+    if peek() == "]":
+        return
+    while True:
+        peek()
+        if not eof and len(buf) - pos < _BLOCK // 2:
+            fill()
+        # быстрый путь: все целые записи блока одним вызовом orjson
+        if parsed := _complete_prefix(buf, pos):
+            items, pos = parsed
+            yield from items
+        else:
+            # медленный путь — один элемент (не объект, обрезан блоком,
+            # NaN/большие числа, которые orjson не принимает)
+            while True:
+                try:
+                    item, end = decode(buf, pos)
+                    if end < len(buf) or eof:     # у края блока число могло быть обрезано
+                        break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()                            # элемент обрезан границей блока
+            pos = end
+            yield item
+        c = peek()
+        if c == "]":
+            return
+        if c != ",":
+            raise ValueError(f"expected ',' or ']' in JSON array, got {c or 'EOF'!r}")
+        pos += 1
+
+
+def _records(path: Path, kind: Kind) -> Iterator[object]:
+    if kind == "ndjson":
+        yield from _iter_ndjson(path)
+    else:
+        with open(path, encoding="utf-8-sig") as f:
+            yield from _iter_array(f)
+
+
+def _frame(rows: list, keys: dict, wanted: set | None) -> pd.DataFrame:
+    """Кусок записей → DataFrame через поколоночные буферы."""
+    if not all(isinstance(r, dict) for r in rows):
+        return pd.DataFrame(rows)
+    # обычно у всех записей один и тот же набор ключей — обходим его один раз
+    for shape in dict.fromkeys(map(tuple, rows)):
+        keys.update(dict.fromkeys(k for k in shape if wanted is None or k in wanted))
+    n = len(rows)
+    # отсутствующий ключ → NaN, как у pd.DataFrame(records); явный null остаётся None
+    data = {k: list(map(dict.get, rows, repeat(k, n), repeat(_NAN, n))) for k in keys}
+    return pd.DataFrame(data, columns=list(keys))
+
+
+def iter_json(path: Path, chunksize: int,
+              columns: Iterable[str] | None = None) -> Iterator[pd.DataFrame]:
+    """
+    JSON-файл кусками по `chunksize` строк (индекс у каждого — с нуля).
+
+    Колонки, впервые встреченные в середине файла, в предыдущих кусках
+    отсутствуют; `columns` — проекция, лишние ключи в буферы не попадают.
+    Пустой массив даёт один пустой DataFrame.
+    """
+    wanted = set(columns) if columns is not None else None
+    kind = detect_kind(path)
+    if kind == "document":
+        with open(path, "rb") as f:
+            df = pd.DataFrame(orjson.loads(f.read()))
+        if wanted is not None:
+            df = df[[c for c in df.columns if c in wanted]]
+        for start in range(0, max(len(df), 1), chunksize):
+            yield df.iloc[start:start + chunksize].reset_index(drop=True)
+        return
+
+    keys: dict = {}
+    rows: list = []
+    emitted = False
+    for record in _records(path, kind):
+        rows.append(record)
+        if len(rows) >= chunksize:
+            yield _frame(rows, keys, wanted)
+            rows, emitted = [], True
+    if rows or not emitted:
+        yield _frame(rows, keys, wanted)
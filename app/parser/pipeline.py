@@ -1,65 +1,209 @@
 """
 Сквозной асинхронный ETL-конвейер:
 
-    1. parse_file      – raw → DataFrame
+    1. iter_file       – raw → DataFrame-куски по PIPELINE_CHUNK_ROWS строк
     2. apply_mapping   – DataFrame → нормализованные колонки
     3. check_dataframe – контроль качества → issues / report.csv
     4. send_dataframe  – POST в внешний сервис (с ретраями)
 
+Шаги 2–4 выполняются для каждого куска по очереди, поэтому пиковая
+память определяется размером куска, а не размером файла. Индекс куска —
+глобальный номер строки, так что issues в отчёте указывают на реальные
+строки исходного файла. PIPELINE_CHUNK_ROWS=0 — старый режим «весь файл
+одним DataFrame».
+
+Чтение куска идёт в отдельном потоке, а маппинг + QC — одной задачей
+в пуле `executor.run_cpu` (процессы по умолчанию), чтобы CPU-работа
+pandas не блокировала event loop веб-сервера.
+
+Результат (смапленные куски) ложится в кэш `frame_cache`; тот же файл с
+тем же конфигом маппинга при повторном запуске не читается и не маппится
+заново — куски берутся из кэша, QC и отправка идут как обычно (кроме
+проектов с dedup_policy=off — там файл всегда разбирается заново). Хэш файла
+для ключа кэша берётся из каталога загрузок, туда же в конце пишется
+число строк.
+
+Этапы, строки и время по этапам пишутся в `progress` (статус задания
+очереди, см. app/jobs/progress.py) — раз в кусок, с троттлингом.
+
 Ошибки на любом шаге логируются и «пробрасываются» наружу,
 чтобы фоновая задача `launch_pipeline` могла опубликовать
 `file_failed` и поднять алёрт.
 """
+import asyncio, time
 from pathlib import Path
-import structlog
 import pandas as pd
+import structlog
 
-from app.parser.readers  import parse_file
+from core.settings import settings
+from app.parser.readers  import iter_file
+from app.parser          import frame_cache
+from app.upload          import catalog
 from app.mapping.storage import load_config
-from app.mapping.engine  import apply_mapping
-from app.quality.checker import check_dataframe
+from app.mapping.engine  import apply_mapping, source_columns
+from app.quality.checker import check_dataframe, merge_reports
 from app.quality.storage import save_report
 from app.sender.service  import send_dataframe, send_dataframe_local
-from app.auth.project    import get_project_api_key
+from app.sender.constants import DEFAULT_ENDPOINT
+from app.sender          import outbox
+from app.auth.project    import get_project_record
+from app.mapping.schemas import MappingConfig
+from app.quality.schemas import QCReport
+from app.jobs.progress   import Progress
+from app.metrics         import instruments as metrics
+from app.metrics.registry import rss_bytes
+from .executor           import run_cpu
 
 log = structlog.get_logger()
 
-async def run_full_pipeline(project_id: str, file_path: str):
+def process_chunk(df: pd.DataFrame, cfg: MappingConfig | None
+                  ) -> tuple[pd.DataFrame, QCReport, dict[str, float], int]:
+    """
+    CPU-часть пайплайна для одного куска: маппинг + контроль качества.
+
+    Выполняется в пуле, поэтому функция модульного уровня (pickle) и
+    возвращает всё одним ответом — кусок пересекает границу процесса
+    ровно дважды. Третий элемент — время шагов в пуле: {"map": с, "qc": с},
+    четвёртый — RSS процесса пула после шагов (кусок ещё в памяти).
+    """
+    t0 = time.perf_counter()
+    if cfg is not None:
+        df = apply_mapping(df, cfg)
+    t1 = time.perf_counter()
+    qc = check_dataframe(df)
+    return df, qc, {"map": t1 - t0, "qc": time.perf_counter() - t1}, rss_bytes()
+
+async def _threaded(chunks, progress: Progress):
+    """Куски из синхронного итератора; каждый `next()` — в отдельном потоке, этап "parse"."""
+    while True:
+        with progress.stage("parse"):
+            df = await asyncio.to_thread(next, chunks, None)
+        if df is None:
+            return
+        yield df
+
+def _read_chunks(path: Path, chunk_rows: int, columns: list[str] | None, progress: Progress):
+    """Куски файла, читаемые через `_threaded`."""
+    return _threaded(iter_file(path, chunk_rows, columns), progress)
+
+async def run_full_pipeline(project_id: str, file_path: str, progress: Progress | None = None):
     """
     Выполняет все шаги для одного файла.
 
-    Возвращает объект SendResult (ok / attempts / status_code).
+    `progress` — куда отмечать этапы и обработанные строки (задание очереди).
+
+    Ничего не возвращает (None): итоги по кускам уходят в `progress`,
+    логи и метрики, отчёт о качестве — в `save_report`.
     """
     path = Path(file_path)
+    progress = progress or Progress()
+    started = time.perf_counter()
     log.info("pipeline.start", project_id=project_id, file=file_path)
 
-    # 1) Парсинг
-    df: pd.DataFrame = parse_file(path)
-    log.info("pipeline.parsed", rows=len(df))
-
-    # 2) Маппинг
     try:
         cfg = load_config(project_id)
-        df = apply_mapping(df, cfg)
-        log.info("pipeline.mapped", cols=list(df.columns))
     except FileNotFoundError:
+        cfg = None
         log.warning("mapping_not_found", project_id=project_id)
 
-    # 3) Контроль качества
-    qc = check_dataframe(df)
-    if qc.issues:
-        rep = save_report(project_id, qc)
-        log.warning("pipeline.quality_issues", count=len(qc.issues), report=str(rep))
-    else:
-        log.info("pipeline.quality_ok")
-
-    # 4) Отправка наружу
-    api_key = await get_project_api_key(project_id)          # достаём ваш ключ проекта
-    send_res = await send_dataframe(df, project_id, api_key)
-    res = await send_dataframe_local(df)
-    if send_res.ok:
-        log.info("pipeline.sent", status=send_res.status_code, attempts=send_res.attempts)
+    project = await get_project_record(project_id)           # ключ + настройки отправки
+
+    chunk_rows = settings.PIPELINE_CHUNK_ROWS
+    reports = []
+
+    # тот же файл с тем же конфигом уже разобран и смаплен — берём из кэша
+    # dedup_policy=off — файл обрабатывается как новый: мимо кэша
+    use_cache = settings.FRAME_CACHE_ENABLED and project.dedup_policy != "off"
+    cached = writer = None
+    if use_cache:
+        with progress.stage("parse"):
+            entry = await asyncio.to_thread(catalog.get, path)      # sha256 посчитан при загрузке
+            key = await asyncio.to_thread(frame_cache.frame_key, path, cfg,
+                                          entry["sha256"] if entry else None)
+            if entry is not None and not entry["sha256"]:         # проиндексирован без хэша
+                digest = await asyncio.to_thread(frame_cache.file_hash, path)   # уже посчитан frame_key
+                await asyncio.to_thread(catalog.set_stats, path, sha256=digest)
+            cached = await asyncio.to_thread(frame_cache.open_chunks, key, chunk_rows)
+    if cached is not None:
+        rows, cached_chunks = cached
+        log.info("pipeline.cache_hit", key=key, rows=rows)
+        chunks, chunk_cfg = _threaded(cached_chunks, progress), None     # маппинг уже применён
     else:
-        log.error("pipeline.send_failed", status=send_res.status_code, attempts=send_res.attempts)
+        # читаем только колонки, которые нужны маппингу
+        columns = source_columns(cfg) if cfg is not None else None
+        chunks, chunk_cfg = _read_chunks(path, chunk_rows, columns, progress), cfg
+        if use_cache:
+            writer = frame_cache.Writer(key)
+
+    try:
+        async for df in chunks:
+            i = len(reports)
+            offset = int(df.index[0]) if len(df) else 0
+
+            # 1) Парсинг
+            log.info("pipeline.parsed", chunk=i, offset=offset, rows=len(df),
+                     sheet=df.attrs.get("sheet"))
+
+            # 2) Маппинг + 3) контроль качества (отчёт пишем после последнего куска)
+            progress.current = "map/qc"            # один вызов пула; время — отдельно map и qc
+            df, qc, took, rss = await run_cpu(process_chunk, df, chunk_cfg)
+            for step, sec in took.items():
+                progress.add(step, sec)
+            progress.note_rss(rss)                 # RSS процесса пула, а не только родителя
+            if chunk_cfg is not None:
+                log.info("pipeline.mapped", chunk=i, cols=list(df.columns))
+            reports.append(qc)
+            if writer is not None:
+                await asyncio.to_thread(writer.append, df)
+
+            # 4) Отправка наружу; кусок сперва ложится в outbox, чтобы неудачу
+            #    (или падение процесса) дослал фоновый доставщик
+            with progress.stage("send"):
+                if settings.OUTBOX_ENABLED:
+                    # исключение отправки — неудачная попытка, запись уйдёт на повтор
+                    item = await outbox.put(project_id, DEFAULT_ENDPOINT, df)
+                    send_res = await outbox.deliver(item, df, project_id, project, DEFAULT_ENDPOINT)
+                else:
+                    item = None
+                    send_res = await send_dataframe(df, project_id, project.api_key,
+                                                    compression=project.send_compression,
+                                                    compression_level=project.send_compression_level)
+                await send_dataframe_local(df, part=i if chunk_rows else None)
+            if send_res.ok:
+                log.info("pipeline.sent", chunk=i, status=send_res.status_code, attempts=send_res.attempts,
+                         batches=len(send_res.batches), rows_per_sec=send_res.rows_per_sec,
+                         bytes_raw=send_res.bytes_raw, bytes_sent=send_res.bytes_sent)
+            else:
+                log.error("pipeline.send_failed", chunk=i, status=send_res.status_code, attempts=send_res.attempts,
+                          failed_batches=[b.index for b in send_res.batches if not b.ok],
+                          outbox_id=item)
+                progress.error(f"chunk {i}: send failed (status {send_res.status_code}), outbox id {item}")
+            progress.chunk_done(len(df))
+            await progress.flush()
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        if cached is not None:
+            cached_chunks.close()                  # закрыть memory map записи
+        raise
+    if writer is not None and await asyncio.to_thread(writer.commit):
+        log.info("pipeline.cached", key=key)
+
+    with progress.stage("report"):
+        qc = merge_reports(reports)
+        if qc.issue_count:
+            rep = save_report(project_id, qc)
+            log.warning("pipeline.quality_issues", count=qc.issue_count, report=str(rep))
+        else:
+            log.info("pipeline.quality_ok")
+
+    await asyncio.to_thread(catalog.set_stats, path, rows=qc.total_rows)
 
-    log.info("pipeline.done", project_id=project_id, file=file_path)
+    elapsed = time.perf_counter() - started
+    size = path.stat().st_size if path.exists() else 0
+    metrics.ROWS.inc(qc.total_rows)
+    metrics.BYTES_IN.inc(size)
+    metrics.ROWS_PER_SEC.observe(qc.total_rows / elapsed if elapsed else 0.0)
+    metrics.JOB_PEAK_RSS.observe(progress.peak_rss)
+    log.info("pipeline.done", project_id=project_id, file=file_path, rows=qc.total_rows,
+             seconds=round(elapsed, 3), bytes_in=size, peak_rss=progress.peak_rss)
@@ -2,78 +2,101 @@
 Хелпер для UI-страницы маппинга.
 
 Берёт _заголовок_ самого нового файла проекта и возвращает первые N
-колонок (чтобы не грузить большой CSV в браузер).
+колонок с типами и примерами значений (чтобы не грузить большой файл в
+браузер). Заголовок снимает `sniff` с первых КБ файла любого формата и
+запоминает в каталоге загрузок — следующие рендеры его не читают.
 """
 from pathlib import Path
 import pandas as pd
 import structlog
 
-from core.settings import settings
 from app.parser.readers  import parse_file
+from app.parser.sniff    import sniff
+from app.parser.exceptions import ParseError, UnsupportedFormat
+from app.parser          import frame_cache
 from app.mapping.storage import load_config
-from app.mapping.engine  import apply_mapping
+from app.mapping.engine  import apply_mapping, source_columns
+from app.upload          import catalog
 
 log = structlog.get_logger()
 
 
 # ---------- внутренний помощник ----------
-def _latest_file(project_id: str) -> Path | None:
+def _latest_file(project_id: str) -> dict | None:
     """
-    Возвращает самый «свежий» файл проекта или None,
-    если каталог пуст / не создан.
+    Запись каталога загрузок о самом «свежем» файле проекта или None,
+    если файлов нет. Запрос по индексу, без обхода каталога на диске.
     """
-    upload_dir = Path(settings.UPLOAD_DIR) / project_id
-    if not upload_dir.exists():
-        return None
-
-    files = list(upload_dir.glob("*.*"))
-    return max(files, key=lambda p: p.stat().st_mtime) if files else None
+    return catalog.latest(project_id)
 
 
 # ---------- API для шаблона UI ----------
-def get_sample_columns(project_id: str, limit: int = 50) -> list[str]:
+def get_sample_columns(project_id: str, limit: int = 50) -> list[dict]:
     """
     Args:
         project_id: UUID проекта
         limit:      макс. число колонок вернуть (защита UI)
 
     Returns:
-        Список названий колонок (в оригинальном регистре).
+        Список `{"name", "dtype", "sample"}` — имя колонки (в оригинальном
+        регистре), тип, выведенный по первым строкам, и несколько значений.
 
-    Возвращает первые `limit` названий столбцов из последнего загруженного файла.
+    Возвращает первые `limit` столбцов последнего загруженного файла.
     Если файлов нет — отдаёт пустой список.
+
+    Raises:
+        ParseError: начало файла не разбирается; в каталог при этом
+            записывается пустой заголовок, и следующие вызовы отдают []
     """
-    latest = _latest_file(project_id)
-    if latest is None:
+    entry = _latest_file(project_id)
+    if entry is None:
         return []
-
-    # читаем только заголовок
-    df = pd.read_csv(latest, nrows=0)
-    return df.columns.tolist()[:limit]
+    if entry["header"] is None:                      # загружен до сниффера
+        path = Path(entry["path"])
+        try:
+            entry["header"] = sniff(path)
+        except (ParseError, UnsupportedFormat):
+            catalog.set_stats(path, header=[])
+            raise
+        catalog.set_stats(path, header=entry["header"])
+    return entry["header"][:limit]
 
 
 # ---------- API для кнопки "Отправить" ----------
 def get_dataframe_last(project_id: str) -> pd.DataFrame | None:
     """
     1. Берёт последний файл проекта.
-    2. Читает его любым поддерживаемым парсером.
-    3. Применяет маппинг, если он сохранён.
+    2. Ищет готовый результат в frame_cache (файл + версия конфига) —
+       обычно его уже положил пайплайн.
+    3. Иначе читает файл любым поддерживаемым парсером (только колонки из
+       маппинга), применяет маппинг, если он сохранён, и кладёт в кэш.
     4. Возвращает DataFrame или None.
     """
-    latest = _latest_file(project_id)
-    if latest is None:
+    entry = _latest_file(project_id)
+    if entry is None:
         return None
+    latest = Path(entry["path"])
 
     log.info("preview.latest_file", project_id=project_id, file=str(latest))
 
-    df = parse_file(latest)
-
-    # применяем маппинг, если есть
     try:
         cfg = load_config(project_id)
-        df = apply_mapping(df, cfg)
-        log.info("preview.mapped", cols=list(df.columns))
     except FileNotFoundError:
+        cfg = None
         log.warning("preview.mapping_not_found", project_id=project_id)
 
+    key = frame_cache.frame_key(latest, cfg, entry["sha256"])      # хэш уже посчитан при загрузке
+    df = frame_cache.load(key)
+    if df is not None:
+        log.info("preview.cache_hit", key=key, rows=len(df))
+        return df
+
+    df = parse_file(latest, source_columns(cfg) if cfg is not None else None)
+
+    # применяем маппинг, если есть
+    if cfg is not None:
+        df = apply_mapping(df, cfg)
+        log.info("preview.mapped", cols=list(df.columns))
+
+    frame_cache.store(key, df)
     return df
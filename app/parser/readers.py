@@ -4,57 +4,254 @@
 Поддерживаем три формата, перечисленные в ALLOWED_EXT:
 
     .csv   → read_csv
-    .xlsx  → read_excel (первый лист)
-    .json  → read_json (строгий режим, каждая строка - объект)
+    .xlsx  → read_xlsx (read-only openpyxl, лист по выбору, см. xlsx_stream)
+    .json  → read_json (массив записей или NDJSON, см. json_stream)
+
+Все ридеры принимают необязательную проекцию `columns` — список нужных
+колонок (обычно `source`-колонки из конфига маппинга). CSV отдаёт её
+в `usecols`, JSON и XLSX не заводят буферы под лишние колонки.
+Отсутствующие в файле колонки просто пропускаются.
+
+Движок чтения CSV/JSON выбирается настройкой READER_ENGINE или аргументом
+`engine` (он важнее настройки):
+
+    pandas   — прежний путь;
+    pyarrow  — `pyarrow.csv` / `pyarrow.json`: разбор в несколько потоков,
+               колонки — Arrow-типы (`pd.ArrowDtype`). Если pyarrow не
+               справился (рваные строки, смена типа посреди файла, JSON-
+               массив вместо NDJSON), пишем warning и читаем pandas'ом.
 
 Если нужно добавить новый тип (паркет, avro) — дописываем функцию
 `_read_parquet()` и регистрируем пары `".parquet": _read_parquet`
 в READERS.
 """
+import csv
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Literal
 import pandas as pd
-import orjson
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.json as pajson
+import structlog
+
+from core.settings import settings
 from .exceptions import UnsupportedFormat, ParseError
+from .json_stream import iter_json
+from .xlsx_stream import ALL_SHEETS, Sheet, iter_xlsx
+
+log = structlog.get_logger()
 
 ALLOWED_EXT = {".csv", ".xlsx", ".json"}
 
-def read_csv(path: Path) -> pd.DataFrame:
+Columns = Iterable[str] | None
+Engine = Literal["pandas", "pyarrow"] | None
+
+def _usecols(columns: Columns) -> Callable[[str], bool] | None:
+    """Проекция для `usecols`: callable, чтобы не падать на отсутствующих колонках."""
+    if columns is None:
+        return None
+    wanted = set(columns)
+    return lambda c: c in wanted
+
+def _use_arrow(engine: Engine) -> bool:
+    return (engine or settings.READER_ENGINE) == "pyarrow"
+
+def _fallback(path: Path, exc: Exception) -> None:
+    log.warning("reader.pyarrow_fallback", path=str(path), error=str(exc))
+
+def _to_pandas(table: pa.Table) -> pd.DataFrame:
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+def _csv_options(path: Path, columns: Columns) -> pacsv.ConvertOptions:
+    """Пустые строки → null (как у pandas); проекция — в порядке колонок файла."""
+    include = None
+    if columns is not None:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            header = next(csv.reader(f), [])
+        wanted = set(columns)
+        include = [c for c in header if c in wanted]
+    return pacsv.ConvertOptions(strings_can_be_null=True, include_columns=include)
+
+def _read_csv_arrow(path: Path, columns: Columns) -> pd.DataFrame:
+    table = pacsv.read_csv(path, read_options=pacsv.ReadOptions(use_threads=True),
+                           convert_options=_csv_options(path, columns))
+    return _to_pandas(table)
+
+def read_csv(path: Path, columns: Columns = None, engine: Engine = None) -> pd.DataFrame:
+    if _use_arrow(engine):
+        try:
+            return _read_csv_arrow(path, columns)
+        except Exception as exc:
+            _fallback(path, exc)
     try:
-        return pd.read_csv(path)
+        return pd.read_csv(path, usecols=_usecols(columns))
     except Exception as exc:
         raise ParseError(f"CSV error: {exc}") from exc
 
-def read_xlsx(path: Path) -> pd.DataFrame:
+def _concat(chunks: list[pd.DataFrame]) -> pd.DataFrame:
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
+
+def _sheet(sheet: Sheet | None) -> Sheet:
+    """None → READER_XLSX_SHEET ("" — первый лист)."""
+    if sheet is None:
+        return settings.READER_XLSX_SHEET or 0
+    return sheet
+
+def read_xlsx(path: Path, columns: Columns = None, sheet: Sheet | None = None) -> pd.DataFrame:
+    return _concat(list(_iter_xlsx(path, settings.READER_BUFFER_ROWS, columns, sheet)))
+
+def _iter_xlsx(path: Path, chunksize: int, columns: Columns,
+               sheet: Sheet | None) -> Iterator[pd.DataFrame]:
     try:
-        return pd.read_excel(path, engine="openpyxl")
+        yield from iter_xlsx(path, chunksize, columns, _sheet(sheet))
     except Exception as exc:
         raise ParseError(f"XLSX error: {exc}") from exc
 
-def read_json(path: Path) -> pd.DataFrame:
+def _project(df: pd.DataFrame, columns: Columns) -> pd.DataFrame:
+    if columns is None:
+        return df
+    wanted = set(columns)
+    return df[[c for c in df.columns if c in wanted]]
+
+def read_json(path: Path, columns: Columns = None, engine: Engine = None) -> pd.DataFrame:
+    if _use_arrow(engine):
+        try:                                       # pyarrow понимает только NDJSON
+            table = pajson.read_json(path, read_options=pajson.ReadOptions(use_threads=True))
+            return _project(_to_pandas(table), columns)
+        except Exception as exc:
+            _fallback(path, exc)
+    return _concat(list(_iter_json(path, settings.READER_BUFFER_ROWS, columns)))
+
+def _iter_json(path: Path, chunksize: int, columns: Columns) -> Iterator[pd.DataFrame]:
     try:
-        with open(path, "rb") as f:
-            data = orjson.loads(f.read())
-        return pd.DataFrame(data)
-    except Exception as exc:
+        yield from iter_json(path, chunksize, columns)
+    except (OSError, ValueError) as exc:
         raise ParseError(f"JSON error: {exc}") from exc
 
-def parse_file(path: Path) -> pd.DataFrame:
+def _check_ext(path: Path) -> str:
+    ext = path.suffix.lower()
+    if ext not in ALLOWED_EXT:
+        raise UnsupportedFormat(ext)
+    return ext
+
+def parse_file(path: Path, columns: Columns = None, engine: Engine = None,
+               sheet: Sheet | None = None) -> pd.DataFrame:
     """
     Определяет reader по расширению и возвращает DataFrame.
 
     Args:
-        path: абсолютный/относительный путь к файлу
+        path:    абсолютный/относительный путь к файлу
+        columns: какие колонки читать (None — все)
+        engine:  "pandas" / "pyarrow" для CSV и JSON (None — READER_ENGINE)
+        sheet:   лист XLSX — индекс, имя или ALL_SHEETS (None — READER_XLSX_SHEET)
 
     Raises:
         UnsupportedFormatError: если формат неизвестен
         EmptyFileError: если файл открылся, но данных нет
     """
-    ext = path.suffix.lower()
-    if ext not in ALLOWED_EXT:
-        raise UnsupportedFormat(ext)
+    ext = _check_ext(path)
 
     if ext == ".csv":
-        return read_csv(path)
+        return read_csv(path, columns, engine)
     if ext == ".xlsx":
-        return read_xlsx(path)
-    return read_json(path)        # .json
+        return read_xlsx(path, columns, sheet)
+    return read_json(path, columns, engine)        # .json
+
+
+def _with_offset(chunk: pd.DataFrame, offset: int) -> pd.DataFrame:
+    """Проставляет «глобальный» RangeIndex: номер строки от начала файла."""
+    chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+    return chunk
+
+def _iter_csv_arrow(path: Path, chunksize: int, columns: Columns) -> Iterator[pd.DataFrame]:
+    """
+    Потоковый pyarrow: блоки по READER_BLOCK_SIZE байт перекраиваются в
+    куски ровно по `chunksize` строк. Если pyarrow упал посреди файла
+    (например, тип колонки «поплыл» после первого блока), дочитываем
+    pandas'ом с первой ещё не отданной строки.
+    """
+    offset = 0
+    try:
+        reader = pacsv.open_csv(
+            path,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=settings.READER_BLOCK_SIZE),
+            convert_options=_csv_options(path, columns),
+        )
+        buf, buffered = [], 0
+        for batch in reader:
+            buf.append(batch)
+            buffered += batch.num_rows
+            while buffered >= chunksize:
+                table = pa.Table.from_batches(buf, schema=reader.schema)
+                yield _with_offset(_to_pandas(table.slice(0, chunksize)), offset)
+                offset += chunksize
+                buf, buffered = table.slice(chunksize).to_batches(), buffered - chunksize
+        if buffered or not offset:
+            table = pa.Table.from_batches(buf, schema=reader.schema)
+            yield _with_offset(_to_pandas(table), offset)
+            offset += buffered
+        return
+    except Exception as exc:
+        _fallback(path, exc)
+    yield from _iter_csv_pandas(path, chunksize, columns, offset)
+
+def _iter_csv_pandas(path: Path, chunksize: int, columns: Columns,
+                     offset: int = 0) -> Iterator[pd.DataFrame]:
+    try:
+        reader = pd.read_csv(path, chunksize=chunksize, usecols=_usecols(columns),
+                             skiprows=range(1, offset + 1) if offset else None)
+    except Exception as exc:
+        raise ParseError(f"CSV error: {exc}") from exc
+    with reader:
+        while True:
+            try:
+                chunk = next(reader)
+            except StopIteration:
+                return
+            except Exception as exc:
+                raise ParseError(f"CSV error: {exc}") from exc
+            yield _with_offset(chunk, offset)
+            offset += len(chunk)
+
+def iter_file(path: Path, chunksize: int | None = None, columns: Columns = None,
+              engine: Engine = None, sheet: Sheet | None = None) -> Iterator[pd.DataFrame]:
+    """
+    Читает файл кусками по `chunksize` строк.
+
+    Индекс каждого куска — глобальный номер строки в файле, поэтому
+    issues контроля качества ссылаются на реальные строки исходника.
+
+    Args:
+        path:      путь к файлу
+        chunksize: строк в куске; None/0 — весь файл одним куском
+        columns:   какие колонки читать (None — все)
+        engine:    "pandas" / "pyarrow" для CSV и JSON (None — READER_ENGINE)
+        sheet:     лист XLSX — индекс, имя или ALL_SHEETS (None — READER_XLSX_SHEET)
+
+    Все форматы читаются потоково (память ~ размер куска). При ALL_SHEETS
+    листы идут подряд, нумерация строк сквозная, имя листа — в
+    `chunk.attrs["sheet"]`.
+    """
+    ext = _check_ext(path)
+
+    if not chunksize:
+        yield parse_file(path, columns, engine, sheet)
+        return
+
+    if ext == ".csv":
+        if _use_arrow(engine):
+            yield from _iter_csv_arrow(path, chunksize, columns)
+        else:
+            yield from _iter_csv_pandas(path, chunksize, columns)
+        return
+
+    if ext == ".json":
+        chunks = _iter_json(path, chunksize, columns)
+    else:
+        chunks = _iter_xlsx(path, chunksize, columns, sheet)
+    offset = 0
+    for chunk in chunks:            # пустой файл — всё равно один кусок (проверка колонок)
+        yield _with_offset(chunk, offset)
+        offset += len(chunk)
@@ -0,0 +1,135 @@
+"""
+Заголовок файла с типами и примерами значений — для превью маппинга.
+
+Читается только начало файла (SNIFF_BYTES байт, SNIFF_ROWS строк):
+
+    .csv   → первые строки префикса тем же pd.read_csv (обрезанная
+             последняя строка отбрасывается)
+    .xlsx  → первые строки листа READER_XLSX_SHEET через read-only
+             openpyxl и тот же TextParser, что у xlsx_stream (таблица
+             общих строк книги читается целиком — так устроен формат)
+    .json  → первые записи NDJSON или массива; если первая запись больше
+             префикса или в префиксе одна запись с вложенными списками /
+             объектами (возможно, файл — один «словарь колонок»
+             `{"a": [1, 2], "b": [3, 4]}`), берётся первый кусок потокового
+             ридера — он различает NDJSON и документ (`detect_kind`)
+
+Результат — список колонок `{"name", "dtype", "sample"}`: dtype выводится
+по этим строкам, поэтому для «широких» по смыслу колонок он может быть
+уже, чем у полного разбора. Значения sample приведены к JSON (NaN → None),
+чтобы запись можно было положить в каталог загрузок как есть.
+"""
+import io, json
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+
+from core.settings import settings
+from .exceptions import ParseError, UnsupportedFormat
+from .json_stream import iter_json
+from .xlsx_stream import ALL_SHEETS, _frame, _trimmed
+
+_decoder = json.JSONDecoder()
+
+
+def _prefix(path: Path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read(settings.SNIFF_BYTES)
+
+
+def _sniff_csv(path: Path, rows: int) -> pd.DataFrame:
+    data = _prefix(path)
+    if len(data) == settings.SNIFF_BYTES:             # последняя строка, скорее всего, обрезана
+        cut = data.rfind(b"\n")
+        data = data[:cut + 1] if cut > 0 else data
+    return pd.read_csv(io.BytesIO(data), nrows=rows, encoding="utf-8-sig")
+
+
+def _sniff_xlsx(path: Path, rows: int) -> pd.DataFrame:
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = settings.READER_XLSX_SHEET
+        ws = wb[sheet] if sheet and sheet != ALL_SHEETS else wb.worksheets[0]
+        it = ws.iter_rows(values_only=True, max_row=rows + 1)
+        header = _trimmed(next(it, ()))
+        body = [r for r in map(_trimmed, it) if r]
+    finally:
+        wb.close()
+    return _frame(header, body, None)
+
+
+def _json_records(path: Path, rows: int) -> list:
+    """Первые целые записи из префикса файла (пусто — не уместились)."""
+    data = _prefix(path)
+    truncated = len(data) == settings.SNIFF_BYTES
+    text = data.decode("utf-8", errors="ignore").lstrip("\ufeff \t\r\n")
+    records = []
+    if text.startswith("{"):                          # NDJSON или один объект на весь файл
+        lines = text.splitlines()
+        for line in lines[:-1] if truncated else lines:
+            if len(records) == rows:
+                break
+            if line.strip():
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    return []                         # многострочный объект — только целиком
+        if len(records) == 1 and isinstance(records[0], dict) \
+                and any(isinstance(v, (dict, list)) for v in records[0].values()):
+            return []                                 # похоже на «словарь колонок» — решает iter_json
+        return records
+    if not text.startswith("["):
+        return records
+    pos = 1
+    while len(records) < rows:
+        pos = len(text) - len(text[pos:].lstrip(" \t\r\n,"))
+        if pos >= len(text) or text[pos] == "]":
+            break
+        try:
+            record, pos = _decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:                  # запись обрезана концом префикса
+            break
+        records.append(record)
+    return records
+
+
+def _sniff_json(path: Path, rows: int) -> pd.DataFrame:
+    records = _json_records(path, rows)
+    if records:
+        return pd.DataFrame.from_records(records)
+    return next(iter_json(path, rows), pd.DataFrame())
+
+
+_SNIFFERS = {".csv": _sniff_csv, ".xlsx": _sniff_xlsx, ".json": _sniff_json}
+
+
+def _jsonable(v):
+    if v is None or (isinstance(v, float) and v != v) or v is pd.NA or v is pd.NaT:
+        return None
+    if isinstance(v, (str, int, float, bool)):
+        return v
+    return str(v)
+
+
+def sniff(path: Path, rows: int | None = None) -> list[dict]:
+    """
+    Колонки файла: `[{"name": ..., "dtype": ..., "sample": [...]}, ...]`.
+
+    Raises:
+        UnsupportedFormat: расширение не из ALLOWED_EXT
+        ParseError:        начало файла не разбирается
+    """
+    ext = path.suffix.lower()
+    if ext not in _SNIFFERS:
+        raise UnsupportedFormat(ext)
+    rows = rows or settings.SNIFF_ROWS
+    try:
+        df = _SNIFFERS[ext](path, rows)
+    except (OSError, ValueError, KeyError, IndexError) as exc:
+        raise ParseError(f"cannot sniff {path.name}: {exc}") from exc
+    return [
+        {"name": str(col), "dtype": str(df[col].dtype),
+         "sample": [_jsonable(v) for v in df[col].head(rows).tolist()]}
+        for col in df.columns
+    ]
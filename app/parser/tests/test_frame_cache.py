@@ -0,0 +1,131 @@
+"""
+frame_cache: повторный запуск пайплайна и «Отправить» из UI берут
+разобранный и смапленный файл из кэша, а не парсят заново.
+"""
+import os
+
+import pandas as pd
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+
+from core.settings import settings
+from app.mapping.schemas import MappingConfig, MappingRule
+from app.parser import frame_cache, pipeline, preview
+from app.sender.schemas import SendResult
+
+CFG = MappingConfig(project_id="demo", rules=[
+    MappingRule(source="name", target="Имя", transform="title"),
+    MappingRule(source="n", target="n", type="int"),
+])
+
+
+@pytest.fixture
+def upload(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(settings, "FRAME_CACHE_DIR", str(tmp_path / "frames"))
+    monkeypatch.setattr(settings, "DB_PATH", str(tmp_path / "mapping.db"))
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    file = tmp_path / "uploads" / "demo" / "a.csv"
+    file.parent.mkdir(parents=True)
+    pd.DataFrame({"name": ["ann", "bob", None, "dan", "eve"], "n": range(5),
+                  "extra": list("abcde")}).to_csv(file, index=False)
+    return file
+
+
+@pytest.mark.asyncio
+async def test_pipeline_reuses_cache(upload: Path, tmp_path: Path, monkeypatch):
+    sent = []
+    policy = "reuse"
+
+    async def fake_project(project_id):
+        return SimpleNamespace(api_key="secret", send_compression="none", send_compression_level=None,
+                               dedup_policy=policy)
+
+    async def fake_send(df, project_id, api_key, **kw):
+        sent.append(df.copy())
+        return SendResult(status_code=201, ok=True, attempts=1, response="ok")
+
+    async def fake_local(df, part=None):
+        pass
+
+    monkeypatch.setattr(settings, "PIPELINE_CHUNK_ROWS", 2)
+    monkeypatch.setattr(settings, "PIPELINE_POOL", "thread")
+    monkeypatch.setattr(settings, "OUTBOX_ENABLED", False)
+    monkeypatch.setattr(pipeline, "get_project_record", fake_project)
+    monkeypatch.setattr(pipeline, "send_dataframe", fake_send)
+    monkeypatch.setattr(pipeline, "send_dataframe_local", fake_local)
+    monkeypatch.setattr(pipeline, "load_config", lambda pid: CFG)
+    monkeypatch.setattr(pipeline, "save_report", lambda pid, qc: None)
+
+    from app.upload import catalog
+    assert catalog.latest("demo")["sha256"] == ""                  # ленивый индекс без хэша
+    await pipeline.run_full_pipeline("demo", str(upload))
+    assert catalog.get(upload)["sha256"] == frame_cache.file_hash(upload)   # пайплайн дописал
+    first = pd.concat(sent)
+    assert len(list((tmp_path / "frames").iterdir())) == 1
+
+    def no_parse(*a, **kw):
+        raise AssertionError("file parsed again")
+    monkeypatch.setattr(pipeline, "iter_file", no_parse)
+    sent.clear()
+    await pipeline.run_full_pipeline("demo", str(upload))
+    assert [len(c) for c in sent] == [2, 2, 1]
+    assert [c.index[0] for c in sent] == [0, 2, 4]                 # глобальные номера строк
+    pd.testing.assert_frame_equal(pd.concat(sent), first)
+
+    policy = "off"                                                  # «как новый файл» — мимо кэша
+    with pytest.raises(AssertionError, match="parsed again"):
+        await pipeline.run_full_pipeline("demo", str(upload))
+
+    # «Отправить» из UI берёт тот же кэш
+    monkeypatch.setattr(preview, "load_config", lambda pid: CFG)
+    monkeypatch.setattr(preview, "parse_file", no_parse)
+    pd.testing.assert_frame_equal(preview.get_dataframe_last("demo"), first.reset_index(drop=True))
+
+
+def test_key_and_eviction(upload: Path, tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(preview, "load_config", lambda pid: CFG)
+    df = preview.get_dataframe_last("demo")                         # промах → разбор + запись
+    key = frame_cache.frame_key(upload, CFG)
+    pd.testing.assert_frame_equal(frame_cache.load(key), df)
+
+    # другой конфиг — другой ключ; копия файла под другим именем — тот же
+    other = MappingConfig(project_id="demo", rules=CFG.rules[:1])
+    assert frame_cache.frame_key(upload, other) != key
+    copy = upload.with_name("b.csv")
+    copy.write_bytes(upload.read_bytes())
+    assert frame_cache.frame_key(copy, CFG) == key
+
+    # вытесняется давно не читанная запись
+    old = frame_cache.frame_key(upload, None)
+    assert frame_cache.store(old, pd.DataFrame({"x": range(1000)}))
+    os.utime(frame_cache._path(old), (0, 0))
+    frame_cache.load(key)                                            # свежее обращение
+    size = frame_cache._path(key).stat().st_size
+    assert frame_cache.evict(size) == 1
+    assert frame_cache.load(old) is None and frame_cache.load(key) is not None
+
+
+def test_schema_mismatch_skips(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(settings, "FRAME_CACHE_DIR", str(tmp_path))
+    w = frame_cache.Writer("k")
+    w.append(pd.DataFrame({"a": [1, 2]}))
+    w.append(pd.DataFrame({"a": ["x", "y"]}))                       # у куска другая схема
+    assert not w.commit()
+    assert not list(tmp_path.iterdir())
+
+
+def test_open_chunks_streams_batches(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(settings, "FRAME_CACHE_DIR", str(tmp_path / "frames"))
+    df = pd.DataFrame({"a": range(5), "b": list("vwxyz")})
+    writer = frame_cache.Writer("k")
+    for start in (0, 2, 4):                                        # батчи по 2, 2, 1 строке
+        writer.append(df.iloc[start:start + 2])
+    assert writer.commit()
+
+    rows, chunks = frame_cache.open_chunks("k", 3)                 # куски не совпадают с батчами
+    chunks = list(chunks)
+    assert rows == 5 and [len(c) for c in chunks] == [3, 2]
+    assert [c.index[0] for c in chunks] == [0, 3]
+    pd.testing.assert_frame_equal(pd.concat(chunks), df)
+    assert frame_cache.open_chunks("missing", 3) is None
@@ -0,0 +1,67 @@
+"""
+Потоковый режим run_full_pipeline: файл идёт кусками, а issues
+контроля качества ссылаются на глобальные номера строк.
+"""
+import pandas as pd
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+
+from core.settings import settings
+from app.parser import pipeline
+from app.sender import outbox
+from app.parser.readers import iter_file
+from app.sender.schemas import SendResult
+
+
+def test_iter_file_global_index(tmp_path: Path):
+    file = tmp_path / "sample.csv"
+    pd.DataFrame({"a": range(7)}).to_csv(file, index=False)
+
+    chunks = list(iter_file(file, 3))
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    assert chunks[-1].index.tolist() == [6]
+
+
+@pytest.mark.asyncio
+async def test_streaming_pipeline(tmp_path: Path, monkeypatch):
+    file = tmp_path / "sample.csv"
+    pd.DataFrame({
+        "name":      ["a", "b", "c", "d", None, "f", "g"],
+        "email":     ["x@y"] * 7,
+        "birthdate": ["2020-01-01"] * 7,
+    }).to_csv(file, index=False)
+
+    sent, reports = [], []
+
+    async def fake_project(project_id):
+        return SimpleNamespace(api_key="secret", send_compression="none",
+                               send_compression_level=None, dedup_policy="reuse")
+
+    async def fake_send(df, project_id, api_key, **kw):
+        sent.append(len(df))
+        return SendResult(status_code=201, ok=True, attempts=1, response="ok")
+
+    async def fake_local(df, part=None):
+        pass
+
+    def fake_load(project_id):
+        raise FileNotFoundError
+
+    monkeypatch.setattr(settings, "PIPELINE_CHUNK_ROWS", 3)
+    monkeypatch.setattr(settings, "FRAME_CACHE_DIR", str(tmp_path / "frames"))
+    monkeypatch.setattr(settings, "OUTBOX_DIR", str(tmp_path / "outbox"))
+    monkeypatch.setattr(settings, "DB_PATH", str(tmp_path / "mapping.db"))
+    monkeypatch.setattr(pipeline, "get_project_record", fake_project)
+    monkeypatch.setattr(outbox, "send_dataframe", fake_send)      # OUTBOX_ENABLED: шлёт outbox.deliver
+    monkeypatch.setattr(pipeline, "send_dataframe_local", fake_local)
+    monkeypatch.setattr(pipeline, "load_config", fake_load)
+    monkeypatch.setattr(pipeline, "save_report", lambda pid, qc: reports.append(qc))
+
+    await pipeline.run_full_pipeline("demo", str(file))
+
+    assert sent == [3, 3, 1]
+    assert not list((tmp_path / "outbox").iterdir())     # всё доставлено
+    qc = reports[0]
+    assert qc.total_rows == 7
+    assert [(i.row, i.column) for i in qc.issues if i.type == "null_value"] == [(4, "name")]
@@ -8,8 +8,8 @@ import pandas as pd
 import pytest
 from pathlib import Path
 
-from app.parser.exceptions import UnsupportedFormat
-from app.parser.readers import parse_file
+from app.parser.exceptions import ParseError, UnsupportedFormat
+from app.parser.readers import ALL_SHEETS, iter_file, parse_file
 
 
 def _make_tmp(path: Path, df: pd.DataFrame):
@@ -35,4 +35,81 @@ def test_unsupported(tmp_path: Path):
     file = tmp_path / "sample.txt"
     file.write_text("noop")
     with pytest.raises(UnsupportedFormat):
-        parse_file(file)
\ No newline at end of file
+        parse_file(file)
+
+@pytest.mark.parametrize("ext", [".csv", ".xlsx", ".json"])
+def test_projection(ext, tmp_path: Path):
+    df_in = pd.DataFrame({"a": [1, 2], "b": ["x", "y"], "c": [0.5, 1.5]})
+    file = tmp_path / f"sample{ext}"
+    if ext == ".json":
+        df_in.to_json(file, orient="records")
+    else:
+        _make_tmp(file, df_in)
+
+    df_out = parse_file(file, columns=["c", "a", "missing"])
+    assert df_out.columns.tolist() == ["a", "c"]
+
+
+def test_pyarrow_engine(tmp_path: Path):
+    file = tmp_path / "sample.csv"
+    pd.DataFrame({"a": range(7), "b": list("xyz") + [None] * 4}).to_csv(file, index=False)
+
+    df = parse_file(file, columns=["b"], engine="pyarrow")
+    assert isinstance(df["b"].dtype, pd.ArrowDtype)
+    assert df["b"].tolist()[:3] == ["x", "y", "z"] and df["b"].isna().sum() == 4
+
+    chunks = list(iter_file(file, 3, engine="pyarrow"))
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    assert chunks[-1].index.tolist() == [6]
+
+
+def test_pyarrow_fallback(tmp_path: Path):
+    file = tmp_path / "ragged.csv"
+    file.write_text("a,b\n1,2\n3\n")            # pyarrow не прощает короткую строку
+    df = parse_file(file, engine="pyarrow")
+    assert df["a"].tolist() == [1, 3]
+
+
+@pytest.mark.parametrize("lines", [True, False])
+def test_json_stream(lines, tmp_path: Path, monkeypatch):
+    from app.parser import json_stream
+    monkeypatch.setattr(json_stream, "_BLOCK", 16)       # записи режутся границей блока
+    df_in = pd.DataFrame({"a": range(7), "b": ["x}", "y,", None, "z", "{", "]", "w"]})
+    file = tmp_path / "sample.json"
+    df_in.to_json(file, orient="records", lines=lines, indent=None if lines else 2)
+
+    pd.testing.assert_frame_equal(parse_file(file), df_in)
+    chunks = list(iter_file(file, 3, columns=["b"]))
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    assert chunks[-1].index.tolist() == [6] and chunks[-1].columns.tolist() == ["b"]
+
+
+def test_json_one_line_document(tmp_path: Path):
+    # словарь колонок в одну строку — документ, а не одна NDJSON-запись
+    df_in = pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
+    file = tmp_path / "columns.json"
+    df_in.to_json(file, orient="columns")
+    pd.testing.assert_frame_equal(parse_file(file).reset_index(drop=True), df_in)
+    file.write_text('{"a":[1,2,3],"b":[4,5,6]}')
+    pd.testing.assert_frame_equal(parse_file(file), df_in)
+
+    file.write_text('{"a":1,"b":"x"}\n')                    # одна запись со скалярами — NDJSON
+    assert parse_file(file).to_dict("records") == [{"a": 1, "b": "x"}]
+
+
+def test_xlsx_sheets(tmp_path: Path):
+    file = tmp_path / "book.xlsx"
+    with pd.ExcelWriter(file) as writer:
+        pd.DataFrame({"a": [1, 2, 3]}).to_excel(writer, sheet_name="first", index=False)
+        pd.DataFrame({"a": [4], "b": ["x"]}).to_excel(writer, sheet_name="second", index=False)
+
+    assert parse_file(file)["a"].tolist() == [1, 2, 3]
+    assert parse_file(file, sheet="second").columns.tolist() == ["a", "b"]
+    assert parse_file(file, sheet=ALL_SHEETS)["a"].tolist() == [1, 2, 3, 4]
+
+    chunks = list(iter_file(file, 2, sheet=ALL_SHEETS))
+    assert [(c.attrs["sheet"], len(c)) for c in chunks] == [("first", 2), ("first", 1), ("second", 1)]
+    assert chunks[-1].index.tolist() == [3]
+
+    with pytest.raises(ParseError):
+        parse_file(file, sheet="missing")
@@ -0,0 +1,61 @@
+"""
+sniff: колонки, типы и примеры значений по первым КБ файла любого формата.
+"""
+import orjson
+import pandas as pd
+import pytest
+from pathlib import Path
+
+from core.settings import settings
+from app.parser.exceptions import ParseError, UnsupportedFormat
+from app.parser.sniff import sniff
+
+DF = pd.DataFrame({"name": ["ann", "bob", None] * 400, "n": range(1200), "x": [0.5] * 1200})
+
+
+def _write(path: Path, df: pd.DataFrame, json_form: str = "ndjson"):
+    if path.suffix == ".csv":
+        df.to_csv(path, index=False)
+    elif path.suffix == ".xlsx":
+        df.to_excel(path, index=False)
+    elif json_form == "ndjson":
+        df.to_json(path, orient="records", lines=True)
+    else:
+        path.write_bytes(orjson.dumps(df.to_dict("records"), option=orjson.OPT_INDENT_2))
+
+
+@pytest.mark.parametrize("ext,json_form", [(".csv", ""), (".xlsx", ""), (".json", "ndjson"), (".json", "array")])
+def test_header_types_and_sample(ext, json_form, tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(settings, "SNIFF_BYTES", 1024)          # файл заведомо больше префикса
+    file = tmp_path / f"data{ext}"
+    _write(file, DF, json_form)
+    assert file.stat().st_size > 1024
+
+    cols = sniff(file, rows=3)
+    assert [c["name"] for c in cols] == ["name", "n", "x"]
+    assert [c["dtype"] for c in cols][1:] == ["int64", "float64"]
+    assert cols[0]["sample"] == ["ann", "bob", None]
+    assert cols[1]["sample"] == [0, 1, 2]
+    orjson.dumps(cols)                                          # кладётся в каталог как есть
+
+
+def test_big_first_record_falls_back_to_stream(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(settings, "SNIFF_BYTES", 64)
+    file = tmp_path / "wide.json"
+    file.write_bytes(orjson.dumps([{"a": "x" * 200, "b": 1}, {"a": "y", "b": 2}]))
+    assert [(c["name"], c["sample"]) for c in sniff(file)] == [("a", ["x" * 200, "y"]), ("b", [1, 2])]
+
+
+def test_column_dict_json(tmp_path: Path):
+    file = tmp_path / "cols.json"
+    file.write_bytes(b'{"a":[1,2,3],"b":[4,5,6]}')
+    assert [(c["name"], c["sample"]) for c in sniff(file)] == [("a", [1, 2, 3]), ("b", [4, 5, 6])]
+
+
+def test_errors(tmp_path: Path):
+    with pytest.raises(UnsupportedFormat):
+        sniff(tmp_path / "a.txt")
+    bad = tmp_path / "bad.json"
+    bad.write_text("not json")
+    with pytest.raises(ParseError):
+        sniff(bad)
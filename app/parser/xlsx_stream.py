@@ -0,0 +1,113 @@
+"""
+Потоковое чтение XLSX кусками.
+
+`pd.read_excel(engine="openpyxl")` строит полную объектную модель книги
+(каждая ячейка — объект со стилями), поэтому 50 МБ файла стоят минуты
+и гигабайты памяти. Здесь книга открывается в `read_only=True`: строки
+идут прямо из XML листа, в памяти — только текущий кусок.
+
+Семантика повторяет read_excel: значения ячеек приводятся так же, как
+в pandas-ридере openpyxl, пустые строки в конце листа отбрасываются, а
+каждый кусок собирается тем же TextParser (заголовок — первая строка
+листа). Формулы — последние сохранённые значения (`data_only=True`).
+
+Лист выбирается аргументом `sheet`: индекс, имя или ALL_SHEETS ("*") —
+тогда листы читаются подряд, а имя листа лежит в `df.attrs["sheet"]`.
+"""
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import openpyxl
+import pandas as pd
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+
+ALL_SHEETS = "*"
+
+Sheet = int | str
+
+
+def _cell(v):
+    """Значение ячейки как у pandas-ридера openpyxl: пусто → "", целый float → int."""
+    if v is None:
+        return ""
+    if type(v) is float and v.is_integer():
+        return int(v)
+    return v
+
+
+def _frame(header: list, rows: list[list], wanted: set | None) -> pd.DataFrame:
+    """
+    Кусок строк → DataFrame тем же TextParser, что и у read_excel: имена
+    колонок (Unnamed, .1), NA-строки и вывод типов совпадают с прежним путём.
+    """
+    width = max(len(header), max(map(len, rows), default=0))
+    data = [r + [""] * (width - len(r)) for r in (header, *rows)]
+    usecols = None if wanted is None else (lambda c: c in wanted)
+    try:
+        return TextParser(data, header=0, skip_blank_lines=False, usecols=usecols).read()
+    except EmptyDataError:
+        return pd.DataFrame()
+
+
+def _trimmed(row: tuple) -> list:
+    n = len(row)
+    while n and row[n - 1] is None:
+        n -= 1
+    return [_cell(v) for v in row[:n]]
+
+
+def _iter_sheet(ws, chunksize: int, wanted: set | None) -> Iterator[pd.DataFrame]:
+    ws.reset_dimensions()               # не верим <dimension> из файла — читаем до конца
+    rows = ws.iter_rows(values_only=True)
+    header = _trimmed(next(rows, ()))
+
+    buf, blanks, emitted = [], 0, False
+    for row in rows:
+        row = _trimmed(row)
+        if not row:
+            blanks += 1                 # пустые строки в конце листа read_excel отбрасывает
+            continue
+        buf.extend([] for _ in range(blanks))
+        buf.append(row)
+        blanks = 0
+        while len(buf) >= chunksize:
+            yield _frame(header, buf[:chunksize], wanted)
+            buf, emitted = buf[chunksize:], True
+    if buf or not emitted:
+        yield _frame(header, buf, wanted)
+
+
+def iter_xlsx(path: Path, chunksize: int, columns: Iterable[str] | None = None,
+              sheet: Sheet = 0) -> Iterator[pd.DataFrame]:
+    """
+    Лист(ы) книги кусками по `chunksize` строк (индекс у каждого — с нуля).
+
+    Кусок не переходит через границу листа. Пустые листы при ALL_SHEETS
+    пропускаются; если пусто всё — один пустой DataFrame.
+    """
+    wanted = set(columns) if columns is not None else None
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet == ALL_SHEETS:
+            selected = wb.sheetnames
+        elif isinstance(sheet, int):
+            selected = [wb.sheetnames[sheet]]
+        elif sheet in wb.sheetnames:
+            selected = [sheet]
+        else:
+            raise ValueError(f"Worksheet named '{sheet}' not found")
+
+        blank, emitted = None, False
+        for name in selected:
+            for df in _iter_sheet(wb[name], chunksize, wanted):
+                df.attrs["sheet"] = name
+                if df.empty and len(selected) > 1:
+                    blank = df
+                    continue
+                emitted = True
+                yield df
+        if blank is not None and not emitted:
+            yield blank
+    finally:
+        wb.close()
@@ -1,8 +1,9 @@
 """
 Зависимости FastAPI для доступа к БД и авторизации проекта.
 """
-from fastapi import Header, HTTPException, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+import hmac
+from fastapi import Header, HTTPException
+from . import cache
 from .db import AsyncSessionLocal
 from .crud import get_project
 
@@ -11,18 +12,34 @@ async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
 
+async def authenticate(project_id: str, api_key: str) -> cache.CachedProject:
+    """
+    Снимок проекта с проверенным ключом запроса, иначе 403
+    (общая проверка для API и UI).
+    """
+    snap = cache.get(project_id)
+    ok = cache.check(project_id, api_key) if snap is not None else None
+    if ok is None:
+        async with AsyncSessionLocal() as db:
+            proj = await get_project(db, project_id)
+        ok = proj is not None and hmac.compare_digest(
+            cache.key_hash(proj.api_key), cache.key_hash(api_key))
+        if ok:
+            snap = cache.put(proj)
+    if not ok:
+        raise HTTPException(403, "invalid credentials")
+    return snap._replace(api_key=api_key)
+
 async def get_current_project(
     x_project_id: str = Header(..., alias="X-PROJECT-ID"),
     x_api_key:   str = Header(..., alias="X-API-KEY"),
-    db: AsyncSession = Depends(get_db),
 ):
     """
     Проверка заголовков авторизации.
 
     • 403, если проект не найден или ключ не совпал.
-    • Возвращает объект `Project`, чтобы эндпоинты не делали лишний select.
+    • Возвращает `CachedProject` (id, настройки отправки и ключ запроса),
+      чтобы эндпоинты не делали лишний select.
+    • Повторные запросы в пределах AUTH_CACHE_TTL не ходят в БД.
     """
-    proj = await get_project(db, x_project_id)
-    if not proj or proj.api_key != x_api_key:
-        raise HTTPException(403, "invalid credentials")
-    return proj
\ No newline at end of file
+    return await authenticate(x_project_id, x_api_key)
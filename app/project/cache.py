@@ -0,0 +1,111 @@
+"""
+Кэш авторизации проектов в памяти процесса.
+
+Каждый защищённый запрос раньше открывал сессию и делал
+`db.get(Project, id)` — под потоком загрузок эти запросы выстраивались
+в очередь на файле SQLite. Теперь в LRU на `AUTH_CACHE_TTL` секунд
+лежит только sha256 ключа и настройки отправки (`CachedProject`);
+ключ сверяется через `hmac.compare_digest`, так что проверка не ходит
+в БД. Сам ключ и ORM-объект в кэш не попадают.
+
+Удаление проекта (`crud.delete_project`) вычищает запись сразу; в других
+процессах она доживает не дольше TTL. Ненайденные проекты не кэшируются.
+`AUTH_CACHE_TTL=0` отключает кэш.
+"""
+import hashlib, hmac, time
+from collections import OrderedDict
+from threading import Lock
+from typing import NamedTuple
+
+from core.settings import settings
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+
+
+class CachedProject(NamedTuple):
+    """Неизменяемый снимок проекта без ключа, общий для всех запросов."""
+    id: str
+    name: str
+    send_compression: str
+    send_compression_level: int | None
+    dedup_policy: str
+    api_key: str = ""            # в кэше пусто; authenticate подставляет ключ запроса
+
+
+class _Entry(NamedTuple):
+    expires: float
+    key_hash: bytes
+    project: CachedProject
+
+
+_cache: "OrderedDict[str, _Entry]" = OrderedDict()
+_lock = Lock()
+_hits = _misses = 0
+
+
+def key_hash(api_key: str) -> bytes:
+    return hashlib.sha256(api_key.encode()).digest()
+
+
+def get(project_id: str) -> CachedProject | None:
+    """Снимок проекта из кэша или None (нет, истекла или кэш выключен)."""
+    global _hits, _misses
+    with _lock:
+        entry = _cache.get(project_id)
+        if entry is not None and entry.expires > time.monotonic():
+            _cache.move_to_end(project_id)
+            _hits += 1
+            return entry.project
+        if entry is not None:
+            del _cache[project_id]
+        _misses += 1
+        return None
+
+
+def put(project) -> CachedProject:
+    """Запомнить хэш ключа и настройки проекта на AUTH_CACHE_TTL секунд."""
+    snap = CachedProject(project.id, project.name, project.send_compression,
+                         project.send_compression_level, project.dedup_policy)
+    ttl = settings.AUTH_CACHE_TTL
+    if ttl <= 0:
+        return snap
+    with _lock:
+        _cache[project.id] = _Entry(time.monotonic() + ttl, key_hash(project.api_key), snap)
+        _cache.move_to_end(project.id)
+        while len(_cache) > max(settings.AUTH_CACHE_SIZE, 1):
+            _cache.popitem(last=False)
+    return snap
+
+
+def check(project_id: str, api_key: str) -> bool | None:
+    """
+    Сверить ключ с хэшем из кэша: True/False, либо None, если записи нет
+    (вытеснена между `get` и `check`) — тогда проверять по БД.
+    """
+    with _lock:
+        entry = _cache.get(project_id)
+        expected = entry.key_hash if entry is not None else None
+    if expected is None:
+        return None
+    return hmac.compare_digest(expected, key_hash(api_key))
+
+
+def invalidate(project_id: str) -> None:
+    with _lock:
+        _cache.pop(project_id, None)
+
+
+def cache_info() -> CacheInfo:
+    with _lock:
+        return CacheInfo(_hits, _misses, len(_cache))
+
+
+def cache_clear() -> None:
+    global _hits, _misses
+    with _lock:
+        _cache.clear()
+        _hits = _misses = 0
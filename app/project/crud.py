@@ -5,6 +5,7 @@
 """
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from . import cache
 from .models import Project, ProjectCreate
 
 async def create_project(db: AsyncSession, data: ProjectCreate) -> Project:
@@ -14,7 +15,7 @@ async def create_project(db: AsyncSession, data: ProjectCreate) -> Project:
     Бросает `IntegrityError`, если name уже существует – роутер ловит и
     отдаёт 409 Conflict.
     """
-    project = Project(name=data.name, description=data.description)
+    project = Project(**data.model_dump())
     db.add(project)
     await db.commit()
     await db.refresh(project)
@@ -35,8 +36,10 @@ async def delete_project(db: AsyncSession, project_id: str) -> None:
 
     *Вызывается только после авторизации владельца
     (см. зависимость `get_current_project`).*
+    Запись в кэше авторизации сбрасывается сразу.
     """
     proj = await db.get(Project, project_id)
     if proj:
         await db.delete(proj)
         await db.commit()
+    cache.invalidate(project_id)
@@ -2,22 +2,91 @@
 Инициализация БД модуля «Управление проектами».
 
 * Асинхронный движок (`AsyncEngine`) для единообразия со всем приложением.
+* `make_engine()` — слой настройки: SQLite в режиме WAL с PRAGMA и
+  busy timeout, пул соединений из settings; `DATABASE_URL` — PostgreSQL
+  (или другая СУБД) для нескольких узлов.
 * `init_models()` вызывается на старте приложения и создаёт таблицы,
-  если их ещё нет (замена Alembic-миграциям в прототипе).
+  если их ещё нет, а в существующие добавляет новые колонки
+  (замена Alembic-миграциям в прототипе).
 """
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.orm import sessionmaker, declarative_base
 from core.settings import settings
 
 # если переменная окружения DB_PATH не задана — кладём БД рядом с кодом
 DB_PATH = getattr(settings, "DB_PATH", "mapping.db")
-DATABASE_URL = f"sqlite+aiosqlite:///{DB_PATH}"
+# DATABASE_URL (например, postgresql+asyncpg://…) — общая БД для нескольких узлов
+DATABASE_URL = settings.DATABASE_URL or f"sqlite+aiosqlite:///{DB_PATH}"
 
-engine: AsyncEngine = create_async_engine(DATABASE_URL, echo=False, future=True)
+
+def sqlite_pragmas() -> dict[str, str | int]:
+    """
+    PRAGMA для каждого нового соединения SQLite.
+
+    WAL: читатели не ждут писателя и наоборот; synchronous=NORMAL в WAL
+    не теряет целостность, только последние транзакции при отключении
+    питания; busy_timeout — ждать блокировку, а не падать «database is locked».
+    """
+    return {
+        "journal_mode": "WAL",
+        "synchronous": settings.DB_SYNCHRONOUS,
+        "busy_timeout": int(settings.DB_BUSY_TIMEOUT * 1000),
+        "foreign_keys": "ON",
+        "temp_store": "MEMORY",
+        "cache_size": -settings.DB_CACHE_KIB,           # отрицательное — в КиБ
+        "mmap_size": settings.DB_MMAP_MIB << 20,
+    }
+
+
+def make_engine(url: str = DATABASE_URL) -> AsyncEngine:
+    """
+    Асинхронный движок с настройками из settings.
+
+    SQLite-файл — PRAGMA на каждое соединение и пул DB_POOL_SIZE +
+    DB_MAX_OVERFLOW; `:memory:` остаётся на StaticPool (одно соединение).
+    Прочие СУБД — тот же пул плюс pre-ping (соединения рвутся на стороне сервера).
+    """
+    sa_url = make_url(url)
+    pool = dict(pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_timeout=settings.DB_POOL_TIMEOUT)
+    if sa_url.get_backend_name() != "sqlite":
+        return create_async_engine(url, echo=False, pool_pre_ping=True, **pool)
+
+    memory = sa_url.database in (None, "", ":memory:")
+    eng = create_async_engine(url, echo=False, connect_args={"timeout": settings.DB_BUSY_TIMEOUT},
+                              **({} if memory else pool))
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(eng.sync_engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        for name, value in pragmas.items():
+            if not (memory and name in ("journal_mode", "mmap_size")):
+                cur.execute(f"PRAGMA {name}={value}")
+        cur.close()
+
+    return eng
+
+
+engine: AsyncEngine = make_engine()
 AsyncSessionLocal = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 Base = declarative_base()
 
 
+def _add_missing_columns(conn) -> None:
+    """ALTER TABLE … ADD COLUMN для колонок, появившихся в моделях позже таблицы."""
+    insp = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        have = {c["name"] for c in insp.get_columns(table.name)}
+        for col in table.columns:
+            if col.name not in have:
+                ddl = CreateColumn(col).compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+
 async def init_models():
     """
        Создать все таблицы (idempotent).
@@ -27,4 +96,5 @@ async def init_models():
        """
     async with engine.begin() as conn:
         from app.project import models
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
\ No newline at end of file
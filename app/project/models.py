@@ -5,12 +5,14 @@ ORM-модель + Pydantic-схемы для “Project”.
 * **Pydantic**    ─ входящие/исходящие DTO для API
 """
 import uuid, secrets
-from sqlalchemy import String, DateTime
+from sqlalchemy import String, DateTime, Integer
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime, UTC
 
 from .db import Base
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+from app.sender.compression import Compression, check_level
+from app.upload.schemas import DedupPolicy
 
 # ---------- SQLAlchemy ----------
 class Project(Base):
@@ -22,6 +24,10 @@ class Project(Base):
     * `description`– опциональный текст
     * `api_key`    – токен, который кладётся в заголовок при отправке
     * `created_at` – время создания (UTC, TZ-aware)
+    * `send_compression` / `send_compression_level` – сжатие тела при
+      отправке наружу (none / gzip / zstd; уровень None — по умолчанию)
+    * `dedup_policy` – что делать с повторной загрузкой того же содержимого
+      (off / skip / reuse, см. app/upload/router.py)
     """
     __tablename__ = "projects"
 
@@ -33,6 +39,11 @@ class Project(Base):
         DateTime(timezone=True),
         default=lambda: datetime.now(UTC)
     )
+    send_compression: Mapped[str] = mapped_column(String, nullable=False, default="none",
+                                                  server_default="none")
+    send_compression_level: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    dedup_policy: Mapped[str] = mapped_column(String, nullable=False, default="reuse",
+                                              server_default="reuse")
 
 # ---------- Pydantic ----------
 class ProjectCreate(BaseModel):
@@ -40,6 +51,15 @@ class ProjectCreate(BaseModel):
 
     name: str
     description: str | None = None
+    send_compression: Compression = "none"
+    send_compression_level: int | None = None
+    dedup_policy: DedupPolicy = "reuse"
+
+    @model_validator(mode="after")
+    def _level_in_range(self):
+        """Уровень вне диапазона метода иначе падал бы только при отправке."""
+        check_level(self.send_compression, self.send_compression_level)
+        return self
 
 class ProjectCreated(ProjectCreate):
     """
@@ -61,4 +81,7 @@ class ProjectRead(BaseModel):
     name: str
     description: str | None
     created_at: datetime
-    api_key: str
\ No newline at end of file
+    api_key: str
+    send_compression: Compression
+    send_compression_level: int | None
+    dedup_policy: DedupPolicy
\ No newline at end of file
@@ -0,0 +1,42 @@
+"""
+БД проектов под нагрузкой: WAL, параллельные писатели и читатели.
+"""
+import asyncio, uuid
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.project.crud import create_project, get_project
+from app.project.db import Base, make_engine
+from app.project.models import Project, ProjectCreate
+
+
+@pytest.mark.asyncio
+async def test_concurrent_read_write(tmp_path):
+    """Писатели и читатели одновременно на одном файле — без «database is locked»."""
+    eng = make_engine(f"sqlite+aiosqlite:///{tmp_path / 'load.db'}")
+    Session = sessionmaker(eng, expire_on_commit=False, class_=AsyncSession)
+    async with eng.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+
+    async with Session() as db:
+        seed = await create_project(db, ProjectCreate(name="seed"))
+
+    async def writer(i: int):
+        for j in range(10):
+            async with Session() as db:
+                await create_project(db, ProjectCreate(name=f"w{i}-{j}-{uuid.uuid4().hex[:4]}"))
+
+    async def reader():
+        for _ in range(25):
+            async with Session() as db:
+                assert (await get_project(db, seed.id)).api_key == seed.api_key
+
+    await asyncio.gather(*(writer(i) for i in range(8)), *(reader() for _ in range(8)))
+
+    async with Session() as db:
+        assert await db.scalar(select(func.count()).select_from(Project)) == 1 + 8 * 10
+    await eng.dispose()
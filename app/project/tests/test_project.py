@@ -1,16 +1,13 @@
 # app/project/tests/test_project.py
-import os, asyncio, uuid, pytest
+import asyncio, uuid, pytest
 from fastapi.testclient import TestClient
 from app.main import create_app
 from app.project.db import init_models, engine
 
 @pytest.fixture(scope="session", autouse=True)
-def setup_db(tmp_path_factory):
-    db_file = tmp_path_factory.mktemp("db") / "test.db"
-    os.environ["DB_PATH"] = str(db_file)     # переопределяем перед init_models
+def setup_db():
+    # DB_PATH уже указывает во временный каталог (conftest.py, до загрузки settings)
     asyncio.run(init_models())
-    yield
-    # ничего не чистим — tmp-директория удалится сама
 
 @pytest.fixture
 def client():
@@ -21,3 +18,25 @@ def test_create_project(client):
     r = client.post("/projects/", json={"name": rnd_name})
     assert r.status_code == 201
     assert r.json()["name"] == rnd_name
+
+def test_auth_cache(client):
+    from app.project import cache
+    cache.cache_clear()
+    proj = client.post("/projects/", json={"name": f"Auth-{uuid.uuid4().hex[:6]}"}).json()
+    headers = {"X-PROJECT-ID": proj["id"], "X-API-KEY": proj["api_key"]}
+
+    assert client.get("/mapping/", headers=headers).status_code == 404   # авторизован, конфига нет
+    assert client.get("/mapping/", headers=headers).status_code == 404   # второй раз — из кэша
+    assert cache.cache_info().hits == 1
+    assert proj["api_key"] not in repr(cache._cache[proj["id"]])          # в кэше только хэш
+    wrong = {**headers, "X-API-KEY": "nope"}
+    assert client.get("/mapping/", headers=wrong).status_code == 403     # ключ сверяется и для кэша
+
+    assert client.delete(f"/projects/{proj['id']}", headers=headers).status_code == 204
+    assert cache.cache_info().size == 0                                  # delete_project сбросил запись
+    assert client.get("/mapping/", headers=headers).status_code == 403
+
+def test_compression_level_range(client):
+    body = {"name": f"Lvl-{uuid.uuid4().hex[:6]}", "send_compression": "gzip"}
+    assert client.post("/projects/", json={**body, "send_compression_level": 42}).status_code == 422
+    assert client.post("/projects/", json={**body, "send_compression_level": 9}).status_code == 201
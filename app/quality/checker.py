@@ -2,54 +2,120 @@
 Проверка качества DataFrame на основе зарегистрированных правил.
 
 Алгоритм:
-    1. Берём список правил из rules.RULES (экземпляры классов RuleBase).
-    2. Каждый Rule проверяет DataFrame и возвращает 0+ Issue объектов.
-    3. Собираем все Issue, сохраняем отчёт (storage.save_report) и
-       возвращаем объект QualityReport.
+    1. Берём схему из rules.REQUIRED_SCHEMA.
+    2. Отсутствующие обязательные колонки → `missing_field`.
+    3. Для каждой колонки схемы строим булевы маски по всему столбцу
+       сразу (пустые значения, несовпадение типа) — без iterrows.
+    4. Issues собираем только из позиций масок в колоночную таблицу
+       QCReport.table; порядок — как при построчном обходе (строка,
+       затем колонка в порядке схемы).
 
-Добавить новый тип проверки → реализовать класс в rules.py, положить его
-в список RULES.
+Добавить новый тип проверки → описать предикат в `_TYPE_CHECKS`
+и поле в rules.py.
 """
+import numpy as np
 import pandas as pd
-from .schemas import Issue, QCReport
+from .schemas import QCReport, empty_issue_table
 from .rules import REQUIRED_SCHEMA
 
+# проверка типа одной ячейки; результат зависит только от типа значения
+_TYPE_CHECKS = {
+    "int":   pd.api.types.is_integer,
+    "float": lambda v: isinstance(v, float),
+    "date":  lambda v: isinstance(v, str),     # дата уже в строковом fmt после маппинга
+}
+_TYPE_DETAILS = {"int": "expected int", "float": "expected float", "date": "expected date str"}
+
+# словари категорий колоночной таблицы (одинаковы для всех кусков → concat без потерь)
+_COLUMNS = list(REQUIRED_SCHEMA)
+_KINDS   = ["missing_field", "null_value", "type_mismatch"]
+_DETAILS = ["required column absent", "empty", *_TYPE_DETAILS.values()]
+
+
+def _row_values(df: pd.DataFrame, col: str) -> np.ndarray:
+    """
+    Значения колонки ровно такими, какими их видит построчный обход:
+    строка DataFrame приводится к общему dtype всех колонок
+    (int + float → float64, что-то + str → object и т.д.).
+    """
+    if df.shape[1] == 1:
+        return df[col].to_numpy()
+    return df[col].to_numpy(dtype=df.iloc[:0].to_numpy().dtype)
+
+
+def _type_ok(values: np.ndarray, expected: str) -> np.ndarray:
+    """Маска «ячейка нужного типа»: предикат зовём один раз на каждый тип."""
+    check = _TYPE_CHECKS[expected]
+    if not len(values):
+        return np.ones(0, dtype=bool)
+    if values.dtype != object:
+        # не-object массив: все ячейки одного (боксированного) типа
+        return np.full(len(values), bool(check(pd.Series(values[:1]).iloc[0])))
+    codes, _ = pd.factorize(np.fromiter(map(type, values), dtype=object, count=len(values)))
+    first = np.unique(codes, return_index=True)[1]
+    ok = np.array([bool(check(values[i])) for i in first])
+    return ok[codes]
+
+
 def check_dataframe(df: pd.DataFrame) -> QCReport:
-    """Применяем все правила к DataFrame и сохраняем отчёт CSV."""
-
-    issues: list[Issue] = []
-
-    # 1) наличие обязательных колонок
-    for col, rule in REQUIRED_SCHEMA.items():
-        if rule["required"] and col not in df.columns:
-            issues.append(Issue(row=None, column=col,
-                                type="missing_field",
-                                detail="required column absent"))
-
-    # 2) построчные проверки
-    for idx, row in df.iterrows():
-        for col, rule in REQUIRED_SCHEMA.items():
-            if col not in row:
-                continue
-
-            val = row[col]
-            # пустые значения
-            if pd.isna(val) or val == "":
-                issues.append(Issue(row=int(idx), column=col,
-                                    type="null_value", detail="empty"))
-                continue
-
-            # типы
-            expected = rule["type"]
-            if expected == "int" and not pd.api.types.is_integer(val):
-                issues.append(Issue(row=int(idx), column=col,
-                                    type="type_mismatch", detail="expected int"))
-            elif expected == "float" and not isinstance(val, float):
-                issues.append(Issue(row=int(idx), column=col,
-                                    type="type_mismatch", detail="expected float"))
-            elif expected == "date" and not isinstance(val, str):
-                # дата уже в строковом fmt после маппинга
-                issues.append(Issue(row=int(idx), column=col,
-                                    type="type_mismatch", detail="expected date str"))
-
-    return QCReport(total_rows=len(df), issues=issues)
+    """Применяем все правила к DataFrame и возвращаем колоночный отчёт."""
+    # позиция строки (-1 — проблема колонки), № колонки в схеме, коды типа/detail
+    pos, col, kind, detail = [], [], [], []
+
+    def add(idx: np.ndarray, n: int, k: str, d: str) -> None:
+        pos.append(idx)
+        col.append(np.full(len(idx), n))
+        kind.append(np.full(len(idx), _KINDS.index(k)))
+        detail.append(np.full(len(idx), _DETAILS.index(d)))
+
+    for n, (name, rule) in enumerate(REQUIRED_SCHEMA.items()):
+        # 1) наличие обязательных колонок
+        if name not in df.columns:
+            if rule["required"]:
+                add(np.array([-1]), n, "missing_field", "required column absent")
+            continue
+
+        # 2) пустые значения
+        values = _row_values(df, name)
+        empty = pd.isna(values)
+        if values.dtype == object:
+            rest = ~empty
+            empty[rest] = values[rest] == ""
+        add(np.flatnonzero(empty), n, "null_value", "empty")
+
+        # 3) типы
+        expected = rule["type"]
+        if expected in _TYPE_CHECKS:
+            bad = ~empty & ~_type_ok(values, expected)
+            add(np.flatnonzero(bad), n, "type_mismatch", _TYPE_DETAILS[expected])
+
+    pos, col = np.concatenate(pos), np.concatenate(col)
+    order = np.lexsort((col, pos))
+    pos = pos[order]
+
+    rows = pd.array(np.zeros(len(pos), dtype="int64"), dtype="Int64")
+    rows[pos < 0] = pd.NA
+    rows[pos >= 0] = df.index.take(pos[pos >= 0]).astype("int64")
+
+    table = pd.DataFrame({
+        "row":    rows,
+        "column": pd.Categorical.from_codes(col[order], categories=_COLUMNS),
+        "type":   pd.Categorical.from_codes(np.concatenate(kind)[order], categories=_KINDS),
+        "detail": pd.Categorical.from_codes(np.concatenate(detail)[order], categories=_DETAILS),
+    })
+    return QCReport(total_rows=len(df), table=table)
+
+
+def merge_reports(reports: list[QCReport]) -> QCReport:
+    """
+    Склеивает отчёты по кускам одного файла (потоковый режим пайплайна).
+
+    Проблемы уровня колонки (row=<NA>) повторяются в каждом куске —
+    в итоговый отчёт попадает только первая из них.
+    """
+    tables = [r.table for r in reports if len(r.table)]
+    table = pd.concat(tables, ignore_index=True) if tables else empty_issue_table()
+    col_level = table["row"].isna()
+    dup = col_level & table.duplicated(["column", "type"])
+    return QCReport(total_rows=sum(r.total_rows for r in reports),
+                    table=table[~dup].reset_index(drop=True))
@@ -1,6 +1,7 @@
 """Pydantic‑схемы объектов проверки качества."""
 
-from pydantic import BaseModel
+import pandas as pd
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Literal
 
 IssueType = Literal["missing_field", "null_value", "type_mismatch"]
@@ -11,6 +12,34 @@ class Issue(BaseModel):
     type: IssueType
     detail: str
 
+def empty_issue_table() -> pd.DataFrame:
+    return pd.DataFrame({
+        "row":    pd.array([], dtype="Int64"),
+        "column": pd.Categorical([]),
+        "type":   pd.Categorical([]),
+        "detail": pd.Categorical([]),
+    })
+
 class QCReport(BaseModel):
+    """
+    Результат проверки.
+
+    Проблемы хранятся колоночно в `table` (row / column / type / detail,
+    row = <NA> для проблем «на уровне колонки»). Список `Issue` строится
+    только по запросу через `issues` — на миллионах строк это дорого.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     total_rows: int
-    issues: list[Issue]
+    table: pd.DataFrame = Field(default_factory=empty_issue_table)
+
+    @property
+    def issue_count(self) -> int:
+        return len(self.table)
+
+    @property
+    def issues(self) -> list[Issue]:
+        t = self.table
+        rows = t["row"].to_numpy(dtype=object, na_value=None)
+        return [Issue(row=r, column=c, type=k, detail=d)
+                for r, c, k, d in zip(rows, t["column"], t["type"], t["detail"])]
@@ -8,3 +8,15 @@ def test_missing_required():
     qc = check_dataframe(df)
     assert any(i.type == "missing_field" and i.column == "birthdate"
                for i in qc.issues)
+
+def test_masks_match_row_order():
+    df = pd.DataFrame({"name": ["A", ""], "email": [None, "b@x"],
+                       "birthdate": ["2020-01-01", 5], "amount": ["1.5", 2.0]},
+                      index=[10, 11])
+    qc = check_dataframe(df)
+    assert [(i.row, i.column, i.type) for i in qc.issues] == [
+        (10, "email", "null_value"),
+        (10, "amount", "type_mismatch"),
+        (11, "name", "null_value"),
+        (11, "birthdate", "type_mismatch"),
+    ]
@@ -5,22 +5,69 @@ HTTP‑клиент на основе **httpx.AsyncClient** с автомати
 Зачем отдельный файл?
 * Чётко отделяем логику сетевого взаимодействия от бизнес‑кода.
 * У нас единая точка, где настроены таймауты, заголовки и backoff‑политика.
+
+Клиент долгоживущий: один на endpoint (scheme + host + port), общий для
+пайплайна и `/send/manual`. Пул соединений, keep-alive и HTTP/2
+переживают запросы и ретраи — TCP+TLS рукопожатие платим один раз.
+Жизненным циклом управляет lifespan приложения (`open_client` /
+`close_clients`); вне приложения клиент создаётся лениво.
 """
 import httpx, asyncio, backoff
-from typing import Any
+from contextvars import ContextVar
 from core.settings import settings
 from .constants import HDR_PROJECT, HDR_APIKEY
 
 TIMEOUT = httpx.Timeout(10.0, connect=5.0)
 
+_clients: dict[str, httpx.AsyncClient] = {}
+
+def _endpoint_key(url: str) -> str:
+    u = httpx.URL(url)
+    return f"{u.scheme}://{u.host}:{u.port or ''}"
+
+def open_client(url: str) -> httpx.AsyncClient:
+    """Общий клиент для endpoint'а `url` (создаётся при первом обращении)."""
+    key = _endpoint_key(url)
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=settings.SENDER_HTTP2,
+            timeout=TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.SENDER_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SENDER_MAX_KEEPALIVE,
+                keepalive_expiry=settings.SENDER_KEEPALIVE_EXPIRY,
+            ),
+        )
+        _clients[key] = client
+    return client
+
+async def close_clients() -> None:
+    """Закрыть все клиенты (shutdown приложения)."""
+    clients = list(_clients.values())
+    _clients.clear()
+    await asyncio.gather(*(c.aclose() for c in clients))
+
+# число попыток последнего post_json в текущей задаче (у каждого батча своя)
+_attempts: ContextVar[int] = ContextVar("sender_attempts", default=0)
+
+def last_attempts() -> int:
+    """Сколько попыток сделал последний `post_json` этой asyncio-задачи."""
+    return _attempts.get()
+
+def _record_tries(details):
+    _attempts.set(details["tries"])
+
 # экспоненциальный back-off до 3 повторов
 def give_up(exc):
     return isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code < 500
 
 @backoff.on_exception(backoff.expo, (httpx.TransportError, httpx.HTTPStatusError),
-                      max_tries=3, giveup=give_up)
-async def post_json(url: str, json_: Any, headers: dict[str, str]) -> httpx.Response:
-    async with httpx.AsyncClient(http2=True, timeout=TIMEOUT) as client:
-        resp = await client.post(url, json=json_, headers=headers)
-        resp.raise_for_status()
-        return resp
+                      max_tries=3, giveup=give_up,
+                      on_success=_record_tries, on_giveup=_record_tries)
+async def post_json(url: str, content: bytes, headers: dict[str, str]) -> httpx.Response:
+    """POST уже закодированного JSON-тела (см. encoder.encode_records)."""
+    headers = {"Content-Type": "application/json", **headers}
+    resp = await open_client(url).post(url, content=content, headers=headers)
+    resp.raise_for_status()
+    return resp
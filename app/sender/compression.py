@@ -0,0 +1,45 @@
+"""
+Сжатие тела запроса (Content-Encoding) для внешнего API.
+
+Метод и уровень задаются на проекте (`Project.send_compression`,
+`Project.send_compression_level`): none / gzip / zstd. Записи JSON
+сжимаются в 8–15 раз, а канал до партнёра — наше узкое место.
+
+Сжатие — CPU-работа, поэтому `compress_async` уводит её в поток
+(zlib и zstandard отпускают GIL на время сжатия).
+"""
+import asyncio, gzip
+from typing import Literal
+
+import zstandard
+
+Compression = Literal["none", "gzip", "zstd"]
+
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 3}
+LEVELS = {"gzip": (0, 9), "zstd": (1, zstandard.MAX_COMPRESSION_LEVEL)}    # допустимые уровни
+
+
+def check_level(method: Compression, level: int | None) -> None:
+    """ValueError, если уровень вне диапазона метода (для "none" уровень не важен)."""
+    if level is None or method == "none":
+        return
+    low, high = LEVELS[method]
+    if not low <= level <= high:
+        raise ValueError(f"{method} level must be in [{low}, {high}], got {level}")
+
+def compress(body: bytes, method: Compression, level: int | None = None) -> bytes:
+    """Сжать `body`; для "none" вернуть как есть."""
+    if method == "none":
+        return body
+    level = DEFAULT_LEVELS[method] if level is None else level
+    if method == "gzip":
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if method == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    raise ValueError(f"unknown compression: {method}")
+
+async def compress_async(body: bytes, method: Compression, level: int | None = None) -> bytes:
+    """То же, но вне event loop."""
+    if method == "none":
+        return body
+    return await asyncio.to_thread(compress, body, method, level)
@@ -0,0 +1,283 @@
+"""
+Надёжная очередь отправки (outbox).
+
+Без неё данные терялись: если процесс перезапускался или `post_json`
+сдавался после трёх попыток, пайплайн писал `pipeline.send_failed`, и для
+повторной отправки приходилось заново загружать файл и гонять весь ETL.
+
+Как устроено:
+
+    • каждый смапленный кусок перед отправкой кладётся в OUTBOX_DIR
+      компактным файлом (Arrow IPC/Feather, zstd; pickle — если в
+      колонках смешаны типы и Arrow их не принимает);
+    • индекс — SQLite-файл `outbox.db` рядом с БД проектов: файлы
+      лежат на локальном диске узла, и индекс должен жить там же;
+    • после отправки запись удаляется, а при неудаче в файле остаются
+      только строки упавших батчей, и запись уходит на повтор с
+      экспоненциальной задержкой (до OUTBOX_MAX_ATTEMPTS, потом `dead`);
+    • запись «в полёте» (status = sending) держит аренду: `worker` и
+      `lease_until`, продлеваемую раз в OUTBOX_LEASE / 3 сек., пока идёт
+      отправка (`deliver`). Фоновый `drain_forever` доставляет просроченные
+      записи и возвращает в очередь только те, чья аренда истекла (процесс
+      упал посреди отправки), — живую отправку другого процесса (воркеры
+      uvicorn, `python -m app.jobs`) он не трогает;
+    • исключение во время отправки — обычная неудачная попытка: запись
+      уходит на повтор, а не остаётся в sending.
+
+Parse / map / QC при повторе не выполняются — читается готовый файл.
+"""
+import asyncio, os, socket, sqlite3, time, uuid
+from contextlib import closing, suppress
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import structlog
+
+from core.settings import settings
+from app.auth.project import get_project_record
+from .schemas import SendResult
+from .service import send_dataframe
+
+log = structlog.get_logger()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_id  TEXT    NOT NULL,
+    url         TEXT    NOT NULL,
+    path        TEXT    NOT NULL,
+    rows        INTEGER NOT NULL,
+    status      TEXT    NOT NULL DEFAULT 'pending',   -- pending / sending / dead
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    next_at     REAL    NOT NULL,
+    created_at  REAL    NOT NULL,
+    last_error  TEXT,
+    lease_until REAL,                                 -- для sending: до какого времени жив отправитель
+    worker      TEXT                                  -- host:pid отправителя
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_at);
+"""
+# колонки, добавленные после первой версии схемы (для существующих outbox.db)
+_LATER_COLUMNS = {
+    "lease_until": "REAL",
+    "worker":      "TEXT",
+}
+_ready: set[Path] = set()          # файлы, где схема уже проверена этим процессом
+
+WORKER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _db_path() -> Path:
+    return Path(settings.DB_PATH).resolve().parent / "outbox.db"
+
+
+def _connect() -> closing[sqlite3.Connection]:
+    """Соединение в режиме autocommit; закрывается на выходе из `with`."""
+    path = _db_path()
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    if path not in _ready:
+        conn.execute("PRAGMA journal_mode=WAL")
+        have = {r[1] for r in conn.execute("PRAGMA table_info(outbox)")}
+        for name, ddl in _LATER_COLUMNS.items():
+            if have and name not in have:
+                conn.execute(f"ALTER TABLE outbox ADD COLUMN {name} {ddl}")
+        conn.executescript(_SCHEMA)
+        _ready.add(path)
+    return closing(conn)
+
+
+# ---------- файлы ----------
+def _write_frame(df: pd.DataFrame, path: Path | None = None) -> Path:
+    """Записать кусок атомарно (tmp + rename); вернуть путь."""
+    if path is None:
+        root = Path(settings.OUTBOX_DIR)
+        root.mkdir(parents=True, exist_ok=True)
+        path = root / str(uuid.uuid4())
+    tmp = path.with_suffix(".tmp")
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        feather.write_feather(table, tmp, compression="zstd")
+        path = path.with_suffix(".arrow")
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        df.reset_index(drop=True).to_pickle(tmp)
+        path = path.with_suffix(".pkl")
+    tmp.replace(path)
+    return path
+
+
+def read_frame(path: str | Path) -> pd.DataFrame:
+    path = Path(path)
+    if path.suffix == ".pkl":
+        return pd.read_pickle(path)
+    return feather.read_table(path, memory_map=True).to_pandas()
+
+
+# ---------- индекс (синхронные операции, зовём через to_thread) ----------
+def _put(project_id: str, url: str, df: pd.DataFrame) -> int:
+    path = _write_frame(df)
+    now = time.time()
+    with _connect() as conn:
+        cur = conn.execute(
+            "INSERT INTO outbox (project_id, url, path, rows, next_at, created_at, status, lease_until, worker)"
+            " VALUES (?, ?, ?, ?, ?, ?, 'sending', ?, ?)",
+            (project_id, url, str(path), len(df), now, now, now + settings.OUTBOX_LEASE, WORKER),
+        )
+        return cur.lastrowid
+
+
+def _settle(item_id: int, df: pd.DataFrame, res: SendResult) -> None:
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM outbox WHERE id = ?", (item_id,)).fetchone()
+        if row is None:
+            return
+        if res.ok:
+            conn.execute("DELETE FROM outbox WHERE id = ?", (item_id,))
+            Path(row["path"]).unlink(missing_ok=True)
+            return
+
+        # оставляем в файле только строки упавших батчей
+        failed = [b for b in res.batches if not b.ok]
+        if failed and len(failed) < len(res.batches):
+            step = res.batches[0].rows or 1
+            df = pd.concat([df.iloc[b.index * step: b.index * step + b.rows] for b in failed])
+            old = Path(row["path"])
+            new = _write_frame(df, old)
+            if new != old:
+                old.unlink(missing_ok=True)
+            conn.execute("UPDATE outbox SET path = ?, rows = ? WHERE id = ?",
+                         (str(new), len(df), item_id))
+
+        attempts = row["attempts"] + 1
+        delay = min(settings.OUTBOX_RETRY_BASE * 2 ** (attempts - 1), settings.OUTBOX_RETRY_MAX)
+        status = "dead" if attempts >= settings.OUTBOX_MAX_ATTEMPTS else "pending"
+        conn.execute(
+            "UPDATE outbox SET status = ?, attempts = ?, next_at = ?, last_error = ?,"
+            " lease_until = NULL, worker = NULL WHERE id = ?",
+            (status, attempts, time.time() + delay, res.response, item_id),
+        )
+
+
+def _claim_due(limit: int) -> list[sqlite3.Row]:
+    now = time.time()
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            "SELECT * FROM outbox WHERE status = 'pending' AND next_at <= ?"
+            " ORDER BY next_at LIMIT ?", (now, limit),
+        ).fetchall()
+        conn.executemany("UPDATE outbox SET status = 'sending', lease_until = ?, worker = ? WHERE id = ?",
+                         [(now + settings.OUTBOX_LEASE, WORKER, r["id"]) for r in rows])
+        conn.execute("COMMIT")
+        return rows
+
+
+def _extend(item_id: int) -> None:
+    with _connect() as conn:
+        conn.execute("UPDATE outbox SET lease_until = ? WHERE id = ? AND status = 'sending'",
+                     (time.time() + settings.OUTBOX_LEASE, item_id))
+
+
+def _release(item_id: int) -> None:
+    """Отправку прервали (остановка процесса) — обратно в очередь без попытки."""
+    with _connect() as conn:
+        conn.execute("UPDATE outbox SET status = 'pending', next_at = ?, lease_until = NULL, worker = NULL"
+                     " WHERE id = ? AND status = 'sending'", (time.time(), item_id))
+
+
+def _recover() -> int:
+    """Записи 'sending' с истёкшей арендой (отправитель умер) → pending."""
+    now = time.time()
+    with _connect() as conn:
+        return conn.execute(
+            "UPDATE outbox SET status = 'pending', next_at = ?, lease_until = NULL, worker = NULL"
+            " WHERE status = 'sending' AND (lease_until IS NULL OR lease_until < ?)",
+            (now, now),
+        ).rowcount
+
+
+# ---------- async API ----------
+async def put(project_id: str, url: str, df: pd.DataFrame) -> int:
+    """Сохранить кусок перед отправкой (write-ahead); вернуть id записи."""
+    return await asyncio.to_thread(_put, project_id, url, df)
+
+
+async def settle(item_id: int, df: pd.DataFrame, res: SendResult) -> None:
+    """Отметить результат отправки: удалить запись или поставить на повтор."""
+    await asyncio.to_thread(_settle, item_id, df, res)
+
+
+async def recover() -> int:
+    return await asyncio.to_thread(_recover)
+
+
+def _failed(exc: BaseException) -> SendResult:
+    return SendResult(status_code=0, ok=False, attempts=0, response=f"{type(exc).__name__}: {exc}")
+
+
+async def _heartbeat(item_id: int) -> None:
+    while True:
+        await asyncio.sleep(settings.OUTBOX_LEASE / 3)
+        await asyncio.to_thread(_extend, item_id)
+
+
+async def deliver(item_id: int, df: pd.DataFrame, project_id: str, project, url: str) -> SendResult:
+    """
+    Отправить кусок записи `item_id` и обязательно отметить итог.
+
+    Пока идёт отправка, аренда записи продлевается. Исключение отправки —
+    неудачная попытка (запись уходит на повтор), отмена — возврат в очередь.
+    """
+    beat = asyncio.create_task(_heartbeat(item_id))
+    try:
+        res = await send_dataframe(df, project_id, project.api_key, url=url,
+                                   compression=project.send_compression,
+                                   compression_level=project.send_compression_level)
+    except asyncio.CancelledError:
+        await asyncio.shield(asyncio.to_thread(_release, item_id))
+        raise
+    except Exception as exc:
+        log.error("outbox.send_error", id=item_id, project_id=project_id, error=str(exc))
+        res = _failed(exc)
+    finally:
+        beat.cancel()
+        with suppress(asyncio.CancelledError):
+            await beat
+    await settle(item_id, df, res)
+    return res
+
+
+async def drain_once(limit: int = 10) -> int:
+    """Доставить просроченные записи; вернуть число обработанных."""
+    items = await asyncio.to_thread(_claim_due, limit)
+    for item in items:
+        try:
+            df = await asyncio.to_thread(read_frame, item["path"])
+            project = await get_project_record(item["project_id"])
+        except Exception as exc:          # нет файла / проекта, битый .arrow / .pkl — неудачная попытка
+            log.error("outbox.load_failed", id=item["id"], path=item["path"], error=str(exc))
+            df = pd.DataFrame()
+            res = _failed(exc)
+            await settle(item["id"], df, res)
+        else:
+            res = await deliver(item["id"], df, item["project_id"], project, item["url"])
+        log.info("outbox.delivered" if res.ok else "outbox.retry",
+                 id=item["id"], project_id=item["project_id"], rows=len(df),
+                 attempts=item["attempts"] + 1)
+    return len(items)
+
+
+async def drain_forever() -> None:
+    """Фоновый доставщик: поднимает записи с истёкшей арендой и опрашивает очередь."""
+    while True:
+        try:
+            recovered = await recover()
+            if recovered:
+                log.warning("outbox.recovered", count=recovered)
+            while await drain_once():
+                pass
+        except Exception as exc:          # не роняем фон из-за одной записи
+            log.error("outbox.drain_failed", error=str(exc))
+        await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL)
@@ -3,6 +3,7 @@
 Потребуется, если пользователь хочет переотправить данные
 из последнего загруженного файла проекта.
 """
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException
 from app.project.auth import get_current_project
 from app.parser.preview import get_dataframe_last
@@ -13,9 +14,11 @@ router = APIRouter(prefix="/send", tags=["sender"])
 
 @router.post("/manual", response_model=SendResult)
 async def send_manual(project = Depends(get_current_project)):
-    df = get_dataframe_last(project.id)
+    df = await asyncio.to_thread(get_dataframe_last, project.id)   # обычно — из frame_cache
     if df is None:
         raise HTTPException(404, "no_data")
     api_key = project.api_key
-    result = await send_dataframe(df, project.id, api_key)
+    result = await send_dataframe(df, project.id, api_key,
+                                  compression=project.send_compression,
+                                  compression_level=project.send_compression_level)
     return result
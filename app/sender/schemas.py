@@ -5,8 +5,25 @@ Pydantic‑схемы результатов отправки.
 """
 from pydantic import BaseModel
 
-class SendResult(BaseModel):
+class BatchResult(BaseModel):
+    """Итог одного батча (отдельный POST со своими ретраями)."""
+    index: int
+    rows: int
     status_code: int
     ok: bool
     attempts: int
     response: str
+    bytes_raw: int = 0      # JSON до сжатия
+    bytes_sent: int = 0     # тело запроса (после сжатия)
+
+class SendResult(BaseModel):
+    status_code: int
+    ok: bool
+    attempts: int                   # сумма попыток по всем батчам
+    response: str
+    batches: list[BatchResult] = []
+    rows: int = 0
+    bytes_raw: int = 0
+    bytes_sent: int = 0
+    elapsed: float = 0.0            # сек. на всю отправку
+    rows_per_sec: float = 0.0
@@ -1,36 +1,103 @@
 """
 Функция верхнего уровня `send_dataframe`.
 Принимает pandas.DataFrame + идентификаторы проекта,
-преобразует в JSON и вызывает client.send_json().
+режет на батчи, кодирует каждый в JSON-байты (encoder.encode_records)
+и вызывает client.post_json().
 """
-import pandas as pd, orjson, structlog
-from .client   import post_json
-from .schemas  import SendResult
+import asyncio, time
+import httpx, pandas as pd, structlog
+from core.settings import settings
+from app.metrics import instruments as metrics
+from .client   import post_json, last_attempts
+from .encoder  import encode_records
+from .compression import Compression, compress_async
+from .schemas  import SendResult, BatchResult
 from .constants import DEFAULT_ENDPOINT, HDR_PROJECT, HDR_APIKEY
 
 log = structlog.get_logger()
 
+async def _send_batch(index: int, df: pd.DataFrame, url: str, headers: dict[str, str],
+                      window: asyncio.Semaphore, compression: Compression,
+                      level: int | None) -> BatchResult:
+    """Один батч = один POST; ретраи (backoff) — только для него."""
+    async with window:
+        sizes = dict(rows=len(df), bytes_raw=0, bytes_sent=0)
+        posted = False
+        try:
+            # кодирование и сжатие — тоже внутри: их ошибка валит только этот батч
+            body = await asyncio.to_thread(encode_records, df)
+            sizes["bytes_raw"] = len(body)
+            if compression != "none" and len(body) >= settings.SENDER_COMPRESS_MIN_BYTES:
+                body = await compress_async(body, compression, level)
+                headers = {**headers, "Content-Encoding": compression}
+            sizes["bytes_sent"] = len(body)
+            posted = True
+            resp = await post_json(url, body, headers)
+            return BatchResult(index=index, status_code=resp.status_code,
+                               ok=True, attempts=last_attempts() or 1,
+                               response=resp.text[:200], **sizes)
+        except Exception as exc:
+            log.error("send_failed", batch=index, error=str(exc))
+            status = exc.response.status_code if isinstance(exc, httpx.HTTPStatusError) else 0
+            attempts = (last_attempts() or 3) if posted else 0
+            return BatchResult(index=index, status_code=status,
+                               ok=False, attempts=attempts,
+                               response=str(exc)[:200], **sizes)
+
 async def send_dataframe(df: pd.DataFrame, project_id: str, api_key: str,
-                         url: str = DEFAULT_ENDPOINT) -> SendResult:
-    """Отправляет DataFrame как JSON‑массив.
+                         url: str = DEFAULT_ENDPOINT,
+                         batch_rows: int | None = None,
+                         compression: Compression = "none",
+                         compression_level: int | None = None) -> SendResult:
+    """Отправляет DataFrame JSON‑массивами по `batch_rows` строк.
+
+    Батчи идут параллельно, не более SENDER_CONCURRENCY одновременно,
+    через общий клиент endpoint'а; каждый ретраится сам по себе.
+    `batch_rows` по умолчанию — SENDER_BATCH_ROWS (0 — одним запросом).
+    `compression` — Content-Encoding тела (настройка проекта); батчи
+    меньше SENDER_COMPRESS_MIN_BYTES уходят несжатыми.
 
-    * **ok=True**  → сервер вернул 2xx;
-    * **ok=False** → были network‑ошибки или 4xx/5xx после retry.
+    * **ok=True**  → все батчи получили 2xx;
+    * **ok=False** → хотя бы один батч упал после retry
+      (status_code / response — первого упавшего).
     """
-    payload = orjson.loads(df.to_json(orient="records"))
+    if batch_rows is None:
+        batch_rows = settings.SENDER_BATCH_ROWS
+    step = batch_rows or max(len(df), 1)
     headers = {HDR_PROJECT: project_id, HDR_APIKEY: api_key}
+    window = asyncio.Semaphore(settings.SENDER_CONCURRENCY)
+
+    started = time.perf_counter()
+    batches = await asyncio.gather(*(
+        _send_batch(i, df.iloc[start:start + step], url, headers, window,
+                    compression, compression_level)
+        for i, start in enumerate(range(0, max(len(df), 1), step))
+    ))
+    elapsed = time.perf_counter() - started
+    for b in batches:
+        metrics.SENDER_BATCHES.inc(outcome="ok" if b.ok else "failed")
+        metrics.SENDER_RETRIES.inc(max(b.attempts - 1, 0))
+        metrics.SENDER_BYTES_RAW.inc(b.bytes_raw)
+        metrics.SENDER_BYTES_SENT.inc(b.bytes_sent)
+
+    head = next((b for b in batches if not b.ok), batches[-1])
+    return SendResult(status_code=head.status_code, ok=head.ok,
+                      attempts=sum(b.attempts for b in batches),
+                      response=head.response, batches=batches, rows=len(df),
+                      bytes_raw=sum(b.bytes_raw for b in batches),
+                      bytes_sent=sum(b.bytes_sent for b in batches),
+                      elapsed=round(elapsed, 3),
+                      rows_per_sec=round(len(df) / elapsed, 1) if elapsed else 0.0)
 
-    attempts = 0
-    try:
-        resp = await post_json(url, payload, headers)
-        attempts = resp.num_traces if hasattr(resp, "num_traces") else 1
-        return SendResult(status_code=resp.status_code, ok=True,
-                          attempts=attempts, response=resp.text[:200])
-    except Exception as exc:
-        log.error("send_failed", error=str(exc))
-        return SendResult(status_code=getattr(exc, "status_code", 0),
-                          ok=False, attempts=attempts or 3,
-                          response=str(exc)[:200])
-
-async def send_dataframe_local(df: pd.DataFrame):
-     df.to_json("saves/save1.json", index=False)
\ No newline at end of file
+async def send_dataframe_local(df: pd.DataFrame, part: int | None = None):
+    """
+    Локальная копия отправленных данных в saves/save1.json.
+
+    `part` — номер куска в потоковом режиме: файл пишется как NDJSON,
+    первый кусок перезаписывает его, остальные дописываются.
+    """
+    if part is None:
+        df.to_json("saves/save1.json", index=False)
+        return
+    with open("saves/save1.json", "w" if part == 0 else "a") as f:
+        df.to_json(f, orient="records", lines=True)       # сам завершает строку "\n"
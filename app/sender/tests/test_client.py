@@ -0,0 +1,17 @@
+"""
+Юнит‑тест: общий HTTP‑клиент переиспользуется в пределах endpoint'а
+и закрывается на shutdown.
+"""
+import pytest
+from app.sender.client import open_client, close_clients
+
+@pytest.mark.asyncio
+async def test_client_shared_per_endpoint():
+    a = open_client("https://api.partner.com/v1/upload")
+    assert open_client("https://api.partner.com/v1/other") is a
+    assert open_client("https://backup.partner.com/v1/upload") is not a
+
+    await close_clients()
+    assert a.is_closed
+    assert open_client("https://api.partner.com/v1/upload") is not a
+    await close_clients()
@@ -0,0 +1,106 @@
+"""
+Юнит‑тест outbox: упавшие батчи остаются на диске и досылаются
+фоновым доставщиком без повторного parse/map/QC.
+"""
+import asyncio
+import pandas as pd, pytest
+from types import SimpleNamespace
+
+from core.settings import settings
+from app.sender import outbox
+from app.sender.schemas import SendResult, BatchResult
+
+def _batch(i, rows, ok):
+    return BatchResult(index=i, rows=rows, status_code=201 if ok else 503,
+                       ok=ok, attempts=3, response="")
+
+@pytest.mark.asyncio
+async def test_outbox_retry_and_drain(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_DIR", str(tmp_path / "outbox"))
+    monkeypatch.setattr(settings, "DB_PATH", str(tmp_path / "mapping.db"))
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_BASE", 0)
+
+    df = pd.DataFrame({"x": range(10)}, index=range(100, 110))
+    item = await outbox.put("demo", "https://x/upload", df)
+
+    # второй батч из трёх упал — в файле остаются только его строки
+    failed = SendResult(status_code=503, ok=False, attempts=7, response="boom",
+                        batches=[_batch(0, 4, True), _batch(1, 4, False), _batch(2, 2, True)])
+    await outbox.settle(item, df, failed)
+
+    sent = []
+    async def fake_project(project_id):
+        return SimpleNamespace(api_key="secret", send_compression="none",
+                               send_compression_level=None)
+    async def fake_send(df, project_id, api_key, url, **kw):
+        sent.append(df["x"].tolist())
+        return SendResult(status_code=201, ok=True, attempts=1, response="ok")
+    monkeypatch.setattr(outbox, "get_project_record", fake_project)
+    monkeypatch.setattr(outbox, "send_dataframe", fake_send)
+
+    assert await outbox.drain_once() == 1
+    assert sent == [[4, 5, 6, 7]]
+    assert await outbox.drain_once() == 0
+    assert not list((tmp_path / "outbox").iterdir())
+
+
+@pytest.mark.asyncio
+async def test_send_error_and_leases(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_DIR", str(tmp_path / "outbox"))
+    monkeypatch.setattr(settings, "DB_PATH", str(tmp_path / "mapping.db"))
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_BASE", 0)
+    project = SimpleNamespace(api_key="secret", send_compression="none", send_compression_level=None)
+
+    async def broken_send(*a, **kw):
+        raise ValueError("bad level")
+    monkeypatch.setattr(outbox, "send_dataframe", broken_send)
+
+    # исключение отправки — неудачная попытка, а не вечный 'sending'
+    df = pd.DataFrame({"x": range(3)})
+    item = await outbox.put("demo", "https://x/upload", df)
+    res = await outbox.deliver(item, df, "demo", project, "https://x/upload")
+    assert not res.ok and "bad level" in res.response
+    with outbox._connect() as conn:
+        row = conn.execute("SELECT * FROM outbox WHERE id = ?", (item,)).fetchone()
+    assert (row["status"], row["attempts"], row["worker"]) == ("pending", 1, None)
+
+    # живая аренда другого отправителя не отбирается, истёкшая — возвращается
+    other = await outbox.put("demo", "https://x/upload", df)
+    assert await outbox.recover() == 0
+    monkeypatch.setattr(settings, "OUTBOX_LEASE", -1)
+    await asyncio.to_thread(outbox._extend, other)                 # «отправитель умер»
+    assert await outbox.recover() == 1
+
+
+@pytest.mark.asyncio
+async def test_corrupt_file_goes_dead(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_DIR", str(tmp_path / "outbox"))
+    monkeypatch.setattr(settings, "DB_PATH", str(tmp_path / "mapping.db"))
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_BASE", 0)
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 2)
+
+    df = pd.DataFrame({"x": range(3)})
+    bad = await outbox.put("demo", "https://x/upload", df)
+    good = await outbox.put("demo", "https://x/upload", df)
+    with outbox._connect() as conn:
+        path = conn.execute("SELECT path FROM outbox WHERE id = ?", (bad,)).fetchone()[0]
+        conn.execute("UPDATE outbox SET status = 'pending'")
+    with open(path, "r+b") as f:
+        f.truncate(10)                                             # обрезанный .arrow
+
+    sent = []
+    async def fake_project(project_id):
+        return SimpleNamespace(api_key="secret", send_compression="none", send_compression_level=None)
+    async def fake_send(df, project_id, api_key, url, **kw):
+        sent.append(len(df))
+        return SendResult(status_code=201, ok=True, attempts=1, response="ok")
+    monkeypatch.setattr(outbox, "get_project_record", fake_project)
+    monkeypatch.setattr(outbox, "send_dataframe", fake_send)
+
+    assert await outbox.drain_once() == 2                          # битая запись не срывает пачку
+    assert sent == [3]
+    assert await outbox.drain_once() == 1
+    with outbox._connect() as conn:
+        row = conn.execute("SELECT * FROM outbox WHERE id = ?", (bad,)).fetchone()
+        assert conn.execute("SELECT COUNT(*) FROM outbox WHERE id = ?", (good,)).fetchone()[0] == 0
+    assert (row["status"], row["attempts"]) == ("dead", 2)
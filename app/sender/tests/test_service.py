@@ -2,15 +2,102 @@
 Юнит‑тест: проверяем, что send_dataframe правильно интерпретирует
 успешный ответ сервера и ретрай при ошибке.
 """
-import pandas as pd, pytest, httpx
-from app.sender.service import send_dataframe
+import pandas as pd, pytest, httpx, orjson
+from app.sender.service import send_dataframe, send_dataframe_local
+from app.sender.encoder import encode_records
 
 @pytest.mark.asyncio
 async def test_send_mock(monkeypatch):
-    async def fake_post_json(url, json_, headers):
+    async def fake_post_json(url, content, headers):
         return httpx.Response(201, text="ok")
     monkeypatch.setattr("app.sender.service.post_json", fake_post_json)
 
     df = pd.DataFrame([{"x": 1}])
     res = await send_dataframe(df, "demo", "secret")
     assert res.ok and res.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_send_batches(monkeypatch):
+    sizes = []
+    async def fake_post_json(url, content, headers):
+        json_ = orjson.loads(content)
+        sizes.append(len(json_))
+        if json_[0]["x"] == 4:
+            raise httpx.HTTPStatusError("boom", request=httpx.Request("POST", url),
+                                        response=httpx.Response(400))
+        return httpx.Response(201, text="ok")
+    monkeypatch.setattr("app.sender.service.post_json", fake_post_json)
+
+    df = pd.DataFrame({"x": range(10)})
+    res = await send_dataframe(df, "demo", "secret", batch_rows=4)
+    assert sorted(sizes) == [2, 4, 4]
+    assert [b.ok for b in res.batches] == [True, False, True]
+    assert not res.ok and res.status_code == 400 and res.rows == 10
+
+
+def test_encode_matches_to_json():
+    import numpy as np
+    df = pd.DataFrame({
+        "name": ["a", None],
+        "n":    pd.array([1, None], dtype="Int64"),
+        "f":    [1.5, np.nan],
+        "d":    pd.to_datetime(["2020-01-01", None]),
+    })
+    assert orjson.loads(encode_records(df)) == orjson.loads(df.to_json(orient="records"))
+
+
+@pytest.mark.asyncio
+async def test_send_gzip(monkeypatch):
+    import gzip
+    seen = {}
+    async def fake_post_json(url, content, headers):
+        seen["encoding"] = headers.get("Content-Encoding")
+        seen["rows"] = len(orjson.loads(gzip.decompress(content)))
+        return httpx.Response(201, text="ok")
+    monkeypatch.setattr("app.sender.service.post_json", fake_post_json)
+
+    df = pd.DataFrame({"email": ["user@example.com"] * 500})
+    res = await send_dataframe(df, "demo", "secret", batch_rows=0, compression="gzip")
+    assert seen == {"encoding": "gzip", "rows": 500}
+    assert res.bytes_sent < res.bytes_raw
+
+
+@pytest.mark.asyncio
+async def test_send_compress_error(monkeypatch):
+    async def broken(body, method, level):
+        raise ValueError("bad level")
+    async def fake_post_json(url, content, headers):
+        raise AssertionError("не должно дойти до POST")
+    monkeypatch.setattr("app.sender.service.compress_async", broken)
+    monkeypatch.setattr("app.sender.service.post_json", fake_post_json)
+
+    df = pd.DataFrame({"email": ["user@example.com"] * 500})
+    res = await send_dataframe(df, "demo", "secret", batch_rows=0, compression="gzip")
+    assert not res.ok and res.attempts == 0 and "bad level" in res.response
+
+
+def test_encode_escapes_and_objects():
+    import datetime as dt
+    df = pd.DataFrame({
+        "s": ['a","b', "x\\", None, 'é\n"\x01'],
+        "o": pd.Series(["a", 1, None, {"k": [1]}], dtype=object),
+        "d": pd.Series([dt.date(2020, 1, 2)] * 4, dtype=object),
+    })
+    assert orjson.loads(encode_records(df)) == [
+        {"s": 'a","b', "o": "a", "d": 1577923200000},
+        {"s": "x\\", "o": 1, "d": 1577923200000},
+        {"s": None, "o": None, "d": 1577923200000},
+        {"s": 'é\n"\x01', "o": {"k": [1]}, "d": 1577923200000},
+    ]
+    assert encode_records(df.iloc[:0]) == b"[]"
+
+
+@pytest.mark.asyncio
+async def test_local_ndjson_no_blank_lines(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "saves").mkdir()
+    await send_dataframe_local(pd.DataFrame({"x": [1, 2]}), part=0)
+    await send_dataframe_local(pd.DataFrame({"x": [3]}), part=1)
+    lines = (tmp_path / "saves" / "save1.json").read_text().split("\n")
+    assert lines == ['{"x":1}', '{"x":2}', '{"x":3}', ""]
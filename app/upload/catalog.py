@@ -0,0 +1,241 @@
+"""
+Каталог загруженных файлов.
+
+Раньше «последний файл проекта» искался glob'ом по
+`UPLOAD_DIR/<project_id>/*.*` и stat() каждого файла — на каждый рендер
+/ui/mapping и каждую ручную отправку, O(n) системных вызовов от числа
+загрузок. Теперь загрузка записывает файл в каталог (SQLite `catalog.db`
+рядом с БД проектов, как outbox и jobs), а «последний», список и поиск —
+запросы по индексу.
+
+Что хранится:
+
+    path, project_id, name (исходное имя), size, sha256 (считается
+    потоком при записи; "" — ещё не посчитан), format (csv / xlsx / json),
+    created_at;
+    rows — после успешного прогона пайплайна (считать строки при загрузке значило
+    бы разбирать файл дважды); columns и header — имена колонок и их
+    типы с примерами значений (`app.parser.sniff`, несколько КБ начала
+    файла) — при загрузке или при первом открытии превью маппинга
+
+Файлы, загруженные до каталога, индексируются командой
+
+    python -m app.upload.catalog [project_id]
+
+или лениво: если у проекта в каталоге нет ни одной записи, а каталог
+на диске есть, он индексируется при первом обращении. Ленивый путь
+работает внутри запроса, поэтому только перечисляет файлы (путь, размер,
+mtime) и не хэширует их: sha256 = "" дописывает пайплайн при первом
+прогоне файла или та же команда.
+"""
+import hashlib, sqlite3, sys, time
+from contextlib import closing
+from pathlib import Path
+
+import orjson
+import structlog
+
+from core.settings import settings
+
+log = structlog.get_logger()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    path        TEXT    PRIMARY KEY,
+    project_id  TEXT    NOT NULL,
+    name        TEXT    NOT NULL,
+    size        INTEGER NOT NULL,
+    sha256      TEXT    NOT NULL,                      -- "" — ещё не посчитан
+    format      TEXT    NOT NULL,
+    rows        INTEGER,
+    columns     TEXT,                                  -- JSON-список имён колонок
+    created_at  REAL    NOT NULL,
+    header      TEXT                                   -- JSON: [{name, dtype, sample}, …]
+);
+CREATE INDEX IF NOT EXISTS uploads_latest ON uploads (project_id, created_at);
+CREATE INDEX IF NOT EXISTS uploads_hash ON uploads (project_id, sha256);
+"""
+# колонки, добавленные после первой версии схемы (ALTER для старых catalog.db)
+_LATER_COLUMNS = {
+    "header": "TEXT",
+}
+_ready: set[Path] = set()
+
+
+def _db_path() -> Path:
+    return Path(settings.DB_PATH).resolve().parent / "catalog.db"
+
+
+def _connect() -> closing[sqlite3.Connection]:
+    """Соединение в режиме autocommit; закрывается на выходе из `with`."""
+    path = _db_path()
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if path not in _ready:
+        conn.execute("PRAGMA journal_mode=WAL")
+        have = {r[1] for r in conn.execute("PRAGMA table_info(uploads)")}
+        for name, ddl in _LATER_COLUMNS.items():
+            if have and name not in have:
+                conn.execute(f"ALTER TABLE uploads ADD COLUMN {name} {ddl}")
+        conn.executescript(_SCHEMA)
+        _ready.add(path)
+    return closing(conn)
+
+
+def file_format(path: Path) -> str:
+    return path.suffix.lower().lstrip(".")
+
+
+def _decode(row: sqlite3.Row) -> dict:
+    entry = dict(row)
+    for field in ("columns", "header"):
+        entry[field] = orjson.loads(entry[field]) if entry[field] else None
+    return entry
+
+
+# ---------- запись ----------
+def record(project_id: str, path: Path, size: int, sha256: str, name: str | None = None,
+           created_at: float | None = None) -> None:
+    """Добавить (или обновить) файл проекта в каталоге."""
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO uploads (path, project_id, name, size, sha256, format, created_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (str(path), project_id, name or path.name, size, sha256, file_format(path),
+             created_at if created_at is not None else time.time()),
+        )
+
+
+def set_stats(path: Path, rows: int | None = None, header: list[dict] | None = None,
+              sha256: str | None = None) -> None:
+    """Дописать число строк, заголовок (результат `sniff`) и/или sha256, когда они стали известны."""
+    with _connect() as conn:
+        if sha256 is not None:
+            conn.execute("UPDATE uploads SET sha256 = ? WHERE path = ?", (sha256, str(path)))
+        if rows is not None:
+            conn.execute("UPDATE uploads SET rows = ? WHERE path = ?", (rows, str(path)))
+        if header is not None:
+            conn.execute("UPDATE uploads SET columns = ?, header = ? WHERE path = ?",
+                         (orjson.dumps([c["name"] for c in header]).decode(),
+                          orjson.dumps(header).decode(), str(path)))
+
+
+def touch(path: Path) -> None:
+    """Сделать файл «последним» (повторно пришёл тот же файл, а новый не сохранили)."""
+    with _connect() as conn:
+        conn.execute("UPDATE uploads SET created_at = ? WHERE path = ?", (time.time(), str(path)))
+
+
+def forget(path: Path) -> None:
+    """Убрать запись (файл удалён — например, не влез в очередь)."""
+    with _connect() as conn:
+        conn.execute("DELETE FROM uploads WHERE path = ?", (str(path),))
+
+
+# ---------- чтение ----------
+def get(path: Path) -> dict | None:
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM uploads WHERE path = ?", (str(path),)).fetchone()
+    return _decode(row) if row is not None else None
+
+
+def list_files(project_id: str, limit: int = 50) -> list[dict]:
+    """Файлы проекта, новые первыми."""
+    _ensure_indexed(project_id)
+    with _connect() as conn:
+        rows = conn.execute("SELECT * FROM uploads WHERE project_id = ?"
+                            " ORDER BY created_at DESC LIMIT ?", (project_id, limit)).fetchall()
+    return [_decode(r) for r in rows]
+
+
+def latest(project_id: str) -> dict | None:
+    """
+    Самый свежий файл проекта, который ещё есть на диске (или None).
+
+    Записи удалённых с диска файлов по дороге вычищаются.
+    """
+    _ensure_indexed(project_id)
+    while True:
+        with _connect() as conn:
+            row = conn.execute("SELECT * FROM uploads WHERE project_id = ?"
+                               " ORDER BY created_at DESC LIMIT 1", (project_id,)).fetchone()
+            if row is None or Path(row["path"]).exists():
+                return _decode(row) if row is not None else None
+            conn.execute("DELETE FROM uploads WHERE path = ?", (row["path"],))
+
+
+def find_duplicate(project_id: str, path: Path) -> dict | None:
+    """
+    Другой файл проекта с тем же sha256, что у `path` (индекс по хэшу).
+
+    Сначала — уже обработанные пайплайном (rows заполнено), среди них —
+    самый свежий; файлы, которых нет на диске, пропускаются.
+    """
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT d.* FROM uploads u JOIN uploads d"
+            " ON d.project_id = u.project_id AND d.sha256 = u.sha256 AND d.path != u.path"
+            " WHERE u.path = ? AND u.project_id = ? AND u.sha256 != ''"
+            " ORDER BY d.rows IS NULL, d.created_at DESC",
+            (str(path), project_id),
+        ).fetchall()
+    return next((_decode(r) for r in rows if Path(r["path"]).exists()), None)
+
+
+# ---------- перестроение ----------
+def _hash_file(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def rebuild(project_id: str | None = None, hash_files: bool = True) -> tuple[int, int]:
+    """
+    Сверить каталог с UPLOAD_DIR: добавить неизвестные файлы (хэш, размер,
+    время — mtime), удалить записи исчезнувших. Вернуть (добавлено, удалено).
+
+    `hash_files=False` — без чтения файлов: sha256 остаётся "". С
+    `hash_files=True` дописываются и хэши, не посчитанные раньше.
+    """
+    root = Path(settings.UPLOAD_DIR)
+    dirs = [root / project_id] if project_id else [d for d in root.iterdir() if d.is_dir()] \
+        if root.exists() else []
+    added = removed = 0
+    for d in dirs:
+        with _connect() as conn:
+            known = {r[0] for r in conn.execute("SELECT path FROM uploads WHERE project_id = ?", (d.name,))}
+        on_disk = {str(p) for p in d.glob("*.*") if p.is_file()} if d.exists() else set()
+        for p in map(Path, sorted(on_disk - known)):
+            st = p.stat()
+            record(d.name, p, st.st_size, _hash_file(p) if hash_files else "", created_at=st.st_mtime)
+            added += 1
+        if hash_files:
+            with _connect() as conn:
+                unhashed = [r[0] for r in conn.execute(
+                    "SELECT path FROM uploads WHERE project_id = ? AND sha256 = ''", (d.name,))]
+            for p in unhashed:
+                if p in on_disk:
+                    set_stats(Path(p), sha256=_hash_file(Path(p)))
+        gone = known - on_disk
+        with _connect() as conn:
+            conn.executemany("DELETE FROM uploads WHERE path = ?", [(p,) for p in gone])
+        removed += len(gone)
+    log.info("catalog.rebuilt", project_id=project_id, added=added, removed=removed)
+    return added, removed
+
+
+def _ensure_indexed(project_id: str) -> None:
+    """
+    Проект без единой записи, но с каталогом на диске — проиндексировать
+    (один раз). Зовётся из запросов, поэтому файлы не читаются — только листинг.
+    """
+    with _connect() as conn:
+        if conn.execute("SELECT 1 FROM uploads WHERE project_id = ? LIMIT 1", (project_id,)).fetchone():
+            return
+    if (Path(settings.UPLOAD_DIR) / project_id).is_dir():
+        rebuild(project_id, hash_files=False)
+
+
+if __name__ == "__main__":
+    added, removed = rebuild(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"catalog: +{added} / -{removed}")
@@ -2,25 +2,90 @@
 Эндпоинты загрузки файла.
 
 * `POST /upload/local` — форма multipart (из UI) или cURL
-* В ответе 201 + путь сохранённого файла
+* В ответе 201 + путь сохранённого файла и `job_id` (статус — GET /jobs/{job_id})
+* Пайплайн ставится в очередь заданий (`app.jobs`); если очередь
+  заполнена — 429 с Retry-After, сохранённый файл удаляется
+* Повторная загрузка того же содержимого (sha256 из каталога) — по
+  `Project.dedup_policy`: skip — файл не сохраняется и пайплайн не
+  ставится, если прошлая копия уже обработана; reuse — новая копия не
+  хранится, пайплайн ставится на уже лежащий файл (разбор и маппинг
+  возьмёт из frame_cache); off — как новый файл: копия хранится, а
+  пайплайн идёт мимо frame_cache (разбирает и маппит заново).
+  Попадание видно в ответе (`dedup`, `duplicate_of`)
+* `GET /upload/files` — загруженные файлы проекта из каталога, новые первыми
 """
-from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Depends, HTTPException, status
+import asyncio
+from pathlib import Path
+
+import structlog
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, status
+from app.jobs import queue
+from app.metrics.instruments import UPLOADS
 from app.project.auth import get_current_project
+from . import catalog
 from .service import store_local_file, store_s3_object
-from .schemas import UploadResponse
-from .tasks import launch_pipeline
+from .schemas import UploadResponse, UploadedFile
 
 router = APIRouter(prefix="/upload", tags=["upload"])
+log = structlog.get_logger()
+
+RETRY_AFTER = 30        # сек., подсказка клиенту при 429
+
+
+async def _enqueue(project_id: str, saved_path: Path, keep: bool = False) -> str:
+    """
+    Поставить пайплайн в очередь; при переполнении — 429 и файл удаляется
+    (`keep=True` — файл загружен раньше, его не трогаем).
+    """
+    try:
+        return await queue.enqueue(project_id, str(saved_path))
+    except queue.QueueFull:
+        if not keep:
+            saved_path.unlink(missing_ok=True)
+            await asyncio.to_thread(catalog.forget, saved_path)
+        raise HTTPException(status.HTTP_429_TOO_MANY_REQUESTS, "queue_full",
+                            headers={"Retry-After": str(RETRY_AFTER)})
+
+async def _accept(project, saved_path: Path) -> UploadResponse:
+    """Проверить дубль по политике проекта и поставить пайплайн в очередь."""
+    policy = project.dedup_policy
+    dup = None
+    if policy != "off":
+        dup = await asyncio.to_thread(catalog.find_duplicate, project.id, saved_path)
+
+    skipped = dup is not None and policy == "skip" and dup["rows"] is not None
+    if dup is not None and (skipped or policy == "reuse"):
+        # новая копия не нужна: «последним» становится уже лежащий файл
+        saved_path.unlink(missing_ok=True)
+        await asyncio.to_thread(catalog.forget, saved_path)
+        await asyncio.to_thread(catalog.touch, Path(dup["path"]))
+
+    if skipped:
+        UPLOADS.inc(dedup="skipped")
+        log.info("upload.duplicate_skipped", project_id=project.id, duplicate_of=dup["path"])
+        return UploadResponse(detail="duplicate_skipped", path=dup["path"], job_id=None,
+                              dedup="skipped", duplicate_of=dup["path"])
+
+    if dup is not None and policy == "reuse":
+        job_id = await _enqueue(project.id, Path(dup["path"]), keep=True)
+        UPLOADS.inc(dedup="reused")
+        log.info("upload.duplicate_reused", project_id=project.id, duplicate_of=dup["path"])
+        return UploadResponse(detail="duplicate_reused", path=dup["path"], job_id=job_id,
+                              dedup="reused", duplicate_of=dup["path"])
+
+    job_id = await _enqueue(project.id, saved_path)
+    UPLOADS.inc(dedup="none")
+    return UploadResponse(path=str(saved_path), job_id=job_id,
+                          duplicate_of=dup["path"] if dup is not None else None)
 
 # локальный upload
 @router.post("/local", response_model=UploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_local(
-    bg: BackgroundTasks,
     project = Depends(get_current_project),
     file: UploadFile = File(...)
 ):
     """
-        Сохраняем файл в локальную ФС и отстреливаем фоновую задачу.
+        Сохраняем файл в локальную ФС и ставим пайплайн в очередь заданий.
 
         • Авторизация идёт через заголовки (`get_current_project`).
         • Событие `file_received` пишем синхронно, чтобы гарантировать
@@ -31,17 +96,24 @@ async def upload_local(
     except ValueError:
         raise HTTPException(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, "unsupported_file_type")
 
-    bg.add_task(launch_pipeline, project.id, str(saved_path))  # ⬅ парсинг/валидация
-    return UploadResponse(path=str(saved_path))
+    return await _accept(project, saved_path)  # ⬅ парсинг/валидация — в воркере
 
 # S3
 @router.post("/s3/{bucket}/{key:path}", response_model=UploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_s3(
-    bg: BackgroundTasks,
     bucket: str,
     key: str,
     project = Depends(get_current_project),
 ):
     saved_path = await store_s3_object(project.id, bucket, key)
-    bg.add_task(launch_pipeline, project.id, str(saved_path))
-    return UploadResponse(path=str(saved_path))
+    return await _accept(project, saved_path)
+
+
+# каталог загрузок
+@router.get("/files", response_model=list[UploadedFile])
+async def list_uploads(
+    limit: int = Query(50, ge=1, le=500),
+    project = Depends(get_current_project),
+):
+    rows = await asyncio.to_thread(catalog.list_files, project.id, limit)
+    return [UploadedFile.model_validate(r) for r in rows]
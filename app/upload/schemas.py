@@ -1,11 +1,35 @@
 """
 Pydantic-схемы ответов эндпоинтов «upload».
 """
+from datetime import datetime
+from typing import Literal
+
 from pydantic import BaseModel
 
+# повторная загрузка файла с тем же sha256 (настройка проекта):
+#   off   — обрабатывать как новый файл (копия хранится, frame_cache не используется)
+#   skip  — не ставить пайплайн, если прошлая копия уже обработана
+#   reuse — новую копию не хранить, пайплайн — на прошлую копию (разбор и маппинг из frame_cache)
+DedupPolicy = Literal["off", "skip", "reuse"]
+
 class UploadResponse(BaseModel):
     """
     Pydantic-схемы ответов эндпоинтов «upload».
     """
     detail: str = "file_saved"
     path: str
+    job_id: str | None      # статус пайплайна — GET /jobs/{job_id}; None — дубль пропущен
+    dedup: Literal["skipped", "reused"] | None = None
+    duplicate_of: str | None = None     # путь ранее загруженной копии
+
+
+class UploadedFile(BaseModel):
+    """Запись каталога загрузок (`GET /upload/files`)."""
+    path: str
+    name: str               # исходное имя файла
+    size: int
+    sha256: str
+    format: str
+    rows: int | None = None             # появляется после прогона пайплайна
+    columns: list[str] | None = None
+    created_at: datetime
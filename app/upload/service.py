@@ -7,19 +7,39 @@
 2. **объект в S3-совместимом хранилище** → `store_s3_object`
 
 Сохраняем файлы в `<UPLOAD_DIR>/<project_id>/` под уникальным именем
-(`UUID + оригинальное_расширение`) и сразу публикуем событие
+(`UUID + оригинальное_расширение`), по пути считаем sha256 и записываем
+файл в каталог загрузок (`catalog`) вместе с заголовком (колонки, типы,
+примеры — первые КБ файла), затем публикуем событие
 `file_received`, чтобы пайплайн или мониторинг могли отреагировать.
 """
-import uuid, shutil, aiofiles
+import asyncio, hashlib, uuid, aiofiles
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-import boto3, botocore
+import boto3, botocore, botocore.config
+import structlog
 from fastapi import UploadFile
+from app.parser.exceptions import ParseError
+from app.parser.sniff import sniff
 from .utils import publish_event
+from . import catalog
 from core import settings
 
+log = structlog.get_logger()
+
 # допустимые расширения (напр. ".csv,.xlsx,.json")
 ALLOWED = {ext.strip().lower() for ext in settings.ALLOWED_EXT.split(",")}
 
+def _catalog(project_id: str, dest: Path, size: int, sha256: str, name: str) -> None:
+    """Запись в каталог + заголовок; битое начало файла загрузке не мешает (разберётся пайплайн)."""
+    catalog.record(project_id, dest, size, sha256, name)
+    try:
+        catalog.set_stats(dest, header=sniff(dest))
+    except ParseError as exc:
+        log.warning("upload.sniff_failed", path=str(dest), error=str(exc))
+        catalog.set_stats(dest, header=[])         # пустой заголовок: превью не сниффит заново
+
 # ---------- multipart ----------
 async def store_local_file(project_id: str, file: UploadFile) -> Path:
     """
@@ -35,6 +55,7 @@ async def store_local_file(project_id: str, file: UploadFile) -> Path:
 
     Side-effects:
         • создает директории (parents=True)
+        • добавляет запись в каталог загрузок
         • логирует событие 'file_received'
     """
     ext = Path(file.filename).suffix.lower()
@@ -45,15 +66,20 @@ async def store_local_file(project_id: str, file: UploadFile) -> Path:
     dest_dir.mkdir(parents=True, exist_ok=True)
     dest = dest_dir / f"{uuid.uuid4()}{ext}"
 
+    digest, size = hashlib.sha256(), 0
     async with aiofiles.open(dest, "wb") as out:
         while chunk := await file.read(1024 * 1024):
+            digest.update(chunk)
+            size += len(chunk)
             await out.write(chunk)
 
+    await asyncio.to_thread(_catalog, project_id, dest, size, digest.hexdigest(), file.filename)
     await publish_event("file_received", {"project_id": project_id, "path": str(dest)})
     return dest
 
 # ---------- S3 ----------
-# сессия и клиент инициализируем один раз — boto3 потокобезопасен
+# сессия и клиент инициализируем один раз — boto3 потокобезопасен;
+# пул соединений — не меньше числа параллельных частей
 _session = boto3.session.Session()
 _s3 = _session.client(
     "s3",
@@ -61,12 +87,66 @@ _s3 = _session.client(
     region_name=settings.S3_REGION,
     aws_access_key_id=settings.S3_KEY,
     aws_secret_access_key=settings.S3_SECRET,
+    config=botocore.config.Config(max_pool_connections=max(10, settings.S3_CONCURRENCY)),
 )
 
+_CHUNK = 1024 * 1024
+
+
+def _get_part(bucket: str, key: str, etag: str, start: int, end: int) -> bytes:
+    """Байты [start, end] объекта; IfMatch — объект не подменили посреди скачивания."""
+    data = _s3.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}", IfMatch=etag)["Body"].read()
+    if len(data) != end - start + 1:
+        raise RuntimeError(f"S3 error: short read of bytes {start}-{end} ({len(data)} bytes)")
+    return data
+
+
+def _download(bucket: str, key: str, dest: Path) -> tuple[int, str]:
+    """
+    Скачать объект в `dest`, вернуть (размер, sha256). Блокирующий — зовём
+    через to_thread.
+
+    Объект не больше S3_PART_SIZE (или S3_CONCURRENCY=1) идёт одним GET
+    кусками по 1 МиБ. Большой режется на части по S3_PART_SIZE, которые
+    качаются ranged GET'ами в S3_CONCURRENCY потоков; записываются на диск
+    и хэшируются строго по порядку. В полёте не больше S3_CONCURRENCY
+    частей, так что память — около S3_CONCURRENCY × S3_PART_SIZE.
+    """
+    part, workers = settings.S3_PART_SIZE, settings.S3_CONCURRENCY
+    head = _s3.head_object(Bucket=bucket, Key=key)
+    size, digest = head["ContentLength"], hashlib.sha256()
+
+    with dest.open("wb") as f:
+        if size <= part or workers <= 1:
+            body = _s3.get_object(Bucket=bucket, Key=key, IfMatch=head["ETag"])["Body"]
+            while chunk := body.read(_CHUNK):
+                digest.update(chunk)
+                f.write(chunk)
+            return size, digest.hexdigest()
+
+        ranges = iter([(start, min(start + part, size) - 1) for start in range(0, size, part)])
+        pool = ThreadPoolExecutor(workers, thread_name_prefix="s3-part")
+        try:
+            window = deque(pool.submit(_get_part, bucket, key, head["ETag"], *r)
+                           for r in islice(ranges, workers))
+            while window:
+                data = window.popleft().result()
+                if (r := next(ranges, None)) is not None:
+                    window.append(pool.submit(_get_part, bucket, key, head["ETag"], *r))
+                digest.update(data)
+                f.write(data)
+        finally:
+            pool.shutdown(cancel_futures=True)
+    return size, digest.hexdigest()
+
+
 async def store_s3_object(project_id: str, bucket: str, key: str) -> Path:
     """
     Копирует объект из S3 и кладёт в локальный UPLOAD_DIR.
 
+    Скачивание идёт в потоке (event loop не блокируется), большие объекты —
+    параллельными частями (см. `_download`).
+
     Args:
         project_id: UUID проекта
         bucket:     имя S3-бакета
@@ -83,11 +163,14 @@ async def store_s3_object(project_id: str, bucket: str, key: str) -> Path:
     dest = dest_dir / f"{uuid.uuid4()}_{Path(key).name}"
 
     try:
-        obj = _s3.get_object(Bucket=bucket, Key=key)
-        with dest.open("wb") as f:
-            shutil.copyfileobj(obj["Body"], f)
+        size, sha256 = await asyncio.to_thread(_download, bucket, key, dest)
     except botocore.exceptions.ClientError as e:
+        dest.unlink(missing_ok=True)
         raise RuntimeError(f"S3 error: {e}")
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
 
+    await asyncio.to_thread(_catalog, project_id, dest, size, sha256, Path(key).name)
     await publish_event("file_received", {"project_id": project_id, "path": str(dest)})
     return dest
@@ -7,17 +7,20 @@
   собирать метрики — не трогая логику самого ETL.
 """
 from .utils import publish_event
+from app.jobs.progress import Progress
 from app.parser.pipeline import run_full_pipeline   # ← ваш модуль парсинга/валидации
 
-async def launch_pipeline(project_id: str, file_path: str):
+async def launch_pipeline(project_id: str, file_path: str, progress: Progress | None = None):
     """
         Запускаем ETL и публикуем событие о результате.
 
+        `progress` — статус задания очереди (этапы, строки, время).
+
         NB: Не ретраим здесь — ретрай лучше делать в самом
             `run_full_pipeline` на отдельных шагах.
         """
     try:
-        await run_full_pipeline(project_id, file_path)
+        await run_full_pipeline(project_id, file_path, progress)
         await publish_event("file_processed", {"project_id": project_id, "file": file_path})
     except Exception as exc:
         # логируем, чтобы можно было алёртить
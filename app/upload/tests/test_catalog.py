@@ -0,0 +1,138 @@
+"""
+Каталог загрузок: запись при загрузке, «последний файл» и список —
+запросами к индексу, перестроение по уже лежащим на диске файлам.
+"""
+import asyncio, hashlib, io, os, uuid
+
+import pandas as pd
+import pytest
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+from core.settings import settings
+from app.project.db import init_models
+from app.main import create_app
+from app.parser import preview
+from app.upload import catalog
+from app.upload.service import store_local_file
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tables():
+    asyncio.run(init_models())                  # новые колонки projects (тесты без lifespan)
+
+
+@pytest.fixture(autouse=True)
+def dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_PATH", str(tmp_path / "mapping.db"))
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+
+
+@pytest.mark.asyncio
+async def test_upload_is_catalogued(monkeypatch):
+    body = b"name,n\nann,1\nbob,2\n"
+    first = await store_local_file("demo", UploadFile(io.BytesIO(b"a\n1\n"), filename="old.csv"))
+    path = await store_local_file("demo", UploadFile(io.BytesIO(body), filename="people.csv"))
+    os.utime(first, (0, 0))                       # mtime больше не решает, кто «последний»
+
+    entry = catalog.get(path)
+    assert (entry["name"], entry["size"], entry["format"]) == ("people.csv", len(body), "csv")
+    assert entry["sha256"] == hashlib.sha256(body).hexdigest()
+    assert preview._latest_file("demo")["path"] == str(path)
+    assert [e["name"] for e in catalog.list_files("demo")] == ["people.csv", "old.csv"]
+
+    # заголовок снят при загрузке; превью файл не читает
+    assert entry["columns"] == ["name", "n"]
+    monkeypatch.setattr(preview, "sniff", None)
+    text = str(pd.Series(["a"]).dtype)             # строковый dtype установленного pandas
+    assert preview.get_sample_columns("demo") == [
+        {"name": "name", "dtype": text, "sample": ["ann", "bob"]},
+        {"name": "n", "dtype": "int64", "sample": [1, 2]},
+    ]
+
+    # удалённый с диска файл из выдачи пропадает
+    path.unlink()
+    assert preview._latest_file("demo")["name"] == "old.csv"
+
+
+def test_rebuild_indexes_existing_files(tmp_path):
+    d = tmp_path / "uploads" / "legacy"
+    d.mkdir(parents=True)
+    for i, name in enumerate(["a.csv", "b.csv"]):
+        (d / name).write_text(f"x\n{i}\n")
+        os.utime(d / name, (i, i))
+
+    assert catalog.latest("legacy")["name"] == "b.csv"            # лениво при первом обращении
+    assert catalog.latest("legacy")["sha256"] == ""                # без чтения файлов
+    (d / "c.csv").write_text("x\n")
+    (d / "a.csv").unlink()
+    assert catalog.rebuild() == (1, 1)
+    assert catalog.get(d / "b.csv")["sha256"] == hashlib.sha256(b"x\n1\n").hexdigest()   # CLI дописал хэш
+    assert {e["name"] for e in catalog.list_files("legacy")} == {"b.csv", "c.csv"}
+
+    # у проиндексированных задним числом заголовок снимается при первом превью
+    assert catalog.latest("legacy")["header"] is None
+    assert [c["name"] for c in preview.get_sample_columns("legacy")] == ["x"]
+    assert catalog.latest("legacy")["columns"] == ["x"]
+
+
+@pytest.mark.asyncio
+async def test_failed_sniff_is_remembered(tmp_path, monkeypatch):
+    from app.parser.exceptions import ParseError
+    from app.upload import service
+    def broken(path):
+        raise ParseError("cannot sniff")
+    monkeypatch.setattr(service, "sniff", broken)
+    path = await store_local_file("demo", UploadFile(io.BytesIO(b"x\n1\n"), filename="bad.csv"))
+    assert catalog.get(path)["header"] == []                      # загрузка прошла, заголовок пуст
+
+    d = tmp_path / "uploads" / "legacy"
+    d.mkdir(parents=True)
+    (d / "a.csv").write_text("x\n1\n")
+    monkeypatch.setattr(preview, "sniff", broken)
+    with pytest.raises(ParseError):
+        preview.get_sample_columns("legacy")
+    monkeypatch.setattr(preview, "sniff", None)                   # второй раз файл не читается
+    assert preview.get_sample_columns("legacy") == []
+
+
+def test_list_endpoint(monkeypatch):
+    client = TestClient(create_app())
+    p = client.post("/projects/", json={"name": f"Catalog-{uuid.uuid4().hex[:6]}"}).json()
+    headers = {"X-PROJECT-ID": p["id"], "X-API-KEY": p["api_key"]}
+
+    assert client.post("/upload/local", headers=headers, files={"file": ("a.csv", b"x\n1\n")}).status_code == 201
+    monkeypatch.setattr(settings, "JOBS_MAX_PENDING", 0)
+    assert client.post("/upload/local", headers=headers, files={"file": ("b.csv", b"x\n2\n")}).status_code == 429
+
+    r = client.get("/upload/files", headers=headers)
+    assert r.status_code == 200
+    assert [(f["name"], f["size"], f["rows"]) for f in r.json()] == [("a.csv", 4, None)]   # отклонённого нет
+
+
+@pytest.mark.parametrize("policy", ["skip", "reuse", "off"])
+def test_dedup_policy(policy, tmp_path):
+    client = TestClient(create_app())
+    p = client.post("/projects/", json={"name": f"Dedup-{uuid.uuid4().hex[:6]}", "dedup_policy": policy}).json()
+    headers = {"X-PROJECT-ID": p["id"], "X-API-KEY": p["api_key"]}
+    upload = lambda name: client.post("/upload/local", headers=headers, files={"file": (name, b"x\n1\n")})
+
+    first = upload("a.csv").json()
+    second = upload("copy.csv").json()                      # дубль, но первая копия ещё не обработана
+    assert second["job_id"] and second["dedup"] == ("reused" if policy == "reuse" else None)
+    assert second["duplicate_of"] == (None if policy == "off" else first["path"])
+    if policy == "reuse":
+        assert second["path"] == first["path"]              # задание — на уже лежащий файл
+
+    catalog.set_stats(catalog.Path(first["path"]), rows=1)  # пайплайн первой копии завершился
+    third = upload("again.csv").json()
+    files = list((tmp_path / "uploads" / p["id"]).iterdir())
+    if policy == "skip":
+        assert (third["dedup"], third["job_id"], third["path"]) == ("skipped", None, first["path"])
+        assert len(files) == 2                              # новый файл не сохранён
+        assert catalog.latest(p["id"])["path"] == first["path"]
+    elif policy == "reuse":
+        assert third["job_id"] and third["path"] == first["path"] and len(files) == 1
+        assert catalog.latest(p["id"])["path"] == first["path"]
+    else:
+        assert third["job_id"] and len(files) == 3
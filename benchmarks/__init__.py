@@ -0,0 +1,9 @@
+"""
+Микро-бенчмарки горячих участков пайплайна.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.bench_sender_encode [rows]
+
+Не входят в pytest-прогон (имена bench_*.py не собираются).
+"""
@@ -0,0 +1,72 @@
+"""
+БД проектов под смешанной нагрузкой: прежний движок по умолчанию
+(rollback-журнал, synchronous=FULL) против `make_engine` (WAL, PRAGMA, пул).
+
+Писатели создают проекты, читатели крутят `get_project` — как поток
+загрузок с авторизацией. Ошибки «database is locked» считаются отдельно.
+
+    python -m benchmarks.bench_db [writers] [readers] [workdir]
+"""
+import asyncio, sys, tempfile, time, uuid
+from pathlib import Path
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.project.crud import create_project, get_project
+from app.project.db import Base, make_engine
+from app.project.models import ProjectCreate
+
+OPS = 50            # операций на одного писателя / читателя
+
+
+async def run(eng, writers: int, readers: int) -> tuple[float, int, int]:
+    Session = sessionmaker(eng, expire_on_commit=False, class_=AsyncSession)
+    async with eng.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with Session() as db:
+        seed = await create_project(db, ProjectCreate(name=f"seed-{uuid.uuid4().hex}"))
+    errors = 0
+
+    async def op(fn):
+        nonlocal errors
+        try:
+            async with Session() as db:
+                await fn(db)
+        except OperationalError:
+            errors += 1
+
+    async def writer():
+        for _ in range(OPS):
+            await op(lambda db: create_project(db, ProjectCreate(name=uuid.uuid4().hex)))
+
+    async def reader():
+        for _ in range(OPS):
+            await op(lambda db: get_project(db, seed.id))
+
+    t = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(writers)), *(reader() for _ in range(readers)))
+    sec = time.perf_counter() - t
+    await eng.dispose()
+    return sec, (writers + readers) * OPS, errors
+
+
+def main(writers: int = 8, readers: int = 32, workdir: str | None = None) -> None:
+    root = Path(workdir or tempfile.mkdtemp(prefix="bench_db_"))
+    root.mkdir(parents=True, exist_ok=True)
+    print(f"writers={writers}, readers={readers}, {OPS} ops each")
+    for name, factory in [
+        ("default engine", lambda url: create_async_engine(url)),
+        ("make_engine (WAL)", make_engine),
+    ]:
+        path = root / f"{name.split()[0]}.db"
+        for p in root.glob(path.name + "*"):
+            p.unlink()
+        sec, ops, errors = asyncio.run(run(factory(f"sqlite+aiosqlite:///{path}"), writers, readers))
+        print(f"  {name:18s} {sec:6.2f}s  {ops / sec:8,.0f} ops/s  locked errors: {errors}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(*(int(a) for a in args[:2]), *args[2:3])
@@ -0,0 +1,81 @@
+"""
+apply_mapping: прежняя реализация (колонки по одной в пустой DataFrame,
+`map` с Python-функцией, slugify на каждом вызове, даты — to_datetime без
+формата + strftime по элементам) против плана.
+
+    python -m benchmarks.bench_mapping [rows]
+"""
+import sys, time
+
+import numpy as np
+import pandas as pd
+from slugify import slugify
+
+from app.mapping.engine import apply_mapping
+from app.mapping.schemas import MappingConfig, MappingRule
+from app.mapping.transforms import TRANSFORMS
+
+
+def legacy_apply_mapping(df: pd.DataFrame, cfg: MappingConfig) -> pd.DataFrame:
+    out = pd.DataFrame()
+    for rule in cfg.rules:
+        col = df[rule.source]
+        if rule.type == "int":
+            col = pd.to_numeric(col, errors="coerce").astype("Int64")
+        elif rule.type == "float":
+            col = pd.to_numeric(col, errors="coerce")
+        elif rule.type == "date":
+            col = pd.to_datetime(col, errors="coerce").dt.strftime(rule.date_format or "%Y-%m-%d")
+        if rule.transform in TRANSFORMS:
+            col = col.map(TRANSFORMS[rule.transform])
+        out[rule.target] = col
+    out.columns = [slugify(c, separator="_") for c in out.columns]
+    return out
+
+
+CONFIG = MappingConfig(project_id="bench", rules=[
+    MappingRule(source="name",  target="Имя клиента", transform="title"),
+    MappingRule(source="name",  target="name_upper",  transform="upper"),
+    MappingRule(source="email", target="email",       transform="lower"),
+    MappingRule(source="city",  target="Город",       transform="trim"),
+    MappingRule(source="code",  target="code",        transform="trim"),
+    MappingRule(source="count", target="count",       type="int"),
+    MappingRule(source="amount", target="amount",     type="float"),
+    MappingRule(source="birthdate", target="birthdate", type="date", date_format="%d.%m.%Y"),
+])
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    names = np.array(["  ivan ivanov ", "ANNA petrova", "john smith  ", None], dtype=object)
+    return pd.DataFrame({
+        "name":   pd.Series(names[rng.integers(0, 4, rows)], dtype="str"),
+        "email":  [f"User{i}@Example.com" for i in range(rows)],
+        "city":   rng.choice([" Moscow", "Kazan ", " Tver "], rows),
+        "code":   pd.Series(rng.choice(["a1 ", " b2", 7, None], rows), dtype=object),
+        "count":  rng.integers(0, 100, rows).astype(str),
+        "amount": np.round(rng.random(rows) * 1000, 2),
+        "birthdate": rng.choice(pd.date_range("1950-01-01", "2005-12-31").strftime("%Y-%m-%d"), rows),
+    })
+
+
+def bench(fn, df: pd.DataFrame, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn(df, CONFIG)
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main(rows: int = 500_000) -> None:
+    df = make_frame(rows)
+    pd.testing.assert_frame_equal(legacy_apply_mapping(df, CONFIG), apply_mapping(df, CONFIG))
+    print(f"rows={rows}, rules={len(CONFIG.rules)}")
+    for name, fn in [("old (map + insert)", legacy_apply_mapping), ("new (compiled plan)", apply_mapping)]:
+        sec = bench(fn, df)
+        print(f"{name:22s} {sec:7.3f}s  {rows / sec:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
@@ -0,0 +1,109 @@
+"""
+Движки чтения: pandas против pyarrow на сгенерированных CSV и NDJSON.
+
+Каждый замер идёт в отдельном процессе, чтобы пиковый RSS
+(см. peak_rss) не смешивался между прогонами.
+
+    python -m benchmarks.bench_readers [size_mb] [workdir]
+
+size_mb — примерный размер каждого файла (по умолчанию 100; до 1024).
+Файлы генерируются один раз в workdir (по умолчанию /tmp/bench_readers).
+"""
+import json, resource, subprocess, sys, time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ENGINES = ("pandas", "pyarrow")
+_BLOCK = 200_000
+
+
+def _block(rng: np.random.Generator, start: int) -> pd.DataFrame:
+    names = np.array(["Ivan Ivanov", "Anna Petrova", "John Smith", ""], dtype=object)
+    return pd.DataFrame({
+        "id":        np.arange(start, start + _BLOCK),
+        "name":      names[rng.integers(0, 4, _BLOCK)],
+        "email":     [f"user{i}@example.com" for i in range(start, start + _BLOCK)],
+        "birthdate": pd.Series(pd.to_datetime(rng.integers(0, 18_000, _BLOCK), unit="D")).dt.strftime("%Y-%m-%d"),
+        "amount":    np.round(rng.random(_BLOCK) * 1000, 2),
+        "city":      rng.choice(["Moscow", "Kazan", "Tver", "Omsk"], _BLOCK),
+    })
+
+
+def generate(path: Path, size_mb: int) -> None:
+    """Дописывать блоки по _BLOCK строк, пока файл не дорастёт до size_mb."""
+    if path.exists() and path.stat().st_size >= size_mb << 20:
+        return
+    rng = np.random.default_rng(0)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        start = 0
+        while f.tell() < size_mb << 20:
+            df = _block(rng, start)
+            if path.suffix == ".csv":
+                df.to_csv(f, index=False, header=start == 0)
+            else:
+                df.to_json(f, orient="records", lines=True)
+            start += _BLOCK
+    tmp.replace(path)
+
+
+def peak_rss() -> int:
+    """
+    Пиковый RSS процесса в байтах. На Linux — VmHWM: `ru_maxrss` переживает
+    exec и наследует пик родителя, который генерировал данные.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) << 10
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss << 10     # КиБ → байты
+
+
+def child(engine: str, path: str) -> None:
+    """Один замер: прочитать файл целиком, напечатать JSON с результатом."""
+    from app.parser.readers import parse_file
+    t = time.perf_counter()
+    df = parse_file(Path(path), engine=engine)
+    sec = time.perf_counter() - t
+    rss = peak_rss()
+    print(json.dumps({"rows": len(df), "sec": sec, "rss": rss}))
+
+
+def measure(engine: str, path: Path) -> dict | str:
+    """Результат замера или последняя строка ошибки дочернего процесса."""
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_readers", "--child", engine, str(path)],
+        capture_output=True, text=True,
+    )
+    if proc.returncode:
+        return (proc.stderr.strip().splitlines() or ["failed"])[-1]
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(size_mb: int = 100, workdir: str = "/tmp/bench_readers") -> None:
+    root = Path(workdir)
+    root.mkdir(parents=True, exist_ok=True)
+    for ext in (".csv", ".json"):
+        path = root / f"data_{size_mb}mb{ext}"
+        generate(path, size_mb)
+        mb = path.stat().st_size / 2**20
+        print(f"{path.name}: {mb:,.0f} MiB")
+        for engine in ENGINES:
+            r = measure(engine, path)
+            if isinstance(r, str):
+                print(f"  {engine:8s} FAILED: {r}")
+                continue
+            print(f"  {engine:8s} {r['sec']:7.2f}s  {mb / r['sec']:7.1f} MiB/s"
+                  f"  {r['rows'] / r['sec']:12,.0f} rows/s  peak RSS {r['rss'] / 2**20:7.0f} MiB")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 100, *sys.argv[2:3])
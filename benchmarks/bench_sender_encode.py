@@ -0,0 +1,55 @@
+"""
+Сериализация DataFrame в тело запроса: прежний путь против encode_records.
+
+    old: orjson.loads(df.to_json(orient="records")) → json.dumps (как httpx json=)
+    new: encoder.encode_records(df)                  → bytes (content=)
+
+    python -m benchmarks.bench_sender_encode [rows]
+"""
+import json, sys, time, warnings
+import numpy as np
+import orjson
+import pandas as pd
+
+from app.sender.encoder import encode_records
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    names = np.array(["Ivan Ivanov", "Anna Petrova", "John Smith", None], dtype=object)
+    return pd.DataFrame({
+        "name":      names[rng.integers(0, 4, rows)],
+        "email":     [f"user{i}@example.com" for i in range(rows)],
+        "birthdate": pd.Series(pd.date_range("1970-01-01", periods=rows, freq="h")).dt.strftime("%Y-%m-%d"),
+        "amount":    np.where(rng.random(rows) < .05, np.nan, np.round(rng.random(rows) * 1000, 2)),
+        "count":     pd.array(np.where(rng.random(rows) < .05, None, rng.integers(0, 100, rows)), dtype="Int64"),
+        "created":   pd.date_range("2020-01-01", periods=rows, freq="min"),
+    })
+
+
+def old_path(df: pd.DataFrame) -> bytes:
+    payload = orjson.loads(df.to_json(orient="records"))
+    return json.dumps(payload).encode()
+
+
+def bench(fn, df: pd.DataFrame, repeat: int = 3) -> tuple[float, int]:
+    best, size = float("inf"), 0
+    for _ in range(repeat):
+        t = time.perf_counter()
+        size = len(fn(df))
+        best = min(best, time.perf_counter() - t)
+    return best, size
+
+
+def main(rows: int = 200_000) -> None:
+    warnings.simplefilter("ignore")         # to_json: epoch date_format deprecated
+    df = make_frame(rows)
+    assert orjson.loads(old_path(df)) == orjson.loads(encode_records(df))
+    print(f"rows={rows}")
+    for name, fn in [("old (to_json→loads→json.dumps)", old_path), ("new (encode_records)", encode_records)]:
+        sec, size = bench(fn, df)
+        print(f"{name:34s} {sec:7.3f}s  {rows / sec:12,.0f} rows/s  {size / 2**20:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
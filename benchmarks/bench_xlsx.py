@@ -0,0 +1,80 @@
+"""
+XLSX: прежний `pd.read_excel(engine="openpyxl")` против потокового ридера.
+
+    read_excel — прежний путь (pandas + openpyxl, весь лист в списки)
+    parse_file — read-only openpyxl, результат целиком
+    iter_file  — read-only openpyxl кусками по 50 000 строк (как пайплайн)
+
+Каждый замер — в отдельном процессе (пиковый RSS — см. peak_rss).
+
+    python -m benchmarks.bench_xlsx [rows] [workdir]
+"""
+import json, subprocess, sys, time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_readers import peak_rss
+
+MODES = ("read_excel", "parse_file", "iter_file")
+
+
+def generate(path: Path, rows: int) -> None:
+    """Книга через to_excel: как у Excel, <dimension> листа пишется до данных."""
+    if path.exists():
+        return
+    rng = np.random.default_rng(0)
+    names = np.array(["Ivan Ivanov", "Anna Petrova", "John Smith", None], dtype=object)
+    df = pd.DataFrame({
+        "id":        np.arange(rows),
+        "name":      names[np.arange(rows) % 4],
+        "email":     [f"user{i}@example.com" for i in range(rows)],
+        "birthdate": pd.to_datetime(rng.integers(0, 18_000, rows), unit="D"),
+        "amount":    np.round(rng.random(rows) * 1000, 2),
+        "city":      rng.choice(["Moscow", "Kazan", "Tver"], rows),
+    })
+    tmp = path.with_suffix(".tmp.xlsx")
+    df.to_excel(tmp, index=False, sheet_name="data")
+    tmp.replace(path)
+
+
+def child(mode: str, path: str) -> None:
+    from app.parser.readers import iter_file, parse_file
+    t = time.perf_counter()
+    if mode == "read_excel":
+        rows = len(pd.read_excel(path, engine="openpyxl"))
+    elif mode == "parse_file":
+        rows = len(parse_file(Path(path)))
+    else:
+        rows = sum(len(c) for c in iter_file(Path(path), 50_000))
+    sec = time.perf_counter() - t
+    rss = peak_rss()
+    print(json.dumps({"rows": rows, "sec": sec, "rss": rss}))
+
+
+def measure(mode: str, path: Path) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_xlsx", "--child", mode, str(path)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(rows: int = 300_000, workdir: str = "/tmp/bench_xlsx") -> None:
+    root = Path(workdir)
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / f"data_{rows}.xlsx"
+    generate(path, rows)
+    print(f"{path.name}: {path.stat().st_size / 2**20:,.1f} MiB, {rows:,} rows")
+    for mode in MODES:
+        r = measure(mode, path)
+        print(f"  {mode:10s} {r['sec']:7.2f}s  {r['rows'] / r['sec']:10,.0f} rows/s"
+              f"  peak RSS {r['rss'] / 2**20:7.0f} MiB")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 300_000, *sys.argv[2:3])
@@ -0,0 +1,12 @@
+"""
+Общая настройка тестов: БД проектов — во временном каталоге.
+
+Переменная окружения задаётся здесь, до импорта `core.settings` модулями
+тестов: движок SQLAlchemy создаётся при импорте `app.project.db`, и
+поздний `DB_PATH` в фикстуре уже не действует (а mapping.db появлялся в
+корне репозитория). Sidecar-базы (outbox / jobs / catalog) лежат рядом с
+DB_PATH и тоже уходят во временный каталог.
+"""
+import os, tempfile
+
+os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="mapping-tests-"), "mapping.db")
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -6,15 +7,82 @@ class Settings(BaseSettings):
     DB_PATH: str = "mapping.db"
     ALLOWED_EXT: str = ".csv,.xlsx,.json"
 
+    # DB проектов
+    DATABASE_URL: str | None = None       # postgresql+asyncpg://… для нескольких узлов; пусто — SQLite в DB_PATH
+    DB_POOL_SIZE: int = 5                 # постоянных соединений в пуле
+    DB_MAX_OVERFLOW: int = 10             # сверх пула под пиковую нагрузку
+    DB_POOL_TIMEOUT: float = 30.0         # сек. ожидания свободного соединения
+    DB_BUSY_TIMEOUT: float = 30.0         # сек. ожидания блокировки SQLite вместо «database is locked»
+    DB_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL"] = "NORMAL"   # NORMAL безопасен в WAL
+    DB_CACHE_KIB: int = 16_384            # страничный кэш SQLite на соединение
+    DB_MMAP_MIB: int = 64                 # чтение файла БД через mmap; 0 — выключено
+
     # S3
     S3_ENDPOINT: str | None = None
     S3_REGION: str = "ru-central1"
     S3_BUCKET: str | None = None
     S3_KEY: str | None = None
     S3_SECRET: str | None = None
+    S3_PART_SIZE: int = 8 << 20           # байт на часть параллельного скачивания (и порог для него)
+    S3_CONCURRENCY: int = 4               # частей одного объекта качается одновременно
 
     #API
     SENDER_ENDPOINT: str = "https://api.partner.com/v1/upload"
+    SENDER_HTTP2: bool = True             # мультиплексирование запросов в одном соединении
+    SENDER_MAX_CONNECTIONS: int = 20      # лимиты пула httpx на один endpoint
+    SENDER_MAX_KEEPALIVE: int = 10
+    SENDER_KEEPALIVE_EXPIRY: float = 30.0 # сек. простоя до закрытия keep-alive соединения
+    SENDER_BATCH_ROWS: int = 5_000        # строк в одном POST; 0 — весь DataFrame одним запросом
+    SENDER_CONCURRENCY: int = 4           # сколько батчей летит одновременно
+    SENDER_COMPRESS_MIN_BYTES: int = 1024 # тела меньше этого не сжимаем (метод — на проекте)
+
+    # Outbox: надёжная доставка (файлы кусков + индекс outbox.db рядом с DB_PATH)
+    OUTBOX_ENABLED: bool = True
+    OUTBOX_DIR: str = str(Path(__file__).resolve().parent.parent / "outbox")
+    OUTBOX_POLL_INTERVAL: float = 5.0     # сек. между проходами доставщика
+    OUTBOX_RETRY_BASE: float = 30.0       # первая задержка повтора, дальше ×2
+    OUTBOX_RETRY_MAX: float = 3600.0
+    OUTBOX_MAX_ATTEMPTS: int = 20         # после — статус dead
+    OUTBOX_LEASE: float = 120.0           # сек. аренды записи «в полёте»; продлевается, пока идёт отправка
+
+    # Auth
+    AUTH_CACHE_TTL: float = 60.0          # сек. жизни проекта в кэше авторизации; 0 — без кэша
+    AUTH_CACHE_SIZE: int = 10_000         # проектов в кэше (LRU)
+
+    # Mapping
+    MAPPING_CACHE_SIZE: int = 256         # конфигов в памяти процесса (LRU)
+
+    # Parser
+    READER_ENGINE: Literal["pandas", "pyarrow"] = "pandas"   # pyarrow — многопоточный CSV/NDJSON
+    READER_BLOCK_SIZE: int = 16 << 20     # байт на блок потокового чтения pyarrow
+    READER_BUFFER_ROWS: int = 100_000     # строк в буфере потоковых ридеров (JSON, XLSX) при чтении целиком
+    READER_XLSX_SHEET: str = ""           # лист XLSX: "" — первый, "*" — все подряд, иначе имя
+    SNIFF_BYTES: int = 64 << 10           # сколько байт начала файла читать для превью колонок
+    SNIFF_ROWS: int = 5                   # строк для вывода типов и примеров значений
+
+    # Кэш разобранных/смапленных DataFrame (Arrow IPC, ключ — хэш файла + версия конфига)
+    FRAME_CACHE_ENABLED: bool = True
+    FRAME_CACHE_DIR: str = str(Path(__file__).resolve().parent.parent / "cache" / "frames")
+    FRAME_CACHE_MAX_BYTES: int = 2 << 30  # размер каталога; сверх — вытеснение давно не читанных
+
+    # Jobs: очередь заданий пайплайна (индекс jobs.db рядом с DB_PATH)
+    JOBS_IN_PROCESS: bool = True          # воркеры внутри веб-сервера; false — отдельно: python -m app.jobs
+    JOBS_WORKERS: int = 2                 # пайплайнов одновременно на процесс
+    JOBS_PER_PROJECT: int = 1             # пайплайнов одного проекта одновременно (на все процессы)
+    JOBS_MAX_PENDING: int = 1000          # ждущих заданий; сверх — 429 на загрузку
+    JOBS_LEASE: float = 60.0              # сек. аренды задания; продлевается, пока воркер жив
+    JOBS_MAX_ATTEMPTS: int = 3            # падений воркера на одном задании, после — failed
+    JOBS_POLL_INTERVAL: float = 1.0       # сек. между опросами очереди
+    JOBS_PROGRESS_INTERVAL: float = 1.0   # сек. между записями прогресса задания (не чаще)
+    JOBS_RETENTION: float = 7 * 24 * 3600  # сек. хранения завершённых заданий (done / failed); 0 — не удалять
+
+    # Metrics: GET /metrics у веб-сервера; процесс воркеров отдаёт свои на этом порту
+    METRICS_WORKER_PORT: int = 9101       # 0 — не поднимать
+
+    # Pipeline
+    PIPELINE_CHUNK_ROWS: int = 50_000     # строк в куске; 0 — читать файл целиком
+    PIPELINE_POOL: Literal["process", "thread"] = "process"   # где крутить map/QC
+    PIPELINE_WORKERS: int = 0             # размер пула; 0 — по числу ядер
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 settings = Settings()